@@ -10,6 +10,8 @@ def paint():
         # painter.plot("depths", method="rj", ave=True)
         # painter.plot("depths", method="mc", ave=True)
         painter.plot("model", idts=["rf_moho", "mc_moho", "poisson"])
+        # painter.plot("vel", method="tpwt", jobs=4)
+        # painter.plot("diff", jobs=4, scratch=True)
         # painter.plot("profiles", method="mc", depths=200)
         # # painter.plot(idt="profiles", method="mc", depths=200, ave=True)
         # painter.plot("profiles", method="rj", depths=60)
@@ -0,0 +1,18 @@
+-- indexes built after the bulk load of `init_database`.
+-- `DataQueryer.query` joins `grid` with the child tables by `grid_id`
+-- and filters phase by (method, period) and swave by depth,
+-- `DataQueryer.iter_query` reads swave by ranges of grid nodes.
+CREATE INDEX IF NOT EXISTS idx_phase_method_period
+  ON phase (method, period, grid_id);
+
+CREATE INDEX IF NOT EXISTS idx_swave_depth
+  ON swave (depth, grid_id);
+
+CREATE INDEX IF NOT EXISTS idx_swave_grid
+  ON swave (grid_id, depth);
+
+CREATE INDEX IF NOT EXISTS idx_model_grid
+  ON model (grid_id);
+
+-- statistics for the query planner
+ANALYZE;
@@ -1,20 +1,25 @@
 PRAGMA foreign_keys = ON;
--- grid nodes(id, x, y)
+-- declared types are the sqlite affinities INTEGER/REAL/TEXT
+-- so values round-trip as they are written,
+-- and grid.id as INTEGER PRIMARY KEY is the rowid of joins.
+-- grid nodes(id, x, y, inside_hull)
+-- inside_hull flags nodes inside `area_hull.csv` as the reference of ave
 CREATE TABLE grid (
-  id INT PRIMARY KEY,
-  x FLOAT not null,
-  y FLOAT not null
+  id INTEGER PRIMARY KEY,
+  x REAL not null,
+  y REAL not null,
+  inside_hull INTEGER DEFAULT 1
 );
 
 -- grid models(grid_id, sed, rf_moho, mc_misfit, mc_moho, poisson)
 CREATE TABLE model (
-  grid_id INT,
-  sedthk FLOAT,
-  rf_moho FLOAT,
-  mc_misfit FLOAT,
-  mc_moho FLOAT,
-  lab FLOAT,
-  poisson FLOAT,
+  grid_id INTEGER,
+  sedthk REAL,
+  rf_moho REAL,
+  mc_misfit REAL,
+  mc_moho REAL,
+  lab REAL,
+  poisson REAL,
   FOREIGN KEY (grid_id) REFERENCES grid(id)
 );
 
@@ -35,9 +40,25 @@ CREATE TABLE model (
 -- shear wave (grid_id, depth, velocity, group(ant/tpwt))
 CREATE TABLE swave (
   -- id INT PRIMARY KEY,
-  grid_id INT,
-  depth FLOAT,
-  rj_vs FLOAT,
-  mc_vs FLOAT,
+  grid_id INTEGER,
+  depth REAL,
+  rj_vs REAL,
+  mc_vs REAL,
   FOREIGN KEY (grid_id) REFERENCES grid(id)
 );
+
+-- source files of tables for incremental rebuild
+-- (path relative to data dir, size, mtime, content hash)
+CREATE TABLE manifest (
+  path TEXT PRIMARY KEY,
+  size INTEGER,
+  mtime REAL,
+  hash TEXT
+);
+
+-- catalog of tables written at ingest (key, json value):
+-- methods, periods, depths, dchecks, region, spacing and rows
+CREATE TABLE catalog (
+  key TEXT PRIMARY KEY,
+  value TEXT
+);
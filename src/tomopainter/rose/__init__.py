@@ -1,15 +1,23 @@
 from .data_info import calc_lab
+from .filters import between
 from .grid import GridPhv, GridVs
-from .points import area_hull_files, points_boundary, points_inner
+from .grid_index import GridIndex
+from .hull import HullMask, hull_mask_of, xyz_hull_mask
+from .points import area_hull_files, inner_mask, points_boundary, points_inner
 from .profile import idt_profiles, init_profiles
-from .query import DataQueryer, xyz_ave  # , read_xyz_from_csv
+from .query import DataQueryer, open_queryer, xyz_ave  # , read_xyz_from_csv
 
 __all__ = [
     "GridPhv",
     "GridVs",
+    "GridIndex",
+    "HullMask",
+    "hull_mask_of",
+    "xyz_hull_mask",
     # "vel_info",
     "points_boundary",
     "points_inner",
+    "inner_mask",
     "calc_lab",
     "area_hull_files",
     # "vel_info_per",
@@ -18,4 +26,6 @@ __all__ = [
     # "read_xyz_from_csv",
     "xyz_ave",
     "DataQueryer",
+    "open_queryer",
+    "between",
 ]
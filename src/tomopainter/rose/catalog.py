@@ -0,0 +1,89 @@
+"""
+catalog of `grids.db` written at ingest, so opening the database
+needs no `SELECT DISTINCT` scans of tables.
+"""
+import json
+
+TABLES = ["grid", "phase", "swave", "model"]
+
+
+def build_catalog(conn, region=None, spacing=None) -> dict:
+    """scan tables for the catalog, `region` and `spacing` of grid"""
+    from .grid_index import GridIndex
+    from .query import _select_distinct
+
+    cursor = conn.cursor()
+    methods = _select_distinct(cursor, "phase", "method", "1")
+    periods = {
+        method: _select_distinct(
+            cursor, "phase", "period", "method=?", (method,)
+        )
+        for method in sorted({"ant", "tpwt", *methods})
+    }
+    depths = {
+        method: _select_distinct(
+            cursor, "swave", "depth", f'"{method}_vs" IS NOT NULL'
+        )
+        for method in ["rj", "mc"]
+    }
+    columns = [
+        row[1] for row in cursor.execute("PRAGMA table_info(phase);")
+    ]
+    rows = {}
+    for table in TABLES:
+        if _table_exists(cursor, table):
+            rows[table] = cursor.execute(
+                f"SELECT COUNT(*) FROM {table};"
+            ).fetchone()[0]
+    if region is None and rows.get("grid"):
+        xy = cursor.execute("SELECT x, y FROM grid;").fetchall()
+        gidx = GridIndex.from_xy(*zip(*xy))
+        region, spacing = gidx.region, gidx.spacing
+    return {
+        "methods": methods,
+        "periods": periods,
+        "depths": depths,
+        "dchecks": [col for col in columns if col.startswith("dcheck")],
+        "region": None if region is None else [float(r) for r in region],
+        "spacing": None if spacing is None else float(spacing),
+        "rows": rows,
+    }
+
+
+def write_catalog(conn, region=None, spacing=None) -> dict:
+    """(re)write table catalog after ingest"""
+    catalog = build_catalog(conn, region, spacing)
+    with conn:
+        # databases written before table catalog
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS catalog (
+              key TEXT PRIMARY KEY,
+              value TEXT
+            );
+            """
+        )
+        conn.execute("DELETE FROM catalog;")
+        conn.executemany(
+            "INSERT INTO catalog VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in catalog.items()],
+        )
+    return catalog
+
+
+def read_catalog(conn) -> None | dict:
+    """catalog of the database, None if it was written without one"""
+    cursor = conn.cursor()
+    if not _table_exists(cursor, "catalog"):
+        return None
+    rows = cursor.execute("SELECT key, value FROM catalog;").fetchall()
+    return {key: json.loads(value) for key, value in rows} or None
+
+
+def _table_exists(cursor, table) -> bool:
+    return bool(
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name=?;",
+            (table,),
+        ).fetchone()
+    )
@@ -0,0 +1,202 @@
+"""
+dense 3-D cube of vs built once from table swave.
+one variable per method, like `mc_vs(depth, y, x)`, in a netCDF file
+chunked by (depth, y, x) tiles, so a depth slice or a vertical column
+reads only the chunks it touches.
+"""
+import json
+from pathlib import Path
+
+import netCDF4
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from .grid_index import GridIndex
+from .lab import pick_lab
+
+# chunk of the cube, depths and nodes of a tile. a depth slice, read
+# per depth by `GridVs`, decompresses only its own tiles; a column
+# reads one small tile per depth.
+CUBE_CHUNKS = {"depth": 1, "y": 32, "x": 32}
+
+
+def build_cube(queryer, cfile: Path) -> Path:
+    """write vs of all methods of `queryer` into `cfile`, slice by slice"""
+    gidx = queryer.grid_index()
+    methods = [m for m, deps in queryer.depths.items() if deps]
+    depths = sorted({dep for m in methods for dep in queryer.depths[m]})
+    tmp = cfile.with_name(f"{cfile.name}.tmp")
+    with netCDF4.Dataset(tmp, "w") as ds:
+        ds.stamp = json.dumps(list(queryer.stamp()))
+        ds.region = gidx.region
+        ds.spacing = gidx.spacing
+        for dim, values in zip(
+            ["depth", "y", "x"], [depths, gidx.ys, gidx.xs]
+        ):
+            ds.createDimension(dim, len(values))
+            ds.createVariable(dim, "f8", (dim,))[:] = values
+        sizes = [len(depths), *gidx.shape]
+        chunks = [
+            min(CUBE_CHUNKS[dim], size)
+            for dim, size in zip(["depth", "y", "x"], sizes)
+        ]
+        for method in methods:
+            col = f"{method}_vs"
+            var = ds.createVariable(
+                col,
+                "f4",
+                ("depth", "y", "x"),
+                chunksizes=chunks,
+                fill_value=np.float32(np.nan),
+            )
+            # one depth in memory a time
+            for df in queryer.iter_query("swave", usecols=[col], by="depth"):
+                idep = depths.index(df["depth"].iloc[0])
+                var[idep] = gidx.dataarray(df["x"], df["y"], df[col]).values
+    tmp.replace(cfile)
+    return cfile
+
+
+class VsCube:
+    """depth slices, columns, profiles and lab read from the cube"""
+
+    def __init__(self, cfile) -> None:
+        self.cfile = Path(cfile)
+        self.ds = xr.open_dataset(self.cfile, engine="netcdf4")
+        self.stamp = tuple(json.loads(self.ds.attrs["stamp"]))
+        region = list(self.ds.attrs["region"])
+        spacing = float(self.ds.attrs["spacing"])
+        self.gidx = GridIndex(region, spacing)
+        self.methods = [
+            str(var).removesuffix("_vs") for var in self.ds.data_vars
+        ]
+        self.depths = self.ds["depth"].values
+        self._means = {}
+
+    def close(self) -> None:
+        self.ds.close()
+
+    def vs(self, method) -> xr.DataArray:
+        """lazy (depth, y, x) vs of `method`"""
+        if method not in self.methods:
+            raise KeyError(f"{method} is not a method of {self.cfile}.")
+        return self.ds[f"{method}_vs"]
+
+    def depth_slice(self, method, depth) -> xr.DataArray:
+        """(y, x) grid of vs at `depth`"""
+        idep = self._depth_index(depth)
+        return self.vs(method).isel(depth=idep).load()
+
+    def column(self, method, x, y) -> xr.DataArray:
+        """vs of all depths at the node of (x, y)"""
+        [ix], [iy] = self.gidx.ixy([x], [y])
+        if ix < 0:
+            raise ValueError(f"({x}, {y}) is not a node of the cube.")
+        return self.vs(method).isel(x=ix, y=iy).load()
+
+    def profile(
+        self, method, x, y, depths=None, ave=False
+    ) -> pd.DataFrame:
+        """
+        vs (x, y, z, v) along points of a path, like `GridVs.track_vs`,
+        bilinear between the nodes around each point and missing if
+        one of them is. `ave` gives anomalies by `hull_means`.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        gx = (x - self.gidx.xs[0]) / self.gidx.spacing
+        gy = (y - self.gidx.ys[0]) / self.gidx.spacing
+        ny, nx = self.gidx.shape
+        on = (gx >= 0) & (gx <= nx - 1) & (gy >= 0) & (gy <= ny - 1)
+        if not on.any():
+            raise ValueError("No points of the path are in the cube.")
+        ideps = np.arange(len(self.depths))
+        if depths is not None:
+            ideps = np.array([self._depth_index(d) for d in depths])
+        vs = self.vs(method).isel(depth=ideps)
+        corners = _corners(gx[on], gy[on], nx, ny)
+        ixs, iys = corners[0], corners[1]
+        # read the bounding box of the path only
+        box = vs.isel(
+            x=slice(ixs.min(), ixs.max() + 1),
+            y=slice(iys.min(), iys.max() + 1),
+        ).values
+        values = np.full((len(ideps), len(x)), np.nan)
+        values[:, on] = 0
+        for ix, iy, weight in zip(*corners):
+            node = box[:, iy - iys.min(), ix - ixs.min()]
+            # a missing node is missing in the sum unless weighted 0
+            values[:, on] += np.where(weight > 0, node * weight, 0)
+        if ave:
+            means = self.hull_means(method)[ideps, None]
+            values = (values - means) / means * 100
+        deps = self.depths[ideps]
+        return pd.DataFrame(
+            {
+                "x": np.tile(x, len(deps)),
+                "y": np.tile(y, len(deps)),
+                "z": -np.repeat(np.abs(deps), len(x)),
+                "v": values.ravel(),
+            }
+        ).dropna()
+
+    def hull_means(self, method) -> np.ndarray:
+        """
+        mean vs inside the hull of per depth, the reference of `ave`
+        like `hull_anomaly`, of all nodes without a hull file.
+        """
+        if method in self._means:
+            return self._means[method]
+        from .hull import hull_mask_of
+        from .points import HULL_FILE
+
+        inside = np.ones(self.gidx.shape, dtype=bool)
+        if HULL_FILE.exists():
+            mask = hull_mask_of(self.gidx.region, self.gidx.spacing)
+            inside = mask.mask
+        means = np.full(len(self.depths), np.nan)
+        for idep in range(len(self.depths)):
+            values = self.vs(method).isel(depth=idep).values
+            valid = ~np.isnan(values)
+            if (valid & inside).any():
+                valid &= inside
+            if valid.any():
+                means[idep] = values[valid].mean()
+        self._means[method] = means
+        return means
+
+    def lab(self, limits=None, criterion="gradient") -> pd.DataFrame:
+        """lab (grid_id, lab) picked from mcmc vs of the cube"""
+        limits = limits or [54, 200]
+        inside = (self.depths > limits[0]) & (self.depths < limits[1])
+        vs = self.vs("mc").isel(depth=np.flatnonzero(inside)).values
+        # (depth, y, x) into (node x depth) by grid ids x-major
+        matrix = vs.transpose(2, 1, 0).reshape(len(self.gidx), -1)
+        labs = pick_lab(self.depths[inside], matrix, limits, criterion)
+        lab_df = pd.DataFrame(
+            {"grid_id": np.arange(len(self.gidx)), "lab": labs}
+        )
+        return lab_df.dropna().reset_index(drop=True)
+
+    def _depth_index(self, depth) -> int:
+        idx = np.flatnonzero(np.isclose(self.depths, abs(depth)))
+        if len(idx) == 0:
+            raise ValueError(f"{depth} is not a depth of the cube.")
+        return int(idx[0])
+
+
+def _corners(gx, gy, nx, ny) -> tuple[np.ndarray, ...]:
+    """(ix, iy, weight) of the four nodes around points of grid units"""
+    ix0 = np.clip(np.floor(gx).astype(int), 0, max(nx - 2, 0))
+    iy0 = np.clip(np.floor(gy).astype(int), 0, max(ny - 2, 0))
+    ix1 = np.minimum(ix0 + 1, nx - 1)
+    iy1 = np.minimum(iy0 + 1, ny - 1)
+    fx, fy = gx - ix0, gy - iy0
+    return (
+        np.stack([ix0, ix1, ix0, ix1]),
+        np.stack([iy0, iy0, iy1, iy1]),
+        np.stack(
+            [(1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy]
+        ),
+    )
@@ -4,45 +4,42 @@ from pathlib import Path
 from icecream import ic
 import numpy as np
 import pandas as pd
-import pygmt
 
 from .grid import GridPhv
+from .points import points_boundary, points_inner
 
-# from .points import points_boundary, points_inner
 
-
-# def read_xyz(file: Path) -> pd.DataFrame:
-#     return pd.read_csv(
-#         file,
-#         delim_whitespace=True,
-#         usecols=[0, 1, 2],
-#         names=["x", "y", "z"],
-#         header=None,
-#     )
+def read_xyz(file: Path) -> pd.DataFrame:
+    return pd.read_csv(
+        file,
+        delim_whitespace=True,
+        usecols=[0, 1, 2],
+        names=["x", "y", "z"],
+        header=None,
+    )
 
 
-# def vel_info_per(data_file: Path, points: list) -> dict:
-#     data = read_xyz(data_file)
-#     data_inner = points_inner(data, points)
+def vel_info_per(data_file: Path, points) -> dict:
+    """velocity of `data_file` inside the boundary `points` of stations"""
+    data = read_xyz(data_file)
+    data_inner = points_inner(data, points)
 
-#     # sourcery skip: inline-immediately-returned-variable
-#     grid_per = {
-#         "vel_avg": data_inner.z.mean(),
-#         "vel_max": data_inner.z.max(),
-#         "vel_min": data_inner.z.min()
-#         # "inner_num": len(data_inner.index)
-#     }
+    # sourcery skip: inline-immediately-returned-variable
+    grid_per = {
+        "vel_avg": data_inner.z.mean(),
+        "vel_max": data_inner.z.max(),
+        "vel_min": data_inner.z.min()
+        # "inner_num": len(data_inner.index)
+    }
 
-#     return grid_per
+    return grid_per
 
 
 def standard_deviation_per(ant: Path, tpwt: Path, region, stas) -> float:
-    from tomopainter.tomo_paint.gmt import tomo_grid
+    from tomopainter.tomo_paint.gmt import tomo_xyz
 
-    temp = "temp/temp.grd"
-    ant_xyz = tomo_grid(ant, region, temp)
-    tpwt_xyz = tomo_grid(tpwt, region, temp)
-    tpwt_xyz = pygmt.grd2xyz(temp)
+    ant_xyz = tomo_xyz(ant, region)
+    tpwt_xyz = tomo_xyz(tpwt, region)
     if ant_xyz is None or tpwt_xyz is None:
         raise ValueError(
             f"""
@@ -108,31 +105,23 @@ def vel_info(target: str, periods=None):
         json.dump(jsd, f)
 
 
-def calc_lab(vs, moho, mlf, limits: list):
-    data = vs.merge(moho, on=["x", "y"], how="left")
-    df = data[(data["z"] < limits[0]) & (data["z"] > limits[1])]
-    dt = df.groupby(["x", "y"], group_keys=False).apply(_gradient)
-    result = (
-        dt.groupby(["x", "y"])
-        .apply(_target_gra)
-        .dropna()
-        .reset_index(drop=True)
-    )
+def calc_lab(vs, moho, mlf, limits: list, criterion="gradient"):
+    """
+    lab of vs (x, y, z, v) with negative depth z between `limits`,
+    saved with moho (x, y, moho) into `mlf`.
+    """
+    from .lab import pick_lab, vs_matrix
+
+    # nodes of (x, y) as ids of the (node x depth) matrix
+    xy = vs[["x", "y"]].to_numpy()
+    nodes, ids = np.unique(xy, axis=0, return_inverse=True)
+    _, deps, matrix = vs_matrix(ids.ravel(), vs["z"].abs(), vs["v"])
+    limits = sorted(abs(lim) for lim in limits)
+    labs = pick_lab(deps, matrix, limits, criterion)
+    result = pd.DataFrame({"x": nodes[:, 0], "y": nodes[:, 1], "z": -labs})
+    result = result.merge(moho, on=["x", "y"], how="left").dropna()
+    result = result[["x", "y", "moho", "z"]].reset_index(drop=True)
     result.rename(columns={"z": "lab"}, inplace=True)
     lab_range = [result["lab"].min(), result["lab"].max()]
     ic(lab_range)
     result.to_csv(mlf, index=None)
-
-
-def _gradient(group):
-    group["gra"] = np.gradient(group["v"], group["z"])
-    return group
-
-
-def _target_gra(group):
-    max_idx = group["gra"].idxmax() if any(group["gra"] < 0) else None
-    return (
-        group.loc[max_idx, ["x", "y", "moho", "z"]]
-        if max_idx is not None
-        else None
-    )
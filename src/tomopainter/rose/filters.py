@@ -0,0 +1,82 @@
+"""
+structured filters of `DataQueryer.query` compiled to bound parameters.
+
+filters = {
+    "method": "tpwt",           # t.method = ?
+    "period": [20, 25, 30],     # t.period IN (?, ?, ?)
+    "depth": between(40, 120),  # t.depth BETWEEN ? AND ?
+    "bbox": [x1, x2, y1, y2],   # g.x BETWEEN ? AND ? AND g.y BETWEEN ..
+}
+"""
+from ctypes import ArgumentError
+
+import numpy as np
+
+# columns of table grid, others belong to the joined table
+GRID_COLS = ["x", "y"]
+# columns of levels of tables, means of `ave` are per level
+LEVEL_COLS = {"phase": ["method", "period"], "swave": ["depth"]}
+
+
+class Between:
+    def __init__(self, low, high) -> None:
+        self.low = low
+        self.high = high
+
+    def __repr__(self) -> str:
+        return f"between({self.low}, {self.high})"
+
+
+def between(low, high) -> Between:
+    """closed range for filters"""
+    return Between(low, high)
+
+
+def compile_filters(filters: dict, columns) -> tuple[tuple, list]:
+    """
+    return the shape of `filters` and their bound parameters.
+    shape is a tuple of (column, operator, number of parameters),
+    and the same shape always makes the same sql by `filters_sql`.
+    """
+    shape = []
+    params = []
+    for col, value in sorted(filters.items()):
+        if col == "bbox":
+            [x1, x2, y1, y2] = value
+            shape += [("x", "between", 2), ("y", "between", 2)]
+            params += [x1, x2, y1, y2]
+            continue
+        if col not in columns and col not in GRID_COLS:
+            raise ArgumentError(f"{col} is not a column to filter.")
+        if isinstance(value, Between):
+            shape.append((col, "between", 2))
+            params += [value.low, value.high]
+        elif isinstance(value, (list, tuple, set, np.ndarray)):
+            values = sorted(value)
+            if not values:
+                raise ArgumentError(f"Nothing to filter {col} by.")
+            shape.append((col, "in", len(values)))
+            params += values
+        else:
+            shape.append((col, "=", 1))
+            params.append(value)
+    return tuple(shape), [_native(p) for p in params]
+
+
+def filters_sql(shape: tuple) -> list[str]:
+    """conditions with `?` placeholders of a filter shape"""
+    conds = []
+    for col, op, num in shape:
+        name = f"g.{col}" if col in GRID_COLS else f't."{col}"'
+        if op == "between":
+            conds.append(f"{name} BETWEEN ? AND ?")
+        elif op == "in":
+            conds.append(f"{name} IN ({', '.join(['?'] * num)})")
+        else:
+            conds.append(f"{name} = ?")
+    return conds
+
+
+def _native(value):
+    # sqlite3 cannot bind numpy scalars like np.int64
+    return value.item() if isinstance(value, np.generic) else value
@@ -1,7 +1,13 @@
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
 
 # import json
 from pathlib import Path
+import shutil
 
 import pandas as pd
 import pygmt
@@ -9,14 +15,28 @@ import pygmt
 
 class GridVs:
     def __init__(self, method, hregion, vs_data, ml_data) -> None:
+        """
+        `vs_data` is (x, y, depth, vs) or a `DataQueryer`,
+        whose depth slices and profiles are read from its `vs_cube`.
+        """
+        from tomopainter.rose import DataQueryer
+
         self.method = method
         self.hregion = hregion
-        self.vs = vs_data
-        self.vs.columns = ["x", "y", "z", "v"]
+        self.queryer = None
+        self.cube = None
+        if isinstance(vs_data, DataQueryer):
+            self.queryer = vs_data
+            self.cube = self.queryer.vs_cube()
+            self.vs = None
+            self.depths = list(self.queryer.depths[method])
+        else:
+            self.vs = vs_data
+            self.vs.columns = ["x", "y", "z", "v"]
+            self.depths = self.vs["z"].unique().tolist()
         self.ml = ml_data
         self.ml.columns = ["x", "y", "moho", "lab"]
         self.fig_dir = Path(f"images/swave_figs/{method}")
-        self.depths = self.vs["z"].unique().tolist()
         self.pdeps = Path(f"temp/{method}")
         self.profile = Path("data/txt/profile.json")
         self._init_data()
@@ -52,6 +72,9 @@ class GridVs:
 
     # pick vs data of grid where is on the path
     def track_vs(self, path, ave):
+        if self.cube is not None:
+            x, y = path["x"], path["y"]
+            return self.cube.profile(self.method, x, y, ave=ave)
         # init dataframe
         data = pd.DataFrame(columns=["x", "y", "z", "v"])
         # get the set of depths
@@ -72,12 +95,11 @@ class GridVs:
     def track_border(self, idt, path: pd.DataFrame):
         from tomopainter.tomo_paint.gmt import tomo_grid
 
-        temp_grd = r"temp/temp.grd"
         data = self.ml[["x", "y", idt]]
-        tomo_grid(data, self.hregion, temp_grd, surface=0.25)
+        grid = tomo_grid(data, self.hregion, surface=0.25)
         track: pd.DataFrame = pygmt.grdtrack(
             points=path,
-            grid=temp_grd,
+            grid=grid,
             verbose="w",
             newcolname="newz",
             coltypes="g",
@@ -99,12 +121,47 @@ class GridVs:
         if self.pdeps.exists():
             return
         self.pdeps.mkdir()
-        with ProcessPoolExecutor(max_workers=10) as pool:
+        try:
+            self._depth_grids(workers=10)
+        except BaseException:
+            # a half-populated dir would be skipped by the next run
+            shutil.rmtree(self.pdeps, ignore_errors=True)
+            raise
+
+    def _depth_grids(self, workers):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            try:
+                for dep, func, data in self._depth_tasks():
+                    # bound slices waiting in the pool
+                    if len(pending) >= 2 * workers:
+                        done, pending = wait(
+                            pending, return_when=FIRST_COMPLETED
+                        )
+                        # raise errors of workers
+                        for future in done:
+                            future.result()
+                    pending.add(
+                        pool.submit(func, data, self.pdeps, dep, self.hregion)
+                    )
+                for future in as_completed(pending):
+                    future.result()
+            except BaseException:
+                pool.shutdown(cancel_futures=True)
+                raise
+
+    def _depth_tasks(self):
+        """(depth, worker, data) of per depth"""
+        if self.queryer is None:
             for dep in self.depths:
                 df = self.vs[self.vs["z"] == dep]
                 df = df[["x", "y", "v"]]
                 df.columns = ["x", "y", "z"]
-                pool.submit(_depth_grid, df, self.pdeps, dep, self.hregion)
+                yield dep, _depth_grid, df
+            return
+        # workers read their depth slices from the cube
+        for dep in self.depths:
+            yield dep, _cube_depth_grid, (self.cube.cfile, self.method)
 
 
 class GridPhv:
@@ -199,13 +256,12 @@ class OldGridVs:
     def track_border(self, idt, path: pd.DataFrame):
         from tomopainter.tomo_paint.gmt import tomo_grid
 
-        temp_grd = r"temp/temp.grd"
         data = self.ml[["x", "y", idt]]
         # tomo_grid_data(data, temp_grd, self.hregion, surface=0.25)
-        tomo_grid(data, self.hregion, temp_grd, surface=0.25)
+        grid = tomo_grid(data, self.hregion, surface=0.25)
         track: pd.DataFrame = pygmt.grdtrack(
             points=path,
-            grid=temp_grd,
+            grid=grid,
             verbose="w",
             newcolname="newz",
             coltypes="g",
@@ -239,23 +295,42 @@ class OldGridVs:
 
 
 def _depth_grid(data, pdir: Path, dep, region):
-    from tomopainter.tomo_paint.gmt import area_clip
+    from tomopainter.rose import GridIndex
+    from tomopainter.rose.hull import hull_mask_of
+    from tomopainter.rose.points import hull_anomaly
 
     fn = str(pdir / f"pre-{dep:.1f}_vel.grd")
     _for_image_and_track(fn, data, region)
     # ave data
-    df_clip = area_clip(data)
-    mean_value = df_clip["z"].mean()
-    data["z"] = (data["z"] - mean_value) / mean_value * 100
+    # the same reference mean as `DataQueryer.query(.., ave=True)`
+    gidx = GridIndex.from_xy(data["x"], data["y"])
+    mask = hull_mask_of(gidx.region, gidx.spacing)
+    data["z"] = hull_anomaly(data["z"], mask.inside(data["x"], data["y"]))
     fn = str(pdir / f"pre-{dep}_ave.grd")
     _for_image_and_track(fn, data, region)
 
 
+def _cube_depth_grid(source, pdir: Path, dep, region):
+    from tomopainter.rose.cube import VsCube
+
+    cfile, method = source
+    cube = VsCube(cfile)
+    try:
+        grid = cube.depth_slice(method, dep)
+    finally:
+        cube.close()
+    data = grid.to_dataframe(name="z").reset_index()[["x", "y", "z"]]
+    _depth_grid(data.dropna(), pdir, dep, region)
+
+
 def _for_image_and_track(fn, data, region):
+    from tomopainter.rose import GridIndex
     from tomopainter.tomo_paint.gmt import tomo_grid
 
-    # grid for hpanel grdimage
-    tomo_grid(data, region, fn.replace("pre", "tomo"))
+    # grid for hpanel grdimage, data is on grid nodes of the database
+    gidx = GridIndex.from_xy(data["x"], data["y"])
+    grid = gidx.dataarray(data["x"], data["y"], data["z"])
+    tomo_grid(grid, region, fn.replace("pre", "tomo"))
     # grid surface for track
     ff = fn.replace("pre", "sf")
     pygmt.surface(data=data, region=region, spacing=0.5, outgrid=ff)
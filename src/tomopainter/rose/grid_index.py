@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+
+class GridIndex:
+    """
+    integer index of the regular grid nodes of table `grid`.
+    nodes are x-major like `_grid_df`: id = ix * ny + iy,
+    so coordinates map to (ix, iy) and id arithmetically.
+    """
+
+    def __init__(self, region, spacing, tol=None) -> None:
+        self.region = list(region)
+        self.spacing = spacing
+        self.xs = _nodes(region[0], region[1], spacing)
+        self.ys = _nodes(region[2], region[3], spacing)
+        self.nx = len(self.xs)
+        self.ny = len(self.ys)
+        # coordinates farther than `tol` from a node are off the grid
+        self.tol = spacing * 1e-3 if tol is None else tol
+
+    @classmethod
+    def from_xy(cls, x, y, spacing=None, tol=None) -> "GridIndex":
+        """index of the grid covering the points (x, y)"""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if spacing is None:
+            spacing = min(_min_step(x), _min_step(y))
+        region = [x.min(), x.max(), y.min(), y.max()]
+        return cls(region, spacing, tol)
+
+    def __len__(self) -> int:
+        return self.nx * self.ny
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """shape (ny, nx) of gridded arrays"""
+        return self.ny, self.nx
+
+    def grid_df(self) -> pd.DataFrame:
+        """nodes (x, y, id) of table grid"""
+        return pd.DataFrame(
+            {
+                "x": np.repeat(self.xs, self.ny),
+                "y": np.tile(self.ys, self.nx),
+                "id": np.arange(len(self)),
+            }
+        )
+
+    def ixy(self, x, y) -> tuple[np.ndarray, np.ndarray]:
+        """(ix, iy) of points, -1 for points off the grid"""
+        ix = _axis_index(x, self.xs, self.spacing, self.tol)
+        iy = _axis_index(y, self.ys, self.spacing, self.tol)
+        off = (ix < 0) | (iy < 0)
+        ix[off] = -1
+        iy[off] = -1
+        return ix, iy
+
+    def ids(self, x, y) -> np.ndarray:
+        """grid ids of points, -1 for points off the grid"""
+        ix, iy = self.ixy(x, y)
+        return np.where(ix < 0, -1, ix * self.ny + iy)
+
+    def gather(self, x, y, values) -> np.ndarray:
+        """values of points placed on all grid nodes, NaN if missing"""
+        ids = self.ids(x, y)
+        on = ids >= 0
+        dense = np.full(len(self), np.nan)
+        dense[ids[on]] = np.asarray(values, dtype=float)[on]
+        return dense
+
+    def dataarray(self, x, y, values, name=None) -> xr.DataArray:
+        """values of points on a 2-D grid of dims (y, x), NaN if missing"""
+        dense = self.gather(x, y, values).reshape(self.nx, self.ny).T
+        return xr.DataArray(
+            dense, coords={"y": self.ys, "x": self.xs}, name=name
+        )
+
+    def datacube(self, x, y, levels, values, dim, name=None) -> xr.DataArray:
+        """values of points on a 3-D grid of dims (`dim`, y, x)"""
+        zs = np.unique(np.asarray(levels))
+        iz = np.searchsorted(zs, levels)
+        ids = self.ids(x, y)
+        on = ids >= 0
+        dense = np.full((len(zs), len(self)), np.nan)
+        dense[iz[on], ids[on]] = np.asarray(values, dtype=float)[on]
+        dense = dense.reshape(len(zs), self.nx, self.ny).transpose(0, 2, 1)
+        return xr.DataArray(
+            dense,
+            coords={dim: zs, "y": self.ys, "x": self.xs},
+            name=name,
+        )
+
+    def align(self, df: pd.DataFrame, cols=None) -> pd.DataFrame:
+        """
+        columns of `df` on all grid nodes,
+        like `grid_df().merge(df, on=["x", "y"], how="left")`.
+        """
+        cols = cols or [c for c in df.columns if c not in ["x", "y"]]
+        aligned = self.grid_df()
+        for col in cols:
+            aligned[col] = self.gather(df["x"], df["y"], df[col])
+        return aligned
+
+
+def _nodes(low, high, spacing) -> np.ndarray:
+    # like `np.arange(low, high + spacing, spacing)`,
+    # without an extra node for the rounding error of `high`
+    num = int(np.ceil((high - low) / spacing + 1 - 1e-6))
+    return low + spacing * np.arange(num)
+
+
+def _axis_index(v, nodes, spacing, tol) -> np.ndarray:
+    v = np.asarray(v)
+    if v.dtype == np.float32:
+        # coordinates of compact frames are rounded to float32
+        tol = max(tol, 4 * np.finfo(np.float32).eps * np.abs(nodes).max())
+    v = v.astype(float)
+    idx = np.rint((v - nodes[0]) / spacing).astype(np.int64)
+    inside = (idx >= 0) & (idx < len(nodes))
+    near = np.abs(v - nodes[np.clip(idx, 0, len(nodes) - 1)]) <= tol
+    return np.where(inside & near, idx, -1)
+
+
+def _min_step(v) -> float:
+    steps = np.diff(np.unique(np.round(v, 6)))
+    if len(steps) == 0:
+        raise ValueError("Cannot infer spacing of less than two nodes.")
+    return float(np.round(steps.min(), 6))
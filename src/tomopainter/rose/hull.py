@@ -0,0 +1,115 @@
+"""
+hull of stations rasterised on a regular grid.
+a mask is made once per (region, spacing) by one vectorised
+point-in-polygon test of all nodes, so clipping grids and means
+inside the hull are array operations.
+"""
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+
+from .grid_index import GridIndex
+from .points import HULL_FILE, hull_mask
+
+
+class HullMask:
+    """boolean (y, x) mask of grid nodes inside or on the hull"""
+
+    def __init__(self, region, spacing, hull=HULL_FILE) -> None:
+        self.hull = Path(hull)
+        self.gidx = GridIndex(region, spacing)
+        xx, yy = np.meshgrid(self.gidx.xs, self.gidx.ys)
+        inside = hull_mask(xx.ravel(), yy.ravel(), self.hull)
+        self.mask = inside.reshape(self.gidx.shape)
+        # 1 inside and NaN outside, clipping is a multiplication
+        self.factor = np.where(self.mask, 1.0, np.nan)
+
+    def clip(self, grid):
+        """`grid` with NaN outside the hull, see `grid_mask`"""
+        if isinstance(grid, xr.DataArray):
+            factor = np.where(self.grid_mask(grid), 1.0, np.nan)
+            clipped = self._values(grid, factor.shape) * factor
+            return grid.copy(data=clipped.astype(grid.dtype, copy=False))
+        return self._values(grid, self.mask.shape) * self.factor
+
+    def mean(self, grid) -> float:
+        """mean of `grid` inside the hull ignoring NaN, see `grid_mask`"""
+        mask = self.grid_mask(grid)
+        values = self._values(grid, mask.shape)[mask]
+        if np.isnan(values).all():
+            return np.nan
+        return float(np.nanmean(values))
+
+    def grid_mask(self, grid) -> np.ndarray:
+        """
+        mask of a (y, x) `xr.DataArray` by its own coordinates, in any
+        order or spacing, and the mask itself for arrays on its nodes.
+        """
+        if not isinstance(grid, xr.DataArray):
+            return self.mask
+        ydim, xdim = grid.dims
+        xx, yy = np.meshgrid(grid[xdim].values, grid[ydim].values)
+        return self.inside(xx.ravel(), yy.ravel()).reshape(xx.shape)
+
+    def inside(self, x, y) -> np.ndarray:
+        """mask of points, looked up on nodes and tested off them"""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        ix, iy = self.gidx.ixy(x, y)
+        on = ix >= 0
+        inside = np.zeros(len(x), dtype=bool)
+        inside[on] = self.mask[iy[on], ix[on]]
+        if not on.all():
+            inside[~on] = hull_mask(x[~on], y[~on], self.hull)
+        return inside
+
+    def _values(self, grid, shape) -> np.ndarray:
+        values = np.asarray(grid, dtype=float)
+        if values.shape != shape:
+            raise ValueError(
+                f"Grid of shape {values.shape} is not on nodes of the mask"
+                f" of shape {shape}."
+            )
+        return values
+
+
+def hull_mask_of(region, spacing, hull=HULL_FILE) -> HullMask:
+    """mask of `region` and `spacing`, made once until the hull changes"""
+    hull = Path(hull)
+    region = tuple(round(float(r), 6) for r in region)
+    spacing = round(float(spacing), 6)
+    return _hull_mask(region, spacing, str(hull), hull.stat().st_mtime_ns)
+
+
+def grid_hull_mask(grid: xr.DataArray, hull=HULL_FILE) -> HullMask:
+    """
+    mask of the grid covering nodes of `grid` of dims (y, x),
+    applied to `grid` by its coordinates, see `HullMask.grid_mask`.
+    """
+    ydim, xdim = grid.dims
+    gidx = GridIndex.from_xy(grid[xdim].values, grid[ydim].values)
+    return hull_mask_of(gidx.region, gidx.spacing, hull)
+
+
+def xyz_hull_mask(x, y, hull=HULL_FILE) -> np.ndarray:
+    """
+    mask of points (x, y) inside or on the hull, by the mask of the grid
+    of the points if they are nodes of one, like xyz of grids.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(np.unique(x)) > 1 and len(np.unique(y)) > 1:
+        gidx = GridIndex.from_xy(x, y)
+        # scattered points would make a grid of far more nodes
+        if len(gidx) <= 4 * len(x):
+            mask = hull_mask_of(gidx.region, gidx.spacing, hull)
+            return mask.inside(x, y)
+    return hull_mask(x, y, hull)
+
+
+@lru_cache(maxsize=32)
+def _hull_mask(region, spacing, hull, mtime) -> HullMask:
+    # `mtime` of the hull file invalidates the cached masks
+    return HullMask(region, spacing, hull)
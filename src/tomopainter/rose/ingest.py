@@ -0,0 +1,339 @@
+"""
+parallel ingest for `DataQueryer.init_database`:
+a process pool parses source files, one writer streams rows into tables.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from .grid_index import GridIndex
+from .lab import calc_lab
+
+_GIDX: GridIndex | None = None
+
+
+def conn_write_data(conn, data, region, spacing, scripts, workers):
+    from .query import _conn_create_indexes, _conn_create_tables, _model_df
+
+    _conn_create_tables(conn.cursor(), data, scripts)
+    gidx = GridIndex(region, spacing)
+    grid_df = gidx.grid_df()
+    timings = []
+    # all rows are written in one transaction
+    with conn:
+        write_rows(conn, "grid", grid_df)
+        swave_dfs = []
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(gidx,)
+        ) as pool:
+            futures = [
+                pool.submit(read_phase_group, method, period, files)
+                for (method, period), files in phase_groups(data).items()
+            ]
+            futures += [
+                pool.submit(read_swave_file, vsf)
+                for vsf in sorted(data.glob("*vs.csv"))
+            ]
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                table, df, per_files = future.result()
+                timings += per_files
+                if table == "phase":
+                    write_rows(conn, table, df)
+                else:
+                    swave_dfs.append(df)
+        swave_df = join_swave(swave_dfs)
+        write_rows(conn, "swave", swave_df)
+        # model with lab picked from mcmc vs
+        model_df = _model_df(data, gidx, timings)
+        if "mc_vs" in swave_df.columns:
+            vs_df = swave_df[["grid_id", "depth", "mc_vs"]].dropna()
+            vs_df.columns = ["id", "depth", "vs"]
+            model_df = model_df.merge(
+                calc_lab(vs_df), on=["grid_id"], how="left"
+            )
+        write_rows(conn, "model", model_df)
+    # build indexes after the bulk load
+    _conn_create_indexes(conn, scripts)
+    timings = pd.DataFrame(timings, columns=["file", "rows", "seconds"])
+    return timings.sort_values(by="seconds", ascending=False)
+
+
+def conn_update_data(conn, data, region, spacing) -> None | pd.DataFrame:
+    """
+    re-ingest only the rows of changed source files by table manifest.
+    return None if the database cannot be updated incrementally.
+    """
+    from .manifest import scan_changes, write_manifest
+    from .query import MODEL_SOURCES, _model_source
+
+    gidx = GridIndex(region, spacing)
+    if not _same_grid(conn, gidx):
+        return None
+    changed, entries = scan_changes(conn, data)
+    timings = []
+    with conn:
+        # phase rows of (method, period) with changed files
+        groups = phase_groups(data)
+        for method, period in sorted(
+            {_phase_key(gf) for gf in changed if gf.suffix == ".grid"}
+        ):
+            conn.execute(
+                "DELETE FROM phase WHERE method=? AND period=?;",
+                (method, period),
+            )
+            if files := groups.get((method, period)):
+                _, df, per_files = read_phase_group(
+                    method, period, files, gidx
+                )
+                _add_columns(conn, "phase", df.columns)
+                write_rows(conn, "phase", df)
+                timings += per_files
+        # swave columns of changed `*vs.csv`
+        lab_ids = set()
+        for vsf in [gf for gf in changed if gf.name.endswith("vs.csv")]:
+            if vsf.exists():
+                _, df, per_files = read_swave_file(vsf, gidx)
+                timings += per_files
+            else:
+                df = pd.DataFrame(columns=["grid_id", "depth", vsf.stem])
+            _add_columns(conn, "swave", [vsf.stem])
+            ids = update_column(conn, "swave", ["grid_id", "depth"], df)
+            if vsf.stem == "mc_vs":
+                lab_ids |= ids
+        conn.execute(
+            "DELETE FROM swave WHERE rj_vs IS NULL AND mc_vs IS NULL;"
+        )
+        # model columns of changed sources
+        rgn = [gidx.xs[0], gidx.xs[-1], gidx.ys[0], gidx.ys[-1]]
+        for source in [gf for gf in changed if gf.name in MODEL_SOURCES]:
+            start = time.perf_counter()
+            df = pd.DataFrame({"grid_id": np.arange(len(gidx))})
+            sdf = _model_source(source, rgn) if source.exists() else None
+            for col in MODEL_SOURCES[source.name]:
+                df[col] = (
+                    np.nan
+                    if sdf is None
+                    else gidx.gather(sdf["x"], sdf["y"], sdf[col])
+                )
+                cdf = df[["grid_id", col]]
+                update_column(conn, "model", ["grid_id"], cdf)
+            cost = time.perf_counter() - start
+            timings.append((str(source), len(df), cost))
+        # lab of grid nodes with changed mcmc vs
+        if lab_ids:
+            ids = np.array(sorted(lab_ids))
+            lab = calc_lab(_node_vs(conn, ids))
+            lab = pd.DataFrame(
+                {
+                    "grid_id": ids,
+                    "lab": pd.Series(
+                        lab["lab"].values, index=lab["grid_id"]
+                    ).reindex(ids),
+                }
+            )
+            update_column(conn, "model", ["grid_id"], lab, only=lab_ids)
+        write_manifest(conn, entries)
+    conn.execute("ANALYZE;")
+    timings = pd.DataFrame(timings, columns=["file", "rows", "seconds"])
+    return timings.sort_values(by="seconds", ascending=False)
+
+
+def update_column(conn, table, keys, df: pd.DataFrame, only=None) -> set:
+    """
+    replace the values of the last column of `df` in `table` by `keys`,
+    rows not found are inserted if `keys` are more than `grid_id`.
+    `only` limits the replaced rows to these grid ids.
+    return grid ids whose values were changed.
+    """
+    col = df.columns[-1]
+    conn.execute("DROP TABLE IF EXISTS temp.stage;")
+    conn.execute(f"CREATE TEMP TABLE stage ({', '.join(keys)}, value);")
+    rows = zip(*[df[c].tolist() for c in df.columns])
+    conn.executemany(
+        f"INSERT INTO stage VALUES ({', '.join(['?'] * len(df.columns))})",
+        rows,
+    )
+    conn.execute("DELETE FROM stage WHERE grid_id IS NULL;")
+    on = " AND ".join([f"t.{k} = s.{k}" for k in keys])
+    # grid ids with changed values
+    changed = conn.execute(
+        f"""
+        SELECT s.grid_id FROM stage s
+        LEFT JOIN {table} t ON {on}
+        WHERE t."{col}" IS NOT s.value
+        UNION
+        SELECT t.grid_id FROM {table} t
+        LEFT JOIN stage s ON {on}
+        WHERE t."{col}" IS NOT NULL AND s.grid_id IS NULL;
+        """
+    ).fetchall()
+    changed = {row[0] for row in changed}
+    limit = ""
+    if only is not None:
+        changed &= set(only)
+        ids = _temp_ids(conn, only)
+        limit = f"WHERE grid_id IN (SELECT grid_id FROM {ids})"
+    conn.execute(f'UPDATE {table} SET "{col}" = NULL {limit};')
+    on = " AND ".join([f"{table}.{k} = s.{k}" for k in keys])
+    conn.execute(
+        f'UPDATE {table} SET "{col}" = s.value FROM stage s WHERE {on};'
+    )
+    if keys != ["grid_id"]:
+        names = ", ".join(keys)
+        on = " AND ".join([f"t.{k} = s.{k}" for k in keys])
+        conn.execute(
+            f"""
+            INSERT INTO {table} ({names}, "{col}")
+            SELECT {names}, value FROM stage s
+            WHERE s.value IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM {table} t WHERE {on});
+            """
+        )
+    conn.execute("DROP TABLE temp.stage;")
+    return changed
+
+
+def phase_groups(gdir: Path) -> dict[tuple[str, int], list[Path]]:
+    """`*.grid` files grouped by (method, period)"""
+    groups = {}
+    for mdir in gdir.glob("*/"):
+        method = mdir.name
+        for gf in sorted(mdir.rglob("*.grid")):
+            [mtd, _, period] = gf.stem.split("_")
+            if mtd != method:
+                raise FileNotFoundError(f"In {method} dir find {mtd}_*.")
+            groups.setdefault((method, int(period)), []).append(gf)
+    return groups
+
+
+def read_phase_group(method, period, files, gidx=None):
+    """
+    phase rows of one (method, period) from its vel, std, dcheck..
+    a group is one row per grid node, so its frame is as small as
+    a batch and `write_rows` streams it into the table.
+    """
+    gidx = _GIDX if gidx is None else gidx
+    df = pd.DataFrame({"grid_id": np.arange(len(gidx))})
+    timings = []
+    for gf in files:
+        start = time.perf_counter()
+        idt = gf.stem.split("_")[1]
+        data = pd.read_csv(gf, header=None, sep=r"\s+", names=["x", "y", idt])
+        df[idt] = gidx.gather(data["x"], data["y"], data[idt])
+        timings.append((str(gf), len(data), time.perf_counter() - start))
+    df["method"] = method
+    df["period"] = period
+    return "phase", df, timings
+
+
+def read_swave_file(vsf: Path, gidx=None):
+    gidx = _GIDX if gidx is None else gidx
+    start = time.perf_counter()
+    df = pd.read_csv(vsf)
+    ids = gidx.ids(df["x"], df["y"])
+    on = ids >= 0
+    df = pd.DataFrame(
+        {
+            "grid_id": ids[on],
+            "depth": abs(df["depth"].values[on]),
+            vsf.stem: df["velocity"].values[on],
+        }
+    )
+    timing = (str(vsf), len(df), time.perf_counter() - start)
+    return "swave", df, [timing]
+
+
+def join_swave(dfs: list[pd.DataFrame]) -> pd.DataFrame:
+    """align vs columns by the integer key of (grid_id, depth)"""
+    if not dfs:
+        return pd.DataFrame(columns=["grid_id", "depth"])
+    depths = np.unique(np.concatenate([df["depth"].values for df in dfs]))
+    nd = len(depths)
+    keys = [
+        df["grid_id"].values * nd + np.searchsorted(depths, df["depth"])
+        for df in dfs
+    ]
+    # sorted by (grid_id, depth)
+    all_keys = np.unique(np.concatenate(keys))
+    swave_df = pd.DataFrame(
+        {"grid_id": all_keys // nd, "depth": depths[all_keys % nd]}
+    )
+    for df, key in zip(dfs, keys):
+        col = df.columns[-1]
+        values = np.full(len(all_keys), np.nan)
+        values[np.searchsorted(all_keys, key)] = df[col].values
+        swave_df[col] = values
+    return swave_df
+
+
+def write_rows(conn, table, df: pd.DataFrame) -> None:
+    """stream rows of the columns shared by `df` and `table`"""
+    info = conn.execute(f"PRAGMA table_info({table});").fetchall()
+    cols = [col[1] for col in info if col[1] in df.columns]
+    names = ", ".join([f'"{col}"' for col in cols])
+    marks = ", ".join(["?"] * len(cols))
+    # NaN is written as NULL by sqlite
+    rows = zip(*[df[col].tolist() for col in cols])
+    conn.executemany(f"INSERT INTO {table} ({names}) VALUES ({marks})", rows)
+
+
+def _phase_key(gf: Path) -> tuple[str, int]:
+    [method, _, period] = gf.stem.split("_")
+    return method, int(period)
+
+
+def _add_columns(conn, table, cols) -> None:
+    """add new columns (like a new dcheck) into `table`"""
+    info = conn.execute(f"PRAGMA table_info({table});").fetchall()
+    exists = {col[1] for col in info}
+    for col in cols:
+        if col not in exists:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN "{col}" REAL;')
+
+
+def _node_vs(conn, ids) -> pd.DataFrame:
+    """mcmc vs of grid nodes as input of `calc_lab`"""
+    df = pd.read_sql(
+        f"""
+        SELECT grid_id AS id, depth, mc_vs AS vs FROM swave
+        WHERE grid_id IN (SELECT grid_id FROM {_temp_ids(conn, ids)})
+          AND mc_vs IS NOT NULL
+        ORDER BY grid_id, depth;
+        """,
+        conn,
+    )
+    return df
+
+
+def _temp_ids(conn, ids) -> str:
+    """temp table of grid `ids` bound as parameters, to join against"""
+    conn.execute("DROP TABLE IF EXISTS temp.ids;")
+    conn.execute("CREATE TEMP TABLE ids (grid_id INTEGER PRIMARY KEY);")
+    conn.executemany(
+        "INSERT OR IGNORE INTO ids VALUES (?)", ((int(i),) for i in ids)
+    )
+    return "temp.ids"
+
+
+def _same_grid(conn, gidx: GridIndex) -> bool:
+    try:
+        row = conn.execute(
+            "SELECT COUNT(*), MIN(x), MAX(x), MIN(y), MAX(y) FROM grid;"
+        ).fetchone()
+        conn.execute("SELECT 1 FROM manifest LIMIT 1;")
+    except sqlite3.OperationalError:
+        return False
+    bounds = [len(gidx), gidx.xs[0], gidx.xs[-1], gidx.ys[0], gidx.ys[-1]]
+    return row[0] == bounds[0] and all(
+        abs(a - b) < 1e-6 for a, b in zip(row[1:], bounds[1:])
+    )
+
+
+def _init_worker(gidx):
+    global _GIDX
+    _GIDX = gidx
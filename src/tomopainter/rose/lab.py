@@ -0,0 +1,76 @@
+"""
+vectorised lab picking of all grid nodes at once.
+vs is pivoted into a (node x depth) matrix, gradients are computed
+along the depth axis, and lab is picked by a masked argmin.
+"""
+from ctypes import ArgumentError
+
+import numpy as np
+import pandas as pd
+
+# criteria of picking lab from vs below moho
+CRITERIA = ["gradient", "velocity", "onset"]
+
+
+def vs_matrix(ids, depths, vs) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(nodes, depths, matrix) of vs pivoted by node and depth"""
+    depths = np.asarray(depths, dtype=float)
+    nodes, inode = np.unique(np.asarray(ids), return_inverse=True)
+    deps, idep = np.unique(depths, return_inverse=True)
+    matrix = np.full((len(nodes), len(deps)), np.nan)
+    matrix[inode, idep] = np.asarray(vs, dtype=float)
+    return nodes, deps, matrix
+
+
+def pick_lab(
+    depths, matrix, limits=None, criterion="gradient", threshold=0.0
+) -> np.ndarray:
+    """
+    lab of per row of `matrix` between depth `limits`, NaN if none.
+    `criterion` is one of
+        gradient: depth of the max negative gradient of vs,
+        velocity: depth of the min vs,
+        onset: the shallowest depth of gradient below `-threshold`.
+    gradients of rows missing some depths are computed by their
+    remaining depths, like the per node `np.gradient`.
+    """
+    if criterion not in CRITERIA:
+        raise ArgumentError(f"{criterion} is not one of {CRITERIA}.")
+    limits = limits or [54, 200]
+    depths = np.asarray(depths, dtype=float)
+    inside = (depths > limits[0]) & (depths < limits[1])
+    deps, vs = depths[inside], matrix[:, inside]
+    labs = np.full(len(vs), np.nan)
+    # rows sharing the same missing depths are picked together
+    valid = ~np.isnan(vs)
+    patterns, rows = np.unique(valid, axis=0, return_inverse=True)
+    for ip, pattern in enumerate(patterns):
+        if pattern.sum() < 2:
+            continue
+        sel = rows.ravel() == ip
+        labs[sel] = _pick(
+            deps[pattern], vs[sel][:, pattern], criterion, threshold
+        )
+    return labs
+
+
+def calc_lab(vs, limits=None, criterion="gradient") -> pd.DataFrame:
+    """lab (grid_id, lab) of vs (id, depth, vs) of grid nodes"""
+    nodes, deps, matrix = vs_matrix(vs["id"], vs["depth"], vs["vs"])
+    labs = pick_lab(deps, matrix, limits, criterion)
+    lab_df = pd.DataFrame({"grid_id": nodes.astype(int), "lab": labs})
+    return lab_df.dropna().reset_index(drop=True)
+
+
+def _pick(deps, vs, criterion, threshold) -> np.ndarray:
+    if criterion == "velocity":
+        return deps[np.argmin(vs, axis=1)]
+    gra = np.gradient(vs, deps, axis=1)
+    if criterion == "gradient":
+        found = (gra < 0).any(axis=1)
+        idx = np.argmin(gra, axis=1)
+    else:
+        below = gra < -threshold
+        found = below.any(axis=1)
+        idx = np.argmax(below, axis=1)
+    return np.where(found, deps[idx], np.nan)
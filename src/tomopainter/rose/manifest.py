@@ -0,0 +1,72 @@
+"""manifest of source files written into `grids.db`"""
+import hashlib
+from pathlib import Path
+
+
+def source_files(data: Path) -> list[Path]:
+    """all source files of tables in data dir"""
+    from .query import MODEL_SOURCES
+
+    files = sorted(data.glob("*/**/*.grid"))
+    files += sorted(data.glob("*vs.csv"))
+    files += [data / fn for fn in MODEL_SOURCES if (data / fn).exists()]
+    return files
+
+
+def file_hash(fpath: Path) -> str:
+    sha = hashlib.sha1()
+    with open(fpath, "rb") as f:
+        while chunk := f.read(1 << 20):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def scan_changes(conn, data: Path) -> tuple[list[Path], list[tuple]]:
+    """
+    compare source files with table manifest.
+    return changed, new or removed files and the rows of the new manifest.
+    """
+    old = {
+        row[0]: row[1:]
+        for row in conn.execute("SELECT path, size, mtime, hash FROM manifest")
+    }
+    changed = []
+    entries = []
+    for fpath in source_files(data):
+        key = str(fpath.relative_to(data))
+        stat = fpath.stat()
+        size, mtime = stat.st_size, stat.st_mtime
+        prev = old.pop(key, None)
+        if prev is not None and tuple(prev[:2]) == (size, mtime):
+            entries.append((key, *prev))
+            continue
+        # hash only if size or mtime changed
+        fhash = file_hash(fpath)
+        if prev is None or prev[2] != fhash:
+            changed.append(fpath)
+        entries.append((key, size, mtime, fhash))
+    # removed files
+    changed += [data / key for key in old]
+    return changed, entries
+
+
+def write_manifest(conn, entries: list[tuple]) -> None:
+    conn.execute("DELETE FROM manifest;")
+    conn.executemany("INSERT INTO manifest VALUES (?, ?, ?, ?)", entries)
+
+
+def record_manifest(conn, data: Path) -> None:
+    """manifest of all source files after a full build"""
+    entries = []
+    for fpath in source_files(data):
+        stat = fpath.stat()
+        entries.append(
+            (
+                str(fpath.relative_to(data)),
+                stat.st_size,
+                stat.st_mtime,
+                file_hash(fpath),
+            )
+        )
+    with conn:
+        write_manifest(conn, entries)
@@ -1,13 +1,18 @@
 from functools import reduce
 import math
 import operator
+from pathlib import Path
 
 import numpy as np
 import pandas as pd
 from scipy.spatial import ConvexHull
-from shapely.geometry import Point, Polygon
+import shapely
+from shapely.geometry import Polygon
 import xarray as xr
 
+# hull of stations written by `area_hull_files`
+HULL_FILE = Path("data/txt/area_hull.csv")
+
 
 def area_hull_files(region, outdir) -> None:
     sta_file = "data/station.lst"
@@ -31,6 +36,29 @@ def area_hull_files(region, outdir) -> None:
     ds.to_netcdf(outdir / "area_hull.nc")
 
 
+def hull_mask(x, y, hull=HULL_FILE) -> np.ndarray:
+    """
+    mask of points (x, y) inside or on the hull,
+    the reference area of anomalies like `grid.inside_hull`.
+
+    `hull` is the csv of the vertices also written to `area_hull.nc`,
+    which `gmt select -F` read before; points on the hull are inside
+    as they were for `gmt select`.
+    """
+    border = pd.read_csv(hull)
+    polygon = Polygon(border[["x", "y"]].values)
+    return shapely.intersects_xy(
+        polygon, np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    )
+
+
+def hull_anomaly(values, mask) -> np.ndarray:
+    """anomaly in percent by the mean of `values` inside the hull"""
+    values = np.asarray(values, dtype=float)
+    avg = values[mask].mean() if mask.any() else values.mean()
+    return (values - avg) / avg * 100
+
+
 ###############################################################################
 
 
@@ -83,12 +111,27 @@ def points_boundary(data: pd.DataFrame, region=None, clock=False):
 
 
 def points_inner(data, border):
-    points = border[["x", "y"]].values
-    hull = ConvexHull(points)
-    polygon = Polygon(points[hull.vertices])
-    ids = data.apply(lambda r: Point(r["x"], r["y"]).within(polygon), axis=1)
+    """rows of `data` strictly inside the convex hull of `border`"""
+    return data[inner_mask(data["x"], data["y"], border)]
 
-    return data[ids]
+
+def inner_mask(x, y, border) -> np.ndarray:
+    """
+    mask of points (x, y) strictly inside the convex hull of `border`,
+    a frame of x and y or an array of shape (n, 2).
+    points out of the bounding box of the hull are never tested.
+    """
+    if isinstance(border, pd.DataFrame):
+        border = border[["x", "y"]].values
+    points = np.asarray(border, dtype=float)
+    polygon = Polygon(points[ConvexHull(points).vertices])
+    shapely.prepare(polygon)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    xmin, ymin, xmax, ymax = polygon.bounds
+    mask = (x > xmin) & (x < xmax) & (y > ymin) & (y < ymax)
+    mask[mask] = shapely.contains_xy(polygon, x[mask], y[mask])
+    return mask
 
 
 # def points_inner(data: pd.DataFrame, boundary) -> pd.DataFrame:
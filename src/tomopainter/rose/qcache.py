@@ -0,0 +1,73 @@
+from collections import OrderedDict
+import threading
+
+import pandas as pd
+
+
+class QueryCache:
+    """
+    LRU cache of query results within a memory budget in bytes.
+    entries are dropped when the stamp of the database changes,
+    and hits are returned as copies so callers cannot corrupt them.
+    it is shared by threads of a read-only `DataQueryer`.
+    """
+
+    def __init__(self, budget: int = 256 * 2**20) -> None:
+        self.budget = budget
+        # key: (DataFrame, size)
+        self.entries: OrderedDict[tuple, tuple] = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stamp = None
+        self._lock = threading.RLock()
+
+    def get(self, key: tuple) -> None | pd.DataFrame:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return entry[0].copy()
+
+    def put(self, key: tuple, df: pd.DataFrame) -> pd.DataFrame:
+        """cache `df` and return a copy for the caller"""
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.budget:
+            return df
+        with self._lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (df, size)
+            self.nbytes += size
+            # evict least recently used entries
+            while self.nbytes > self.budget:
+                self._drop(next(iter(self.entries)))
+        return df.copy()
+
+    def validate(self, stamp) -> None:
+        """clear entries if the database changed since they were cached"""
+        with self._lock:
+            if stamp != self.stamp:
+                self.clear()
+                self.stamp = stamp
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def info(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.entries),
+            "nbytes": self.nbytes,
+            "budget": self.budget,
+        }
+
+    def _drop(self, key) -> None:
+        _, size = self.entries.pop(key)
+        self.nbytes -= size
@@ -1,46 +1,244 @@
 from ctypes import ArgumentError
+from functools import lru_cache
 from pathlib import Path
 import sqlite3
+import threading
+import time
+from typing import Iterator, NamedTuple
 
 import numpy as np
 import pandas as pd
 from pandas.errors import EmptyDataError
+import xarray as xr
+
+from .filters import LEVEL_COLS, between, compile_filters, filters_sql
+from .catalog import build_catalog, read_catalog, write_catalog
+from .grid_index import GridIndex
+from .lab import calc_lab
+from .manifest import record_manifest
+from .qcache import QueryCache
+from .snapshot import Snapshot, export_snapshot
+
+
+# pragmas of read-only connections
+MMAP_SIZE = 1 * 2**30
+CACHE_SIZE = -64 * 2**10  # in KiB
+
+
+class QueryerHandle(NamedTuple):
+    """lightweight handle to reopen a read-only queryer in workers"""
+
+    dbfile: str
+    cache_budget: int
+    snapshot: None | str = None
+    compact: bool = False
 
 
 class DataQueryer:
-    def __init__(self, dbfile) -> None:
+    def __init__(
+        self,
+        dbfile,
+        cache_budget=256 * 2**20,
+        *,
+        readonly=False,
+        compact=False,
+        wal=False,
+    ) -> None:
+        """
+        `readonly` opens connections by uri `mode=ro` with mmap,
+        one per thread. workers of a process pool reopen a queryer
+        read-only by `open_queryer(queryer.handle())`.
+        `compact` returns frames of compact dtypes by `compact_frame`.
+        `wal` switches the database into journal mode WAL, so readers
+        do not block the writer. it is persistent and leaves `-wal` and
+        `-shm` files beside the database, and fails on network disks.
+        """
         self.dbf = Path(dbfile)
         self.scripts = Path("src/sqlscripts")
-        self.conn = sqlite3.connect(self.dbf)
+        self.readonly = readonly
+        self.compact = compact
+        self.wal = wal
+        # connection of per thread, all are closed by `close`
+        self._local = threading.local()
+        self._conns = []
+        self._lock = threading.Lock()
+        # results of `query`, `cache_budget` in bytes (0 for no cache)
+        self.cache = QueryCache(cache_budget)
+        # columnar snapshot serving `query`, see `use_snapshot`
+        self.snapshot = None
         self._per_dep()
 
-    def phase(self, method: str, period: int, col: str) -> pd.DataFrame:
-        if period not in self.periods:
+    @property
+    def catalog(self) -> dict:
+        """catalog of the database, loaded lazily"""
+        if self._catalog is None:
+            self._catalog = read_catalog(self.conn) or build_catalog(
+                self.conn
+            )
+        return self._catalog
+
+    @property
+    def periods(self) -> dict[str, list]:
+        """periods of per method of table phase"""
+        return self.catalog["periods"]
+
+    @property
+    def depths(self) -> dict[str, list]:
+        """depths of per method of table swave"""
+        return self.catalog["depths"]
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """connection of the current thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self.conn = conn
+        return conn
+
+    @conn.setter
+    def conn(self, conn: sqlite3.Connection) -> None:
+        self._local.conn = conn
+        with self._lock:
+            self._conns.append(conn)
+
+    def handle(self) -> QueryerHandle:
+        """handle of a read-only queryer of the same database"""
+        snapshot = self.snapshot and str(self.snapshot.sdir)
+        return QueryerHandle(
+            str(self.dbf), self.cache.budget, snapshot, self.compact
+        )
+
+    def close(self) -> None:
+        """close connections of all threads"""
+        with self._lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            if not self.readonly:
+                conn.commit()
+            conn.close()
+        self._local = threading.local()
+
+    def phase(self, method: str, period, col: str) -> pd.DataFrame:
+        """`period` could be a value, a list or `between(low, high)`"""
+        usecols = [col]
+        if not np.isscalar(period):
+            usecols = ["period", col]
+        elif period not in self.periods[method]:
             raise ArgumentError(f"argument {period} is out of range.")
         return self.query(
-            "phase", usecols=[col], where=[f"{method=}", f"{period=}"]
+            "phase",
+            usecols=usecols,
+            filters={"method": method, "period": period},
+        )
+
+    def phases(
+        self, method: str, col: str, *, periods=None, pivot: bool = False
+    ) -> dict[int, pd.DataFrame] | pd.DataFrame:
+        """
+        `col` of all periods of `method`, or only `periods`, by one query.
+        return {period: DataFrame(x, y, col)},
+        or a DataFrame of nodes indexed by grid_id with columns
+        x, y and one per period if `pivot`.
+        """
+        filters = {"method": method}
+        if periods is not None:
+            filters["period"] = list(periods)
+        df = self.query(
+            "phase", usecols=["grid_id", "period", col], filters=filters
+        )
+        if not pivot:
+            return {
+                int(per): group[["x", "y", col]].reset_index(drop=True)
+                for per, group in df.groupby("period", sort=True)
+            }
+        # scatter values into a (node x period) matrix
+        ids, first, inode = np.unique(
+            df["grid_id"].to_numpy(), return_index=True, return_inverse=True
+        )
+        pers, iper = np.unique(df["period"].to_numpy(), return_inverse=True)
+        dtype = np.result_type(df[col].dtype, np.float32)
+        matrix = np.full((len(ids), len(pers)), np.nan, dtype=dtype)
+        matrix[inode, iper] = df[col].to_numpy()
+        pivoted = pd.DataFrame(
+            matrix,
+            index=pd.Index(ids.astype(int), name="grid_id"),
+            columns=[int(per) for per in pers],
         )
+        pivoted.insert(0, "y", df["y"].to_numpy()[first])
+        pivoted.insert(0, "x", df["x"].to_numpy()[first])
+        return pivoted
 
     def swave(self, col, *, depth=None) -> pd.DataFrame:
-        where = None if depth is None else [f"{depth=}"]
-        return self.query("swave", usecols=[col], where=where)
+        """`depth` could be a value, a list or `between(low, high)`"""
+        if depth is None:
+            return self.query("swave", usecols=[col])
+        usecols = [col] if np.isscalar(depth) else ["depth", col]
+        return self.query("swave", usecols=usecols, filters={"depth": depth})
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self.conn.commit()
-        self.conn.close()
+        self.close()
 
-    def init_database(self, data_dir, region, spacing=0.5) -> None:
-        """initilize data by SQL"""
-        if self.dbf.exists():
-            self.dbf.unlink()
+    def init_database(
+        self,
+        data_dir,
+        region,
+        spacing=0.5,
+        *,
+        workers=None,
+        incremental=False,
+    ) -> None | pd.DataFrame:
+        """
+        initilize data by SQL.
+        `workers` > 0 parses files by a process pool and streams rows
+        into tables in one transaction, returns timing of per file.
+        `incremental` re-ingests only rows of changed source files
+        recorded by table manifest, and falls back to a full rebuild
+        if the grid is changed or the database has no manifest.
+        """
         data = Path(data_dir)
+        self.cache.clear()
+        self.snapshot = None
+        if incremental and self.dbf.exists():
+            from .ingest import conn_update_data
+
+            timings = conn_update_data(self.conn, data, region, spacing)
+            if timings is not None:
+                _conn_write_hull(self.conn)
+                write_catalog(self.conn, region, spacing)
+                self._per_dep()
+                return timings
+        self.close()
+        for fpath in [self.dbf, *_wal_files(self.dbf)]:
+            fpath.unlink(missing_ok=True)
         # re-connent
-        self.conn = sqlite3.connect(self.dbf)
-        _conn_write_data(self.conn, data, region, spacing, self.scripts)
+        self.conn = self._connect()
+        timings = None
+        if workers:
+            from .ingest import conn_write_data
+
+            timings = conn_write_data(
+                self.conn, data, region, spacing, self.scripts, workers
+            )
+        else:
+            _conn_write_data(self.conn, data, region, spacing, self.scripts)
+        record_manifest(self.conn, data)
+        _conn_write_hull(self.conn)
+        write_catalog(self.conn, region, spacing)
         self._per_dep()
+        return timings
+
+    def create_indexes(self) -> None:
+        """(re)build indexes of tables, for databases written before them"""
+        _conn_create_indexes(self.conn, self.scripts)
+
+    def write_hull(self, hull=None) -> None:
+        """(re)flag grid nodes inside the hull, the reference of `ave`"""
+        _conn_write_hull(self.conn, hull)
+        self.cache.clear()
 
     def query(
         self,
@@ -49,38 +247,184 @@ class DataQueryer:
         usecols: None | list[str] = None,
         avecols: None | list[str] = None,
         where: None | list[str] = None,
+        filters: None | dict = None,
         ave: bool = False,
     ) -> pd.DataFrame:
-        cols = None
-        if usecols is not None:
-            cols = ["g.x", "g.y"] + [f"t.{col}" for col in usecols]
-        cols_str = "*" if cols is None else ", ".join(cols)
-        sql_cmd = f"""
-            SELECT {cols_str}
-            FROM grid g
-            JOIN {table} t
-              ON g.id = t.grid_id
         """
-        if where is not None:
-            sql_cmd += f"WHERE {' AND '.join(where)};"
-        df = pd.read_sql(sql_cmd, self.conn).dropna()
+        `where` is a list of sql conditions,
+        `filters` is structured by `rose.filters` with bound parameters.
+        `ave` turns `avecols` into anomalies in percent by their mean
+        of grid nodes inside the hull, computed by window of sql.
+        """
+        if ave and usecols is None:
+            raise ArgumentError("Set `usecols` if `ave` was True")
+        if ave and not avecols:
+            avecols = usecols
+        shape, params = (), []
+        if filters:
+            shape, params = compile_filters(
+                filters, self.table_columns(table)
+            )
+        key = tuple(
+            None if arg is None else tuple(arg)
+            for arg in [usecols, avecols, where]
+        )
+        key = (table, *key, shape, tuple(params), ave)
+        self.cache.validate(self.stamp())
+        if (df := self.cache.get(key)) is not None:
+            return df
+        df = self._fetch(
+            table, usecols, where, shape, params, avecols if ave else None
+        )
         if df.empty:
             raise EmptyDataError(
                 f"""
-                    DataFrame is empth with {where},
+                    DataFrame is empth with {where} {filters},
                     or cleaned all data when `.dropna()`.
                     try query with argument `usecols`.
                 """
             )
-        if ave:
-            if usecols is None:
-                raise ArgumentError("Set `usecols` if `ave` was True")
-            if not avecols:
-                avecols = usecols
-            for col in avecols:
-                avg = df[col].mean()
-                df[col] = (df[col] - avg) / avg * 100
-        return df
+        return self.cache.put(key, df)
+
+    def iter_query(
+        self,
+        table: str,
+        *,
+        usecols: None | list[str] = None,
+        filters: None | dict = None,
+        by: str = "depth",
+        chunk: None | int = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        yield results of `query` by chunks of `chunk` values of `by`,
+        one depth or 4096 grid nodes by default, so only one chunk
+        is held in memory. chunks are not cached, empty ones are skipped.
+        """
+        chunk = chunk or (4096 if by == "grid_id" else 1)
+        filters = dict(filters or {})
+        if usecols is not None and by not in usecols:
+            usecols = [by, *usecols]
+        columns = self.table_columns(table)
+        levels = self._distinct(table, by, filters)
+        for start in range(0, len(levels), chunk):
+            part = levels[start : start + chunk]
+            # no other values of `by` are between sorted levels
+            filters[by] = between(part[0], part[-1])
+            shape, params = compile_filters(filters, columns)
+            df = self._fetch(table, usecols, None, shape, params)
+            if not df.empty:
+                yield df
+
+    def pick_lab(self, limits=None, criterion="gradient") -> pd.DataFrame:
+        """lab (grid_id, lab) of mcmc vs, picked from `vs_cube`"""
+        cube = self.vs_cube()
+        try:
+            return cube.lab(limits, criterion)
+        finally:
+            cube.close()
+
+    def query_grid(
+        self,
+        table: str,
+        col: str,
+        *,
+        filters: None | dict = None,
+        ave: bool = False,
+    ) -> xr.DataArray:
+        """
+        `col` of one period or depth as a 2-D grid of dims (y, x),
+        scattered onto the nodes of table grid without regridding.
+        """
+        df = self.query(table, usecols=[col], filters=filters, ave=ave)
+        grid = self.grid_index().dataarray(df["x"], df["y"], df[col], col)
+        # like period and method
+        filters = filters or {}
+        grid.attrs = {k: v for k, v in filters.items() if np.isscalar(v)}
+        return grid
+
+    def query_cube(
+        self,
+        table: str,
+        col: str,
+        dim: str,
+        *,
+        filters: None | dict = None,
+        ave: bool = False,
+    ) -> xr.DataArray:
+        """
+        `col` as a 3-D grid of dims (`dim`, y, x), like period or depth,
+        anomalies by the mean of per level if `ave`.
+        """
+        df = self.query(
+            table, usecols=[dim, col], avecols=[col], filters=filters, ave=ave
+        )
+        return self.grid_index().datacube(
+            df["x"], df["y"], df[dim], df[col], dim, col
+        )
+
+    def grid_index(self) -> GridIndex:
+        """index of the nodes of table grid"""
+        if self._gidx is None:
+            region = self.catalog["region"]
+            spacing = self.catalog["spacing"]
+            if region is None:
+                # catalogs written before the grid was filled
+                self._gidx = GridIndex.from_xy(*self._grid_xy())
+            else:
+                self._gidx = GridIndex(region, spacing)
+        return self._gidx
+
+    def export_snapshot(self, sdir=None) -> Path:
+        """write tables into a columnar snapshot beside the database"""
+        sdir = Path(sdir or self.dbf.with_suffix(".snapshot"))
+        self.conn.commit()
+        if self.wal and not self.readonly:
+            # move the wal into the database, so closing keeps the stamp
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+        export_snapshot(self.conn, sdir, self.stamp())
+        return sdir
+
+    def use_snapshot(self, sdir=None) -> None:
+        """
+        serve `query` from memory-mapped columns of the snapshot.
+        queries with sql conditions `where` still go to the database.
+        """
+        sdir = Path(sdir or self.dbf.with_suffix(".snapshot"))
+        snapshot = Snapshot(sdir)
+        if snapshot.stamp != self.stamp():
+            raise ValueError(
+                f"{sdir} is out of date, try `export_snapshot` again."
+            )
+        self.snapshot = snapshot
+        self.cache.clear()
+
+    def vs_cube(self, cfile=None, rebuild=False):
+        """
+        `VsCube` of table swave beside the database,
+        (re)built if it is missing or out of date.
+        """
+        from .cube import VsCube, build_cube
+
+        cfile = Path(cfile or self.dbf.with_suffix(".vscube.nc"))
+        if cfile.exists() and not rebuild:
+            cube = VsCube(cfile)
+            if cube.stamp == self.stamp():
+                return cube
+            cube.close()
+        self.conn.commit()
+        return VsCube(build_cube(self, cfile))
+
+    def stamp(self) -> tuple:
+        """
+        stamp of the database file and its wal, changed by writes,
+        kept by snapshots and cubes to tell if they are out of date.
+        """
+        stamp = []
+        for fpath in [self.dbf, _wal_files(self.dbf)[0]]:
+            # an empty wal is left by checkpoints
+            if fpath.exists() and (stat := fpath.stat()).st_size:
+                stamp += [stat.st_mtime_ns, stat.st_size]
+        return tuple(stamp)
 
     def table_columns(self, table) -> list[str]:
         cols_info = (
@@ -90,75 +434,302 @@ class DataQueryer:
         )
         return [col[1] for col in cols_info]
 
-    def _per_dep(self):
-        cursor = self.conn.cursor()
-        ant = _select_distinct(cursor, "phase", "period", "method='ant'")
-        tpwt = _select_distinct(cursor, "phase", "period", "method='tpwt'")
-        self.periods = {"ant": ant, "tpwt": tpwt}
+    def _connect(self) -> sqlite3.Connection:
+        # connections are closed by the thread calling `close`
+        if not self.readonly:
+            conn = sqlite3.connect(self.dbf, check_same_thread=False)
+            if self.wal:
+                # readers do not block the writer
+                conn.execute("PRAGMA journal_mode=WAL;")
+            return conn
+        if not self.dbf.exists():
+            raise FileNotFoundError(f"Not found {self.dbf}.")
+        conn = sqlite3.connect(
+            f"{self.dbf.resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+        )
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE};")
+        conn.execute(f"PRAGMA cache_size={CACHE_SIZE};")
+        conn.execute("PRAGMA query_only=ON;")
+        return conn
+
+    def _fetch(
+        self, table, usecols, where, shape, params, avecols=None
+    ) -> pd.DataFrame:
+        if self.snapshot is not None and where is None:
+            df = self.snapshot.query(table, usecols, shape, params, avecols)
+            return self._compact(df.dropna())
+        sql_cmd = query_sql(
+            table,
+            usecols=usecols,
+            where=where,
+            shape=shape,
+            avecols=avecols,
+            hull="inside_hull" in self.table_columns("grid"),
+        )
+        df = pd.read_sql(sql_cmd, self.conn, params=params).dropna()
+        return self._compact(df)
+
+    def _compact(self, df: pd.DataFrame) -> pd.DataFrame:
+        return compact_frame(df) if self.compact else df
+
+    def _distinct(self, table, col, filters) -> list:
+        """sorted values of `col` with `filters`"""
+        shape, params = (), []
+        if filters:
+            shape, params = compile_filters(
+                filters, self.table_columns(table)
+            )
+        sql_cmd = f"""
+            SELECT DISTINCT t."{col}"
+            FROM grid g
+            JOIN {table} t
+              ON g.id = t.grid_id
+        """
+        if conds := filters_sql(shape):
+            sql_cmd += f"WHERE {' AND '.join(conds)}"
+        rows = self.conn.execute(sql_cmd, params).fetchall()
+        return sorted(row[0] for row in rows if row[0] is not None)
+
+    def _grid_xy(self) -> tuple[list, list]:
+        try:
+            rows = self.conn.execute("SELECT x, y FROM grid;").fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        if not rows:
+            raise ValueError(
+                f"{self.dbf} has no grid nodes, try `init_database`."
+            )
+        xs, ys = zip(*rows)
+        return list(xs), list(ys)
 
-        # self.depths = _select_distinct(cursor, "swave", "depth")
-        rj = _select_distinct(cursor, "swave", "depth", "rj_vs IS NOT NULL")
-        mc = _select_distinct(cursor, "swave", "depth", "mc_vs IS NOT NULL")
-        self.depths = {"rj": rj, "mc": mc}
+    def _per_dep(self):
+        # periods and depths are loaded from catalog when used
+        self._catalog = None
+        self._gidx = None
 
     # def test_query(self, table):
     #     return pd.read_sql(f"select *\nfrom {table}", self.conn)
 
 
-def _conn_write_data(conn, data, region, spacing, scripts):
-    cursor = conn.cursor()
+# dtypes of columns in compact mode, other floats are float32
+COMPACT_DTYPES = {
+    "id": np.int32,
+    "grid_id": np.int32,
+    "inside_hull": np.int8,
+    "period": np.int16,
+    "depth": np.int16,
+}
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    frame of compact dtypes: float32 values and coordinates,
+    int32 grid ids, int16 periods and depths if integral,
+    categorical strings and a range index.
+    """
+    df = df.reset_index(drop=True)
+    for col in df.columns:
+        values = df[col]
+        if values.dtype == object:
+            df[col] = values.astype("category")
+        elif col in COMPACT_DTYPES and _fits(values, COMPACT_DTYPES[col]):
+            df[col] = values.astype(COMPACT_DTYPES[col])
+        elif values.dtype.kind == "f":
+            df[col] = values.astype(np.float32)
+    return df
+
+
+def _fits(values: pd.Series, dtype) -> bool:
+    """integral values in the range of `dtype`"""
+    array = values.to_numpy(dtype=float)
+    if not np.isfinite(array).all() or (array != np.round(array)).any():
+        return False
+    info = np.iinfo(dtype)
+    return array.size == 0 or (
+        info.min <= array.min() and array.max() <= info.max
+    )
+
+
+# queryers opened in this process by `open_queryer`
+_QUERYERS: dict[QueryerHandle, DataQueryer] = {}
+
+
+def open_queryer(handle: QueryerHandle) -> DataQueryer:
+    """read-only queryer of `handle`, one per process"""
+    queryer = _QUERYERS.get(handle)
+    if queryer is None:
+        queryer = DataQueryer(
+            handle.dbfile,
+            handle.cache_budget,
+            readonly=True,
+            compact=handle.compact,
+        )
+        if handle.snapshot is not None:
+            queryer.use_snapshot(handle.snapshot)
+        _QUERYERS[handle] = queryer
+    return queryer
+
+
+def _wal_files(dbf: Path) -> list[Path]:
+    return [Path(f"{dbf}-wal"), Path(f"{dbf}-shm")]
+
+
+def query_sql(
+    table: str,
+    *,
+    usecols: None | list[str] = None,
+    where: None | list[str] = None,
+    shape: tuple = (),
+    avecols: None | list[str] = None,
+    hull: bool = True,
+) -> str:
+    """
+    sql command used by `DataQueryer.query`,
+    `avecols` are anomalies by the mean inside the hull if `hull`,
+    of per level like period or depth of `LEVEL_COLS`.
+    """
+    return _query_sql(
+        table,
+        None if usecols is None else tuple(usecols),
+        None if where is None else tuple(where),
+        shape,
+        tuple(avecols or ()),
+        hull,
+    )
+
+
+@lru_cache(maxsize=256)
+def _query_sql(table, usecols, where, shape, avecols=(), hull=True) -> str:
+    # the same text for the same shape reuses the prepared statement
+    cols = None
+    if usecols is not None:
+        cols = ["g.x", "g.y"] + [
+            _ave_col(col, hull, LEVEL_COLS.get(table, ()))
+            if col in avecols
+            else f't."{col}"'
+            for col in usecols
+        ]
+    cols_str = "*" if cols is None else ", ".join(cols)
+    sql_cmd = f"""
+        SELECT {cols_str}
+        FROM grid g
+        JOIN {table} t
+          ON g.id = t.grid_id
+    """
+    conds = [*(where or []), *filters_sql(shape)]
+    if avecols:
+        # means over the rows kept by `.dropna()`
+        conds += [f't."{col}" IS NOT NULL' for col in usecols]
+    if conds:
+        sql_cmd += f"WHERE {' AND '.join(conds)};"
+    return sql_cmd
+
+
+def _ave_col(col, hull, levels=()) -> str:
+    """anomaly of `col` in percent by window aggregates of per level"""
+    # quoted, as columns like `dcheck1.5` are not identifiers
+    name = f't."{col}"'
+    window = "()"
+    if levels:
+        # levels are partitioned even if they are not selected
+        window = f"(PARTITION BY {', '.join(f't.{c}' for c in levels)})"
+    ref = f"AVG({name}) OVER {window}"
+    if hull:
+        # all nodes of a level if none of them is inside the hull
+        inside = f"AVG(CASE WHEN g.inside_hull THEN {name} END) OVER {window}"
+        ref = f"COALESCE({inside}, {ref})"
+    return f'({name} - {ref}) / {ref} * 100 AS "{col}"'
+
+
+def _conn_create_indexes(conn, scripts):
+    with open(scripts / "create_indexes.sql", "rt") as f:
+        create_indexes = f.read()
+    conn.executescript(create_indexes)
+
+
+def _conn_write_hull(conn, hull=None) -> None:
+    """flag grid nodes inside the hull, all of them without a hull file"""
+    from .points import HULL_FILE, hull_mask
+
+    hull = Path(hull or HULL_FILE)
+    grid = pd.read_sql("SELECT id, x, y FROM grid", conn)
+    inside = np.ones(len(grid), dtype=bool)
+    if hull.exists():
+        inside = hull_mask(grid["x"], grid["y"], hull)
+    with conn:
+        if not _has_column(conn, "grid", "inside_hull"):
+            # databases written before the flag
+            conn.execute(
+                "ALTER TABLE grid ADD COLUMN inside_hull INTEGER DEFAULT 1;"
+            )
+        conn.executemany(
+            "UPDATE grid SET inside_hull = ? WHERE id = ?;",
+            zip(inside.astype(int).tolist(), grid["id"].tolist()),
+        )
+
+
+def _has_column(conn, table, col) -> bool:
+    info = conn.execute(f"PRAGMA table_info({table});").fetchall()
+    return col in {row[1] for row in info}
+
+
+def _conn_create_tables(cursor, data, scripts):
     # create tables and set on foreign key
     with open(scripts / "create_tables.sql", "rt") as f:
         create_tables = f.read()
     cursor.executescript(create_tables)
     # create phase table with different dcheck
     # which we'd better dont know before execute `rglob("dcheck")`
-    dchecks = sorted([dd.name for dd in data.rglob(r"dcheck*/")])
+    dchecks = sorted({dd.name for dd in data.rglob(r"dcheck*/")})
     create_phase_sql = f"""
         CREATE TABLE phase (
           -- id INT PRIMARY KEY,
-          grid_id INT,
-          method VARCHAR(4),
-          period INT,
-          vel FLOAT,
-          std FLOAT,
-          {', '.join([rf'"{dcheck}" FLOAT' for dcheck in dchecks])},
+          grid_id INTEGER,
+          method TEXT,
+          period INTEGER,
+          vel REAL,
+          std REAL,
+          {''.join([rf'"{dcheck}" REAL, ' for dcheck in dchecks])}
           FOREIGN KEY (grid_id) REFERENCES grid(id)
         );
     """
     cursor.execute(create_phase_sql)
 
+
+def _conn_write_data(conn, data, region, spacing, scripts):
+    cursor = conn.cursor()
+    _conn_create_tables(cursor, data, scripts)
+
     # write data into tables
     args = {"con": conn, "index": False, "if_exists": "append"}
     # write main table `grids(id,x,y)`
-    grid_df = _grid_df(region, spacing)
+    gidx = GridIndex(region, spacing)
+    grid_df = gidx.grid_df()
     grid_df.to_sql("grid", **args)
-    phase_df = _phase_df(data, grid_df)
+    phase_df = _phase_df(data, gidx)
     _check_columns(cursor, "phase", phase_df).to_sql("phase", **args)
-    swave_df = _swave_df(data, grid_df)
+    swave_df = _swave_df(data, gidx)
     _check_columns(cursor, "swave", swave_df).to_sql("swave", **args)
-    vs_df = swave_df[["grid_id", "depth", "mc_vs"]]
-    vs_df = vs_df.dropna()
-    vs_df.columns = ["id", "depth", "vs"]
-    lab = calc_lab(vs_df)
-    model_df = _model_df(data, grid_df)
-    # lab = pd.DataFrame({"grid_id": [1, 2], "lab": [2.2, 3.3]})
-    model_df = model_df.merge(lab, on=["grid_id"], how="left")
+    model_df = _model_df(data, gidx)
+    if "mc_vs" in swave_df.columns:
+        vs_df = swave_df[["grid_id", "depth", "mc_vs"]]
+        vs_df = vs_df.dropna()
+        vs_df.columns = ["id", "depth", "vs"]
+        lab = calc_lab(vs_df)
+        # lab = pd.DataFrame({"grid_id": [1, 2], "lab": [2.2, 3.3]})
+        model_df = model_df.merge(lab, on=["grid_id"], how="left")
     _check_columns(cursor, "model", model_df).to_sql("model", **args)
+    # build indexes after the bulk load
+    _conn_create_indexes(conn, scripts)
     # table_funcs = {"model": _model_df, "phase": _phase_df, "swave": _swave_df}
     # for tb, fn in table_funcs.items():
     #     _check_columns(cursor, tb, fn(data, grid_df)).to_sql(tb, **args)
 
 
 def _grid_df(region, spacing) -> pd.DataFrame:
-    nodes = [
-        [x, y]
-        for x in np.arange(region[0], region[1] + spacing, spacing)
-        for y in np.arange(region[2], region[3] + spacing, spacing)
-    ]
-    grid_df = pd.DataFrame(data=nodes, columns=["x", "y"])
-    grid_df["id"] = range(len(nodes))
-    return grid_df
+    return GridIndex(region, spacing).grid_df()
 
 
 def _check_columns(cursor, table, df: None | pd.DataFrame) -> pd.DataFrame:
@@ -172,53 +743,74 @@ def _check_columns(cursor, table, df: None | pd.DataFrame) -> pd.DataFrame:
     return df.drop(columns=list(df_cols - target))
 
 
-def _model_df(gdir: Path, gdf) -> pd.DataFrame:
-    """write subtable model(id,sed,rf_moho,mc_moho)"""
-    from tomopainter.tomo_paint.gmt import tomo_grid
+# model sources and the columns of table model they write
+MODEL_SOURCES = {
+    "sedthk.xyz": ["sedthk"],
+    "rf_moho.lst": ["rf_moho"],
+    "input_vpvs.lst": ["poisson"],
+    "mcmc_misfit_moho.csv": ["mc_misfit", "mc_moho"],
+}
 
-    rgn = [gdf["x"].min(), gdf["x"].max(), gdf["y"].min(), gdf["y"].max()]
-    # collect data
-    # sed data
-    sed = pd.read_csv(gdir / "sedthk.xyz", delim_whitespace=True, header=None)
-    sed = tomo_grid(sed, rgn).clip(lower=0)
 
-    # receive function moho
-    rf = pd.read_csv(
-        gdir / "rf_moho.lst",
-        delim_whitespace=True,
-        usecols=[0, 1, 2],
-        header=None,
-    )
-    rf.iloc[:, 0], rf.iloc[:, 1] = rf.iloc[:, 1].copy(), rf.iloc[:, 0].copy()
-    rf = tomo_grid(rf, rgn)
-
-    # merge poisson
-    po = pd.read_csv(
-        gdir / "input_vpvs.lst", delim_whitespace=True, header=None
-    )
-    po = tomo_grid(po, rgn)
-
-    # merge mcmc misfit & moho
-    mc = pd.read_csv(gdir / "mcmc_misfit_moho.csv")
-
-    # merge data
-    model_df = gdf
-    position = ["x", "y"]
-    for df in (sed, rf, po, mc):
-        model_df = model_df.merge(df, on=position, how="left")
-    model_df = model_df.drop(columns=position)
-    # rename column names
-    model_df.columns = [
-        "grid_id",
-        "sedthk",
-        "rf_moho",
-        "poisson",
-        "mc_misfit",
-        "mc_moho",
-    ]
+def _model_df(gdir: Path, gidx: GridIndex, timings=None) -> pd.DataFrame:
+    """
+    write subtable model(id,sed,rf_moho,mc_moho),
+    (file, rows, seconds) of per source are appended to `timings`.
+    """
+    rgn = [gidx.xs[0], gidx.xs[-1], gidx.ys[0], gidx.ys[-1]]
+    # place data on grid nodes
+    model_df = pd.DataFrame({"grid_id": np.arange(len(gidx))})
+    for source, cols in MODEL_SOURCES.items():
+        if not (gdir / source).exists():
+            # NaN like a removed source of an incremental rebuild
+            for col in cols:
+                model_df[col] = np.nan
+            continue
+        start = time.perf_counter()
+        df = _model_source(gdir / source, rgn)
+        for col in cols:
+            model_df[col] = gidx.gather(df["x"], df["y"], df[col])
+        if timings is not None:
+            cost = time.perf_counter() - start
+            timings.append((str(gdir / source), len(df), cost))
     return model_df
 
 
+def _model_source(source: Path, rgn) -> pd.DataFrame:
+    """read one of `MODEL_SOURCES` into (x, y, cols..)"""
+    from tomopainter.tomo_paint.gmt import tomo_xyz
+
+    if source.name == "sedthk.xyz":
+        # sed data
+        df = pd.read_csv(source, delim_whitespace=True, header=None)
+        df = tomo_xyz(df, rgn).clip(lower=0)
+    elif source.name == "rf_moho.lst":
+        # receive function moho
+        df = pd.read_csv(
+            source,
+            delim_whitespace=True,
+            usecols=[0, 1, 2],
+            header=None,
+        )
+        df.iloc[:, 0], df.iloc[:, 1] = (
+            df.iloc[:, 1].copy(),
+            df.iloc[:, 0].copy(),
+        )
+        df = tomo_xyz(df, rgn)
+    elif source.name == "input_vpvs.lst":
+        # poisson
+        df = pd.read_csv(source, delim_whitespace=True, header=None)
+        df = tomo_xyz(df, rgn)
+    elif source.name == "mcmc_misfit_moho.csv":
+        # mcmc misfit & moho
+        df = pd.read_csv(source)
+        df = df[["x", "y"] + [c for c in df.columns if c not in ["x", "y"]]]
+    else:
+        raise FileNotFoundError(f"{source} is not a source of model.")
+    df.columns = ["x", "y"] + MODEL_SOURCES[source.name]
+    return df
+
+
 def _model_df_test(gdir: Path, gdf) -> pd.DataFrame:
     return pd.DataFrame(
         {
@@ -232,41 +824,17 @@ def _model_df_test(gdir: Path, gdf) -> pd.DataFrame:
     )
 
 
-def _phase_df(gdir: Path, gdf) -> None | pd.DataFrame:
-    phase_df = None
-    for mdir in gdir.glob("*/"):
-        # data of per method
-        method = mdir.name
-        dfs = {}
-        for gf in mdir.rglob("*.grid"):
-            [mtd, idt, period] = gf.stem.split("_")
-            if mtd != method:
-                raise FileNotFoundError(f"In {method} dir find {mtd}_*.")
-            df = pd.read_csv(
-                gf, header=None, delim_whitespace=True, names=["x", "y", idt]
-            )
-            df = gdf.merge(df, on=["x", "y"], how="left")
-            df["period"] = period
-            df = df[["id", "period", idt]]
-            dfs[idt] = pd.concat([dfs[idt], df]) if idt in dfs else df
-        # merge all idt dfs of the method
-        method_df = None
-        for df in dfs.values():
-            method_df = (
-                df
-                if method_df is None
-                else method_df.merge(df, on=["id", "period"], how="outer")
-            )
-        if method_df is None:
-            continue
-        method_df["method"] = method
-        method_df.rename(columns={"id": "grid_id"}, inplace=True)
-        # concat all method dfs
-        phase_df = (
-            method_df if phase_df is None else pd.concat([phase_df, method_df])
-        )
-    if phase_df is not None:
-        phase_df.sort_values(by=["method", "period", "grid_id"], inplace=True)
+def _phase_df(gdir: Path, gidx: GridIndex) -> None | pd.DataFrame:
+    from .ingest import phase_groups, read_phase_group
+
+    dfs = [
+        read_phase_group(method, period, files, gidx)[1]
+        for (method, period), files in phase_groups(gdir).items()
+    ]
+    if not dfs:
+        return None
+    phase_df = pd.concat(dfs, ignore_index=True)
+    phase_df.sort_values(by=["method", "period", "grid_id"], inplace=True)
     return phase_df
 
 
@@ -284,24 +852,12 @@ def _test_phase_df(gdir: Path, gdf) -> None | pd.DataFrame:
     )
 
 
-def _swave_df(gdir, gdf):
-    swave_df = None
-    for vsf in gdir.glob("*vs.csv"):
-        df = pd.read_csv(vsf)
-        df = df.merge(gdf, on=["x", "y"], how="left")
-        df["depth"] = abs(df["depth"])
-        df = df.drop(columns=["x", "y"])
-        df.rename(
-            columns={"id": "grid_id", "velocity": vsf.stem}, inplace=True
-        )
-        swave_df = (
-            df
-            if swave_df is None
-            else swave_df.merge(df, on=["grid_id", "depth"], how="outer")
-        )
-    if swave_df is not None:
-        swave_df.sort_values(by=["grid_id", "depth"], inplace=True)
-    return swave_df
+def _swave_df(gdir, gidx: GridIndex) -> pd.DataFrame:
+    from .ingest import join_swave, read_swave_file
+
+    return join_swave(
+        [read_swave_file(vsf, gidx)[1] for vsf in sorted(gdir.glob("*vs.csv"))]
+    )
 
 
 def _test_swave_df(gdir: Path, gdf) -> pd.DataFrame:
@@ -315,12 +871,14 @@ def _test_swave_df(gdir: Path, gdf) -> pd.DataFrame:
     )
 
 
-def _select_distinct(cursor, table, target, where: str) -> list:
+def _select_distinct(cursor, table, target, where: str, params=()) -> list:
+    """`where` with `?` placeholders of `params`"""
     if cursor.execute(
-        f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table}'"
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+        (table,),
     ).fetchone():
         rows = cursor.execute(
-            f"SELECT DISTINCT {target} FROM {table} WHERE {where};"
+            f"SELECT DISTINCT {target} FROM {table} WHERE {where};", params
         ).fetchall()
         return sorted([row[0] for row in rows])
     else:
@@ -331,19 +889,3 @@ def xyz_ave(df):
     avg = df["z"].mean()
     df["z"] = (df["z"] - avg) / avg * 100
     return df
-
-
-def calc_lab(vs, limits=None):
-    limits = limits or [54, 200]
-    df = vs[(vs["depth"] > limits[0]) & (vs["depth"] < limits[1])]
-    lab_df = df.groupby("id").apply(_max_nagative_gradient)
-    lab_df.dropna().reset_index(drop=True)
-    lab_df["grid_id"] = lab_df["id"].apply(lambda i: int(i))
-    lab_df.rename(columns={"depth": "lab"}, inplace=True)
-    return lab_df[["grid_id", "lab"]]
-
-
-def _max_nagative_gradient(group):
-    group["gra"] = np.gradient(group["vs"], group["depth"])
-    max_idx = group["gra"].idxmin() if any(group["gra"] < 0) else None
-    return group.loc[max_idx, ["id", "depth"]] if max_idx is not None else None
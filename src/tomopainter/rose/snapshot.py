@@ -0,0 +1,183 @@
+"""
+columnar snapshot of `grids.db`: one `.npy` file per column,
+loaded memory-mapped so that worker processes share the pages.
+
+export it once after ingest, then serve queries from it,
+workers opened by `open_queryer(queryer.handle())` use it too:
+
+    with DataQueryer("data/grids.db") as queryer:
+        queryer.export_snapshot()
+        queryer.use_snapshot()
+        TomoPainter(queryer).plot("vel", jobs=4)
+
+snapshot/
+    meta.json
+    grid/id.npy grid/x.npy grid/y.npy
+    phase/grid_id.npy phase/method.npy ...
+"""
+import json
+from pathlib import Path
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .filters import GRID_COLS, LEVEL_COLS
+from .points import hull_anomaly
+
+TABLES = ["grid", "phase", "swave", "model"]
+# format of columns, snapshots of other versions are exported again
+VERSION = 2
+
+
+def export_snapshot(conn, sdir: Path, stamp) -> None:
+    """write columns of tables into `sdir`, replacing an old snapshot"""
+    tmp = sdir.with_name(f"{sdir.name}.tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    meta = {"version": VERSION, "stamp": list(stamp), "tables": {}}
+    for table in TABLES:
+        df = pd.read_sql(f"SELECT * FROM {table}", conn)
+        tdir = tmp / table
+        tdir.mkdir(parents=True)
+        cols = {}
+        for col in df.columns:
+            values, info = _column_array(df[col], col)
+            np.save(tdir / f"{col}.npy", values)
+            cols[col] = info
+        meta["tables"][table] = cols
+    with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    # replace the old snapshot at once
+    if sdir.exists():
+        shutil.rmtree(sdir)
+    tmp.rename(sdir)
+
+
+class Snapshot:
+    """serve `DataQueryer.query` from memory-mapped columns"""
+
+    def __init__(self, sdir) -> None:
+        self.sdir = Path(sdir)
+        with open(self.sdir / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != VERSION:
+            raise ValueError(
+                f"{self.sdir} is of an old format, try `export_snapshot`."
+            )
+        self.stamp = tuple(self.meta["stamp"])
+        self._columns = {}
+        # position of grid ids in table grid
+        ids = self.column("grid", "id")
+        self._pos = np.full(ids.max() + 1, -1, dtype=np.int64)
+        self._pos[ids] = np.arange(len(ids))
+
+    def table_columns(self, table) -> list[str]:
+        return list(self.meta["tables"][table])
+
+    def column(self, table, col) -> np.ndarray:
+        """memory-mapped column"""
+        key = (table, col)
+        if key not in self._columns:
+            fpath = self.sdir / table / f"{col}.npy"
+            self._columns[key] = np.load(fpath, mmap_mode="r")
+        return self._columns[key]
+
+    def query(
+        self, table, usecols=None, shape=(), params=(), avecols=None
+    ) -> pd.DataFrame:
+        """
+        like `SELECT .. FROM grid g JOIN table t` with filters,
+        `avecols` are anomalies like `query_sql`.
+        """
+        # join grid by grid_id, -1 of NULL ids
+        grid_id = self.column(table, "grid_id")
+        rows = np.flatnonzero((grid_id >= 0) & (grid_id < len(self._pos)))
+        gpos = self._pos[grid_id[rows]]
+        joined = gpos >= 0
+        rows, gpos = rows[joined], gpos[joined]
+        # filters
+        params = list(params)
+        for col, op, num in shape:
+            args, params = params[:num], params[num:]
+            if col in GRID_COLS:
+                values = self.column("grid", col)[gpos]
+            else:
+                values = self._values(table, col, rows)
+            if op == "between":
+                keep = (values >= args[0]) & (values <= args[1])
+            elif op == "in":
+                keep = np.isin(values, args)
+            else:
+                keep = values == args[0]
+            rows, gpos = rows[keep], gpos[keep]
+        # columns
+        if usecols is None:
+            gcols = self.table_columns("grid")
+            tcols = self.table_columns(table)
+        else:
+            gcols, tcols = GRID_COLS, usecols
+        data = {col: self.column("grid", col)[gpos] for col in gcols}
+        for col in tcols:
+            data[col] = self._values(table, col, rows)
+        df = pd.DataFrame(data)
+        if avecols:
+            # means over the rows kept by `.dropna()`
+            kept = df.notna().all(axis=1).to_numpy()
+            df = df[kept].reset_index(drop=True)
+            inside = np.ones(len(df), dtype=bool)
+            if "inside_hull" in self.table_columns("grid"):
+                flags = self.column("grid", "inside_hull")[gpos[kept]]
+                inside = flags.astype(bool)
+            levels = [
+                self._values(table, col, rows[kept])
+                for col in LEVEL_COLS.get(table, [])
+            ]
+            for col in avecols:
+                values = df[col].to_numpy(dtype=float)
+                anomaly = np.empty(len(df))
+                # means of per level, like `PARTITION BY` of `_ave_col`
+                for idx in _level_groups(levels, len(df)):
+                    anomaly[idx] = hull_anomaly(values[idx], inside[idx])
+                df[col] = anomaly
+        return df
+
+    def _values(self, table, col, rows) -> np.ndarray:
+        values = self.column(table, col)[rows]
+        info = self.meta["tables"][table][col]
+        if "categories" in info:
+            cats = np.asarray(info["categories"] + [None], dtype=object)
+            values = cats[values]
+        return values
+
+
+def _level_groups(levels, size) -> list[np.ndarray]:
+    """row positions of per combination of `levels`"""
+    if not levels:
+        return [np.arange(size)]
+    keys = pd.DataFrame(dict(enumerate(levels)))
+    groups = keys.groupby(list(keys.columns), dropna=False).indices
+    return list(groups.values())
+
+
+# integer keys of joins, NULL stored as -1
+ID_COLS = ["id", "grid_id"]
+
+
+def _column_array(series: pd.Series, col) -> tuple[np.ndarray, dict]:
+    if col in ID_COLS:
+        values = series.fillna(-1).to_numpy(dtype=np.int64)
+        return values, {"dtype": str(values.dtype)}
+    if series.dtype == object:
+        # all NULL or mixed numbers are numeric columns of NaN
+        numbers = pd.to_numeric(series, errors="coerce")
+        if numbers.notna().sum() == series.notna().sum():
+            values = numbers.to_numpy(dtype=float)
+            return values, {"dtype": str(values.dtype)}
+        cat = pd.Categorical(series)
+        # code -1 of missing values maps to the last one: None
+        codes = cat.codes.astype(np.int16)
+        info = {"categories": [str(c) for c in cat.categories]}
+        return codes, info
+    values = series.to_numpy()
+    return values, {"dtype": str(values.dtype)}
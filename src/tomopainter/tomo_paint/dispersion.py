@@ -1,26 +1,36 @@
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 from .gmt import plot_dispersion_curve
 
 
-def gmt_plot_dispersion_curves(mm):
+def gmt_plot_dispersion_curves(mm, queryer=None):
     """
-    plot dispersion curves of tpwt and ant
+    plot dispersion curves of tpwt and ant,
+    read from grid files or all periods by one query of `queryer`.
     """
     dc_periods = {
         "ant": [8, 10, 12, 14, 16, 18],
         "overlap": [20, 25, 30],
         "tpwt": [35, 40, 45, 50, 60, 70, 80, 90, 100, 111, 125, 143],
     }
-    gp = Path("grids")
-    merged_ant = merge_periods_data(gp, "ant", "vel")
-    merged_tpwt = merge_periods_data(gp, "tpwt", "vel")
-    merged_data = pd.merge(merged_ant, merged_tpwt, on=["x", "y"], how="left")
-    # merge misfit by mcmc for text
-    misfit = mm[["x", "y", "misfit"]]
-    merged_data = pd.merge(merged_data, misfit, on=["x", "y"], how="left")
+    if queryer is None:
+        gp = Path("grids")
+        gidx = _grid_index(gp)
+        merged_ant = merge_periods_data(gp, "ant", "vel", gidx)
+        merged_tpwt = merge_periods_data(gp, "tpwt", "vel", gidx)
+    else:
+        gidx = queryer.grid_index()
+        merged_ant = query_periods_data(queryer, "ant", "vel", gidx)
+        merged_tpwt = query_periods_data(queryer, "tpwt", "vel", gidx)
+    # both are on the nodes of gidx
+    merged_data = pd.concat(
+        [merged_ant, merged_tpwt.drop(columns=["x", "y"])], axis=1
+    )
+    # misfit by mcmc for text
+    merged_data["misfit"] = gidx.gather(mm["x"], mm["y"], mm["misfit"])
     # # clip
     # sta = pd.read_csv(
     #     r"src/txt/station.lst",
@@ -32,7 +42,8 @@ def gmt_plot_dispersion_curves(mm):
     # boundary = info_filter.points_boundary(sta, region)
     # merged_inner = info_filter.points_inner(merged_data, boundary=boundary)
     merged_inner = merged_data[
-        (merged_data["x"] == 122.0) & (merged_data["y"] == 32.5)
+        np.isclose(merged_data["x"], 122.0)
+        & np.isclose(merged_data["y"], 32.5)
     ]
     save_path = Path("images") / "dispersion_curves"
     if not save_path.exists():
@@ -41,18 +52,41 @@ def gmt_plot_dispersion_curves(mm):
         plot_dispersion_curve(vs.to_dict(), dc_periods, save_path)
 
 
-def merge_periods_data(gp: Path, method: str, idt: str):
-    merged_data = None
+def merge_periods_data(gp: Path, method: str, idt: str, gidx):
+    """columns `{method}_{period}` on the nodes of `gidx`"""
+    merged_data = gidx.grid_df().drop(columns=["id"])
     for f in gp.glob(f"{method}_grids/*{idt}*"):
         per = f.stem.split("_")[-1]
         col_name = f"{method}_{per}"
         data = pd.read_csv(
             f, header=None, delim_whitespace=True, names=["x", "y", col_name]
         )
-        if merged_data is None:
-            merged_data = data
-        else:
-            merged_data = pd.merge(
-                merged_data, data, on=["x", "y"], how="left"
-            )
+        merged_data[col_name] = gidx.gather(
+            data["x"], data["y"], data[col_name]
+        )
+    return merged_data
+
+
+def query_periods_data(queryer, method: str, col: str, gidx):
+    """like `merge_periods_data` from table phase of `queryer`"""
+    pivoted = queryer.phases(method, col, pivot=True)
+    # grid ids of table grid are ids of `gidx`
+    pivoted = pivoted.reindex(np.arange(len(gidx)))
+    merged_data = gidx.grid_df().drop(columns=["id"])
+    for per in pivoted.columns.drop(["x", "y"]):
+        merged_data[f"{method}_{per}"] = pivoted[per].to_numpy()
     return merged_data
+
+
+def _grid_index(gp: Path):
+    from tomopainter.rose import GridIndex
+
+    vel = next(gp.glob("ant_grids/*vel*"))
+    data = pd.read_csv(
+        vel,
+        header=None,
+        delim_whitespace=True,
+        usecols=[0, 1],
+        names=["x", "y"],
+    )
+    return GridIndex.from_xy(data["x"], data["y"])
@@ -1,4 +1,6 @@
-from .gmt_make_data import area_clip, make_topos, tomo_grid
+from .cpt_registry import CPT_REGISTRY, CptRegistry
+from .gmt_make_data import area_clip, make_topos, tomo_grid, tomo_xyz
+from .grid_cache import GRID_CACHE, GridCache
 from .plot_area import (
     plot_area_map,
     plot_evt_sites,
@@ -9,6 +11,8 @@ from .plot_dc import plot_dispersion_curve
 from .plot_diff import plot_diff
 from .plot_vel import plot_as, plot_vel
 from .plot_vs import plot_vs_hpanel, plot_vs_vpanel
+from .scratch import Scratch, scratch_file
+from .topo_cache import TOPO_CACHE, TopoCache
 
 
 __all__ = [
@@ -16,8 +20,17 @@ __all__ = [
     "plot_vel",
     "plot_as",
     "tomo_grid",
+    "tomo_xyz",
+    "GridCache",
+    "GRID_CACHE",
     "area_clip",
     "make_topos",
+    "CptRegistry",
+    "CPT_REGISTRY",
+    "TopoCache",
+    "TOPO_CACHE",
+    "Scratch",
+    "scratch_file",
     "plot_dispersion_curve",
     "plot_vs_vpanel",
     "plot_vs_hpanel",
@@ -0,0 +1,81 @@
+"""
+registry of color palettes made by `pygmt.makecpt`.
+a palette is made once into a file named by the hash of its arguments,
+and the same arguments always get the same path back.
+
+temp/cpts/
+    <key>.cpt
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+import threading
+
+import pygmt
+
+
+class CptRegistry:
+    """memoised `pygmt.makecpt` keyed by its arguments"""
+
+    def __init__(self, cdir="temp/cpts") -> None:
+        self.cdir = Path(cdir)
+        # key: path of cpt file
+        self.paths: dict[str, str] = {}
+        self.made = 0
+        self._lock = threading.Lock()
+
+    def key(
+        self, cmap, series, reverse, continuous=True, background=True
+    ) -> str:
+        """hash of makecpt arguments and content of a `cmap` file"""
+        cfile = Path(cmap)
+        parts = [
+            cmap,
+            cfile.read_text() if cfile.is_file() else None,
+            # the range of `cmap` itself without a series
+            None if series is None else [float(s) for s in series],
+            reverse,
+            continuous,
+            background,
+        ]
+        text = json.dumps(parts, default=str)
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def get(
+        self, cmap, series, reverse=False, continuous=True, background=True
+    ) -> str:
+        """path of the cpt file, made if it is not in the registry"""
+        args = [cmap, series, reverse, continuous, background]
+        key = self.key(*args)
+        with self._lock:
+            if (path := self.paths.get(key)) is not None:
+                return path
+        cptfile = self.cdir / f"{key}.cpt"
+        # made by other processes sharing `cdir`
+        if not cptfile.exists():
+            self.cdir.mkdir(parents=True, exist_ok=True)
+            tmp = self.cdir / f"{key}.{os.getpid()}.{threading.get_ident()}"
+            pygmt.makecpt(
+                cmap=cmap,
+                series=series,
+                output=f"{tmp}.cpt",
+                continuous=continuous,
+                background=background,
+                reverse=reverse,
+            )
+            os.replace(f"{tmp}.cpt", cptfile)
+            self.made += 1
+        with self._lock:
+            self.paths[key] = str(cptfile)
+        return str(cptfile)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.paths.clear()
+        for cptfile in self.cdir.glob("*.cpt"):
+            cptfile.unlink(missing_ok=True)
+
+
+# registry shared by calls of `makecpt`
+CPT_REGISTRY = CptRegistry()
@@ -75,7 +75,6 @@ def _fig_basalts(fig, txt):
     basalts = pd.read_csv(txt / "tects/China_basalts_data.csv")
     # filter by age
     basalts = basalts[basalts["age"] < 10]
-    cc = "temp/temp.cpt"
     cc = makecpt([0, 10], cmap="hot", reverse=True)
     fig.plot(data=basalts[["x", "y", "age"]], style="c0.2c", cmap=cc)
     fig.colorbar(cmap=cc, frame="a")
@@ -7,49 +7,71 @@
 5. make ppt to show results
 """
 from pathlib import Path
+import shutil
 
+import numpy as np
 import pandas as pd
 import pygmt
+import xarray as xr
 
 
 def makecpt(
-    series, output="temp/temp.cpt", cpt="Vc_1.8s.cpt", reverse=False, cmap=None
+    series, output=None, cpt="Vc_1.8s.cpt", reverse=False, cmap=None
 ) -> str:
+    """
+    path of the cpt file made once by `CPT_REGISTRY`,
+    or a copy of it at `output` if given.
+    """
+    from .cpt_registry import CPT_REGISTRY
+
     cpts = Path("data/txt/cptfiles")
     cmap = cmap or str(cpts / cpt)
-    pygmt.makecpt(
-        cmap=cmap,
-        series=series,
-        output=output,
-        continuous=True,
-        background=True,
-        reverse=reverse,
-    )
+    cptfile = CPT_REGISTRY.get(cmap, series, reverse)
+    if output is None:
+        return cptfile
+    shutil.copyfile(cptfile, output)
     return output
 
 
-def diff_make(ant, tpwt, region, cptfile, grds):
+def diff_make(ant, tpwt, region, cptfile=None, grds=None):
+    """
+    (diff, grids, cpt) of vel of ant and tpwt,
+    grids are written into files of `grds` only if given.
+    """
+    from tomopainter.rose import GridIndex
+
     pers_series = {
         "20": [3.45, 3.61, 0.01],
         "25": [3.63, 3.76, 0.01],
         "30": [3.7, 3.85, 0.01],
     }
-    per = Path(ant).stem.split("_")[-1]
+    if isinstance(ant, xr.DataArray):
+        per = str(ant.attrs.get("period"))
+    else:
+        per = Path(ant).stem.split("_")[-1]
     series = pers_series.get(per)
     # make cpt file for tomo of vel of ant and tpwt
     # pygmt.makecpt(cmap=cmap, series=series, continuous=True, output=cptfile)
-    makecpt(series, cptfile, cmap="jet", reverse=True)
+    cpt = makecpt(series, cptfile, cmap="jet", reverse=True)
 
-    # make vel grid of ant and get vel grid generated by `surface`
-    ant = tomo_grid(ant, region, grds["ant"])
-    tpwt = tomo_grid(tpwt, region, grds["tpwt"])
+    grds = grds or {}
+    grids = {
+        idt: tomo_grid(data, region, grds.get(idt))
+        for idt, data in zip(["ant", "tpwt"], [ant, tpwt])
+    }
+    # vel of ant and tpwt generated by `surface`
+    ant = tomo_xyz(ant, region)
+    tpwt = tomo_xyz(tpwt, region)
 
-    # make diff grid
-    merged = pd.merge(ant, tpwt, on=["x", "y"], how="left")
-    merged["z"] = (merged["z_x"] - merged["z_y"]) * 1000
-    diff = merged[["x", "y", "z"]]
-    tomo_grid(diff, region, grds["diff"])
-    return diff
+    # make diff grid on the nodes of ant
+    gidx = GridIndex.from_xy(ant["x"], ant["y"])
+    tpwt_z = gidx.gather(tpwt["x"], tpwt["y"], tpwt["z"])
+    diff = ant[["x", "y"]].copy()
+    diff["z"] = (ant["z"].values - tpwt_z[gidx.ids(ant["x"], ant["y"])]) * 1000
+    # diff is on grid nodes already
+    diff_grid = gidx.dataarray(diff["x"], diff["y"], diff["z"])
+    grids["diff"] = tomo_grid(diff_grid, region, grds.get("diff"))
+    return diff, grids, cpt
 
 
 def make_topos(
@@ -61,59 +83,32 @@ def make_topos(
     resolution=None,
     cmap="grayC",
     series=None,
+    spacing=0.01,
+    azimuth=45,
 ):
+    """
+    topo grid and gradient of `region` from `TOPO_CACHE`,
+    `idt` is kept for callers naming the topo.
+    """
+    from .topo_cache import TOPO_CACHE
+
     if series is None:
         series = [-300, 1350]
-    temp = Path("temp")
-    ctopo = str(temp / f"topo_{cmap}.cpt")
     # pygmt.makecpt(
     #     cmap=cmap,
     #     series=series,
     #     continuous=True,
-    #     output=ctopo,
     # )
-    grd = temp / f"topo_{idt}.grd"
-    gra = temp / f"topo_{idt}.gradient"
-    topos = dict(
+    if resolution:
+        # remote earth relief read by grdcut of gmt
+        data = f"@earth_relief_{resolution}_g"
+    grd, gra = TOPO_CACHE.get(data, region, spacing, azimuth, normalize)
+    return dict(
         zip(
             ["grd", "gra", "cpt", "region"],
-            [grd, gra, makecpt(series, ctopo, cmap=cmap), region],
-        )
-    )
-    if Path(gra).exists():
-        return topos
-    TOPO_CUT = "temp/topo_cut.grd"
-    TOPO_SAMPLE = "temp/topo_sample.grd"
-    if resolution:
-        data = pygmt.datasets.load_earth_relief(
-            resolution=resolution, region=region, registration="gridline"
+            [grd, gra, makecpt(series, cmap=cmap), region],
         )
-    # grdcut
-    pygmt.grdcut(
-        grid=data,
-        region=region,
-        outgrid=TOPO_CUT,
-    )
-    # grdsample
-    pygmt.grdsample(
-        grid=TOPO_CUT,
-        outgrid=TOPO_SAMPLE,
-        region=region,
-        spacing=0.01,
-        # translate=True,
-    )
-    TOPO_GRA = "temp/topo.gradient"
-    # grdgradient
-    pygmt.grdgradient(
-        grid=TOPO_SAMPLE,
-        outgrid=TOPO_GRA,
-        azimuth=45,
-        normalize=normalize,
-        verbose="w",
     )
-    Path(TOPO_SAMPLE).rename(grd)
-    Path(TOPO_GRA).rename(gra)
-    return topos
 
 
 ###############################################################################
@@ -133,29 +128,86 @@ def make_topos(
 # return str(pre_sf)
 
 
-def tomo_grid(data, region, outfile=None, **spacings) -> pd.DataFrame:
-    if spacings is None:
-        spacings = {}
-    # blockmean
-    xyz = pygmt.blockmean(
-        data=data,
-        region=region,
-        spacing=spacings.get("blockmean") or 0.5,
+def tomo_grid(
+    data, region, outfile=None, cache=True, **spacings
+) -> xr.DataArray:
+    """
+    grid of `data` resampled by grdsample, kept in memory
+    and written into `outfile` only if the caller asks for it.
+    `data` is xyz or a `xr.DataArray` of dims (y, x) like by
+    `DataQueryer.query_grid`, skipping blockmean if its nodes are
+    spaced like the blocks and surface.
+    results are cached by `GRID_CACHE` unless `cache` is False.
+    """
+    from .grid_cache import GRID_CACHE
+
+    key = GRID_CACHE.key("grid", data, region, spacings)
+    grid = GRID_CACHE.get(key) if cache else None
+    if grid is None:
+        # grdsample
+        grid = pygmt.grdsample(
+            grid=_surface(data, region, spacings),
+            spacing=spacings.get("grdsample") or 0.01,
+        )
+        if cache:
+            GRID_CACHE.put(key, grid)
+    if outfile is not None:
+        grid.rename("z").to_netcdf(outfile)
+    return grid
+
+
+def tomo_xyz(data, region, cache=True, **spacings) -> pd.DataFrame:
+    """xyz of `data` on nodes of `surface`, like `tomo_grid`"""
+    from .grid_cache import GRID_CACHE
+
+    key = GRID_CACHE.key("xyz", data, region, spacings)
+    xyz = GRID_CACHE.get(key) if cache else None
+    if xyz is None:
+        xyz = pygmt.grd2xyz(_surface(data, region, spacings))
+        if cache:
+            GRID_CACHE.put(key, xyz)
+    return xyz
+
+
+def grid_xyz(grid: xr.DataArray) -> pd.DataFrame:
+    """xyz of nodes of `grid` like `pygmt.grd2xyz`, without gmt"""
+    ydim, xdim = grid.dims
+    xx, yy = np.meshgrid(grid[xdim].values, grid[ydim].values)
+    return pd.DataFrame(
+        {"x": xx.ravel(), "y": yy.ravel(), "z": grid.values.ravel()}
     )
+
+
+def _surface(data, region, spacings) -> xr.DataArray:
+    block = spacings.get("blockmean") or 0.5
+    surface = spacings.get("surface") or 0.5
+    if isinstance(data, xr.DataArray):
+        on_nodes = all(_spaced_by(data, sp) for sp in [block, surface])
+        data = grid_xyz(data).dropna()
+        # blockmean keeps nodes spaced as blocks and surface as they are
+        if on_nodes:
+            return pygmt.surface(data=data, region=region, spacing=surface)
+    # blockmean
+    xyz = pygmt.blockmean(data=data, region=region, spacing=block)
     # surface
-    grd = pygmt.surface(
-        data=xyz,
-        region=region,
-        spacing=spacings.get("surface") or 0.5,
+    return pygmt.surface(data=xyz, region=region, spacing=surface)
+
+
+def _spaced_by(grid: xr.DataArray, spacing) -> bool:
+    """nodes of `grid` are spaced by `spacing` of gmt, like 0.5 or [x, y]"""
+    try:
+        steps = [float(sp) for sp in np.atleast_1d(spacing)]
+    except ValueError:
+        # units like `30m` are never matched
+        return False
+    ydim, xdim = grid.dims
+    xs, ys = grid[xdim].values, grid[ydim].values
+    if len(xs) < 2 or len(ys) < 2:
+        return False
+    return bool(
+        np.isclose(abs(xs[1] - xs[0]), steps[0])
+        and np.isclose(abs(ys[1] - ys[0]), steps[-1])
     )
-    # grdsample
-    if outfile is not None:
-        pygmt.grdsample(
-            grid=grd,
-            spacing=spacings.get("grdsample") or 0.01,
-            outgrid=outfile,
-        )
-    return pygmt.grd2xyz(grd)
 
 
 def get_info(grd_file: str, ndigits: int = 1) -> list[float]:
@@ -191,11 +243,22 @@ def get_info(grd_file: str, ndigits: int = 1) -> list[float]:
 
 
 def area_clip(data, *, region=None, spacing=0.01):
-    hull = Path("data/txt/area_hull.nc")
+    """
+    grid with NaN outside the hull if `region` is given,
+    else xyz inside the hull, by the rasterised mask of grids.
+    """
+    from tomopainter.rose.hull import grid_hull_mask, xyz_hull_mask
+
     if type(data) is str:
-        data = pygmt.grd2xyz(data)
-    clip_data = pygmt.select(data, polygon=hull)
-    if clip_data is None:
+        data = xr.load_dataarray(data, engine="netcdf4")
+    if isinstance(data, xr.DataArray):
+        mask = grid_hull_mask(data)
+        if region is not None:
+            return mask.clip(data)
+        clip_data = grid_xyz(data)[mask.grid_mask(data).ravel()]
+    else:
+        clip_data = data[xyz_hull_mask(data["x"], data["y"])]
+    if clip_data.empty:
         raise ValueError("Nothing were selected.")
     if region is not None:
         return pygmt.xyz2grd(data=clip_data, region=region, spacing=spacing)
@@ -203,14 +266,27 @@ def area_clip(data, *, region=None, spacing=0.01):
 
 
 def series(grid, method=0):
-    if type(grid) is not pd.DataFrame:
-        grid = pd.read_csv(
-            grid, delim_whitespace=True, names=["x", "y", "z"], header=None
-        )
-    grid: pd.DataFrame = area_clip(grid)  # pyright: ignore
-    avg = grid["z"].mean()
-    min_val = grid["z"].min()
-    max_val = grid["z"].max()
+    """cpt series of values inside the hull of xyz, a grid or a file"""
+    from tomopainter.rose.hull import grid_hull_mask
+
+    if isinstance(grid, xr.DataArray):
+        mask = grid_hull_mask(grid)
+        inside = mask.clip(grid)
+        avg = mask.mean(grid)
+        min_val = float(inside.min())
+        max_val = float(inside.max())
+    else:
+        if type(grid) is not pd.DataFrame:
+            grid = pd.read_csv(
+                grid,
+                delim_whitespace=True,
+                names=["x", "y", "z"],
+                header=None,
+            )
+        grid: pd.DataFrame = area_clip(grid)  # pyright: ignore
+        avg = grid["z"].mean()
+        min_val = grid["z"].min()
+        max_val = grid["z"].max()
     if method == 0:
         return [min_val, max_val, 0.01]
     elif method == 1:
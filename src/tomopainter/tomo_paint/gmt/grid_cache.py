@@ -0,0 +1,157 @@
+"""
+content-addressed disk cache of `tomo_grid` and `tomo_xyz` outputs.
+an entry is keyed by the hash of the input data, region and spacings,
+and keeps the xyz frame of `surface` or the `grdsample` grid.
+
+temp/grid_cache/
+    <key>.npz   # xyz frame
+    <key>.nc    # resampled grid
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+
+class GridCache:
+    """
+    LRU cache of gridded results on disk within a budget in bytes.
+    the mtime of an entry is its last use, so processes sharing `cdir`
+    share entries too, while hits and misses are counted per process.
+    """
+
+    def __init__(self, cdir="temp/grid_cache", budget=2**30) -> None:
+        self.cdir = Path(cdir)
+        self.budget = budget
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, kind, data, region, spacings: dict) -> str:
+        """hash of `kind` of output, input `data`, `region` and `spacings`"""
+        parts = [
+            kind,
+            data_digest(data),
+            [float(r) for r in region],
+            sorted(spacings.items()),
+        ]
+        text = json.dumps(parts, default=str)
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def get(self, key) -> None | pd.DataFrame | xr.DataArray:
+        """cached xyz frame or grid"""
+        if self.budget <= 0:
+            return None
+        xyz_file, grd_file = self._files(key)
+        try:
+            if grd_file.exists():
+                value = xr.load_dataarray(grd_file, engine="netcdf4")
+                os.utime(grd_file)
+            else:
+                with np.load(xyz_file) as npz:
+                    value = pd.DataFrame(
+                        npz["values"], columns=npz["columns"]
+                    )
+                os.utime(xyz_file)
+        except FileNotFoundError:
+            # never cached or evicted by other processes
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key, value: pd.DataFrame | xr.DataArray):
+        """cache the xyz frame or grid `value` and return it"""
+        if self.budget <= 0:
+            return value
+        self.cdir.mkdir(parents=True, exist_ok=True)
+        xyz_file, grd_file = self._files(key)
+        tmp = f".{os.getpid()}.tmp"
+        if isinstance(value, xr.DataArray):
+            value.to_netcdf(f"{grd_file}{tmp}")
+            os.replace(f"{grd_file}{tmp}", grd_file)
+        else:
+            with open(f"{xyz_file}{tmp}", "wb") as f:
+                np.savez(
+                    f,
+                    values=value.to_numpy(dtype=float),
+                    columns=np.array(value.columns, dtype=str),
+                )
+            os.replace(f"{xyz_file}{tmp}", xyz_file)
+        self.evict()
+        return value
+
+    def evict(self) -> None:
+        """
+        remove least recently used entries beyond the budget,
+        files being written by `put` are neither counted nor removed.
+        """
+        entries = {}
+        for fpath in self._entry_files():
+            try:
+                stat = fpath.stat()
+            except FileNotFoundError:
+                continue
+            key = fpath.name.split(".")[0]
+            size, used = entries.get(key, (0, 0.0))
+            entries[key] = (size + stat.st_size, max(used, stat.st_mtime))
+        nbytes = sum(size for size, _ in entries.values())
+        for key, (size, _) in sorted(entries.items(), key=lambda e: e[1][1]):
+            if nbytes <= self.budget:
+                break
+            for fpath in self._files(key):
+                fpath.unlink(missing_ok=True)
+            nbytes -= size
+
+    def clear(self) -> None:
+        if self.cdir.exists():
+            shutil.rmtree(self.cdir)
+
+    def info(self) -> dict:
+        files = self._entry_files()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(files),
+            "nbytes": sum(f.stat().st_size for f in files),
+            "budget": self.budget,
+        }
+
+    def _files(self, key) -> tuple[Path, Path]:
+        return self.cdir / f"{key}.npz", self.cdir / f"{key}.nc"
+
+    def _entry_files(self) -> list[Path]:
+        # `<key>.nc.<pid>.tmp` of `put` in other processes are skipped
+        if not self.cdir.exists():
+            return []
+        return [
+            f for f in self.cdir.iterdir() if f.suffix in [".npz", ".nc"]
+        ]
+
+
+def data_digest(data) -> str:
+    """hash of xyz, a `xr.DataArray` or a file of data"""
+    if isinstance(data, (str, Path)):
+        from tomopainter.rose.manifest import file_hash
+
+        return file_hash(Path(data))
+    sha = hashlib.sha1()
+    if isinstance(data, xr.DataArray):
+        arrays = [data["x"].values, data["y"].values, data.values]
+    elif isinstance(data, pd.DataFrame):
+        arrays = [pd.util.hash_pandas_object(data, index=False).values]
+    else:
+        arrays = [np.asarray(data, dtype=float)]
+    for arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        sha.update(f"{arr.dtype}{arr.shape}".encode())
+        sha.update(arr.tobytes())
+    return sha.hexdigest()
+
+
+# cache shared by calls of `tomo_grid`, budget 0 to turn it off
+GRID_CACHE = GridCache()
@@ -1,40 +1,44 @@
+import numpy as np
 import pandas as pd
-import pygmt
+import xarray as xr
 
 from .gmt_make_data import makecpt
 
 
-def vpanel_makecpt(dep, ccrust: str, clithos, cVave):
+def vpanel_makecpt(dep) -> list[str]:
+    """cpt files of crust, lithos and ave"""
     # crust
-    makecpt([3.2, 4, 0.1], ccrust, cmap="jet", reverse=True)
+    ccrust = makecpt([3.2, 4, 0.1], cmap="jet", reverse=True)
     # lithos
     # makecpt([4.43 - 0.25, 4.43 + 0.17, 0.03], clithos, cpt="cbcRdYlBu.cpt")
     if dep < 90:
-        makecpt([4.2, 4.5, 0.03], clithos, cmap="jet", reverse=True)
+        clithos = makecpt([4.2, 4.5, 0.03], cmap="jet", reverse=True)
     else:
-        makecpt([4.2, 4.6, 0.03], clithos, cmap="jet", reverse=True)
+        clithos = makecpt([4.2, 4.6, 0.03], cmap="jet", reverse=True)
     # ave
-    makecpt([-4, 4, 0.05], cVave, cmap="jet", reverse=True)
+    cVave = makecpt([-4, 4, 0.05], cmap="jet", reverse=True)
+    return [ccrust, clithos, cVave]
 
 
-def vpanel_clip_data(grid, border, region):
-    from tomopainter.rose import points_inner
+def vpanel_layers(grid, borders) -> list[xr.DataArray]:
+    """
+    layers of a profile `grid` from top to bottom, split by `borders`
+    of depth y at abscissa x like moho and lab, NaN outside each layer.
+    every border is interpolated once at the columns of the grid,
+    and nodes are compared with all borders in one broadcast.
+    """
+    if not isinstance(grid, xr.DataArray):
+        grid = xr.load_dataarray(grid, engine="netcdf4")
+    ydim, xdim = grid.dims
+    xs, ys = grid[xdim].values, grid[ydim].values
+    # depth of borders at columns, shape (borders, x)
+    depths = np.array([_border_at(border, xs) for border in borders])
+    # number of borders above or through each node, shape (y, x)
+    layer = (ys[None, :, None] <= depths[:, None, :]).sum(axis=0)
+    return [grid.where(layer == i) for i in range(len(borders) + 1)]
 
-    # read grid data and cut into parts
-    data: pd.DataFrame = pygmt.grd2xyz(grid=grid)  # pyright: ignore
-    bbot, bup = border["y"].min(), border["y"].max()
-    data_whole = data[data["y"] > bbot]
-    data_upon = data_whole[data_whole["y"] >= bup]
-    data_around = data_whole[data_whole["y"] < bup]
-    # make clip boundary
-    df1 = pd.DataFrame({"x": [region[0]], "y": [region[-1]]})
-    df2 = pd.DataFrame({"x": [region[1]], "y": [region[-1]]})
-    df_border = pd.concat([df1, border, df2], ignore_index=True)
-    # clip
-    data_inner = points_inner(data_around, df_border)
-    # concat data
-    data_upon = pd.concat([data_upon, data_inner], ignore_index=True)
-    data_upon = data_upon.sort_values(by=["x", "y"]).reset_index(drop=True)
-    region_upon = region.copy()
-    region_upon[-2] = bbot
-    return pygmt.xyz2grd(data=data_upon, region=region_upon, spacing=0.01)
+
+def _border_at(border: pd.DataFrame, xs) -> np.ndarray:
+    # held at the end depths beyond the border
+    border = border.sort_values(by="x")
+    return np.interp(xs, border["x"], border["y"])
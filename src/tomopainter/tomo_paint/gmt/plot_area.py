@@ -6,6 +6,7 @@ import pygmt
 
 from .gmt_fig import fig_tomos
 from .gmt_make_data import make_topos, makecpt, tomo_grid
+from .scratch import scratch_file
 
 
 def plot_area_map(regions, fig_name):
@@ -18,15 +19,14 @@ def plot_area_map(regions, fig_name):
     gmt_fig_area(vicinity, area, fig_name)
 
 
-def plot_model(df, region, cpt, fn):
+def plot_model(df, region, cpt, fn, scratch=None):
     """plot model by idt with ave"""
     # topo file
     topo = make_topos("ETOPO1", region)
     tomo = {
-        "grid": "temp/tomo.grd",
+        "grid": tomo_grid(df, region, scratch_file(scratch, "tomo.grd")),
         "cmap": makecpt(cpt["series"], cmap=cpt["cmap"], reverse=True),
     }
-    tomo_grid(df, region, tomo["grid"])
     # gmt plot
     _gmt_fig_model(topo, tomo, fn)
 
@@ -57,17 +57,17 @@ def _gmt_fig_model(topo, tomo, fn):
     fig.savefig(str(fn))
 
 
-def old_plot_model(region, fn):
+def old_plot_model(region, fn, scratch=None):
     topo = make_topos("ETOPO1", region)
-    tomos = _model_tomos(region)
+    tomos = _model_tomos(region, scratch)
     _old_gmt_fig_model(topo, tomos, fn)
 
 
-def _model_tomos(region):
+def _model_tomos(region, scratch):
     from tomopainter.rose import xyz_ave
 
     tomos = [
-        {"grid": f"temp/{i}.grd", "cmap": f"temp/{i}.cpt"}
+        {"grid": scratch_file(scratch, f"{i}.grd")}
         for i in ["sed", "poisson", "rj_moho", "mc_moho"]
     ]
     sed = pd.read_csv(
@@ -77,8 +77,8 @@ def _model_tomos(region):
         names=["x", "y", "z"],
     )
     sed["z"] = sed["z"] / sed["z"].mean()
-    tomo_grid(sed, region, tomos[0]["grid"])
-    makecpt([0, 2, 0.05], tomos[0]["cmap"], cmap="jet", reverse=True)
+    tomos[0]["grid"] = tomo_grid(sed, region, tomos[0]["grid"])
+    tomos[0]["cmap"] = makecpt([0, 2, 0.05], cmap="jet", reverse=True)
     moho = pd.read_csv(
         "data/moho.lst",
         header=None,
@@ -88,8 +88,8 @@ def _model_tomos(region):
     )
     moho = moho[["y", "x", "z"]]
     moho.columns = ["x", "y", "z"]
-    tomo_grid(moho, region, tomos[1]["grid"])
-    makecpt([27, 35, 0.1], tomos[1]["cmap"], cmap="jet", reverse=True)
+    tomos[1]["grid"] = tomo_grid(moho, region, tomos[1]["grid"])
+    tomos[1]["cmap"] = makecpt([27, 35, 0.1], cmap="jet", reverse=True)
     return tomos
 
 
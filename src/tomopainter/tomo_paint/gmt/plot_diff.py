@@ -8,6 +8,7 @@ import pygmt
 
 from .gmt_fig import fig_tomos
 from .gmt_make_data import area_clip, diff_make, make_topos
+from .scratch import scratch_file
 
 
 def gmt_plot_diff(diff: pd.DataFrame, grds, region, cpt, fname, eles):
@@ -107,15 +108,11 @@ def gmt_plot_diff(diff: pd.DataFrame, grds, region, cpt, fname, eles):
     fig.savefig(str(fname))
 
 
-def plot_diff(grid_ant, grid_tpwt, region, fig_name, eles):
-    # cpt file
-    cpt = "temp/tomo.cpt"
-    # grd file
+def plot_diff(grid_ant, grid_tpwt, region, fig_name, eles, scratch=None):
+    """grids are kept in `scratch` only if given"""
     grds = {
-        "ant": "temp/vel_ant.grd",
-        "tpwt": "temp/vel_tpwt.grd",
-        "diff": "temp/vel_diff.grd",
+        idt: scratch_file(scratch, f"vel_{idt}.grd")
+        for idt in ["ant", "tpwt", "diff"]
     }
-
-    diff = diff_make(grid_ant, grid_tpwt, region, cpt, grds)
-    gmt_plot_diff(diff, grds, region, cpt, fig_name, eles)
+    diff, grids, cpt = diff_make(grid_ant, grid_tpwt, region, grds=grds)
+    gmt_plot_diff(diff, grids, region, cpt, fig_name, eles)
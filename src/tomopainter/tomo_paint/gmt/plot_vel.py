@@ -1,8 +1,13 @@
 import pandas as pd
 import pygmt
 
+from tomopainter.rose import GridIndex
+from tomopainter.rose.hull import hull_mask_of
+from tomopainter.rose.points import hull_anomaly
+
 from .gmt_fig import fig_tomos
-from .gmt_make_data import area_clip, make_topos, makecpt, series, tomo_grid
+from .gmt_make_data import make_topos, makecpt, series, tomo_grid
+from .scratch import scratch_file
 
 
 def gmt_plot_vel(topo, grd, cptinfo, fname, eles):
@@ -37,12 +42,11 @@ def gmt_plot_vel(topo, grd, cptinfo, fname, eles):
     fig.savefig(str(fname))
 
 
-def plot_vel(grid, region, fig_name, eles, cptconfig) -> None:
+def plot_vel(grid, region, fig_name, eles, cptconfig, scratch=None) -> None:
     # sourcery skip: default-mutable-arg
     # position of stations
-    # make vel grid and get vel grid generated by `surface`
-    vel_grd = "temp/vel_tpwt.grd"
-    tomo_grid(grid, region, vel_grd)
+    # make vel grid, kept in `scratch` only if given
+    vel_grd = tomo_grid(grid, region, scratch_file(scratch, "vel.grd"))
 
     # cpt file
     cptinfo = {"series": series(grid, method=1)}
@@ -57,17 +61,20 @@ def plot_vel(grid, region, fig_name, eles, cptconfig) -> None:
     gmt_plot_vel(topo, vel_grd, cptinfo, fig_name, eles)
 
 
-def plot_as(velf, stdf, region, fn, eles) -> None:
-    grd = pd.read_csv(
-        velf, delim_whitespace=True, names=["x", "y", "z"], header=None
-    )
-    grd_clip = area_clip(grd)
-    mm = grd_clip["z"].mean()
-    grd["z"] = (grd["z"] - mm) / mm * 100
-    vel_grd = "temp/temp_vel.grd"
-    tomo_grid(grd, region, vel_grd)
-    std_grd = "temp/temp_std.grd"
-    tomo_grid(stdf, region, std_grd)
+def plot_as(velf, stdf, region, fn, eles, scratch=None) -> None:
+    """`velf` and `stdf` are xyz files or DataFrames"""
+    if isinstance(velf, pd.DataFrame):
+        grd = velf[["x", "y", "z"]].copy()
+    else:
+        grd = pd.read_csv(
+            velf, delim_whitespace=True, names=["x", "y", "z"], header=None
+        )
+    # the same reference mean as `DataQueryer.query(.., ave=True)`
+    gidx = GridIndex.from_xy(grd["x"], grd["y"])
+    mask = hull_mask_of(gidx.region, gidx.spacing)
+    grd["z"] = hull_anomaly(grd["z"], mask.inside(grd["x"], grd["y"]))
+    vel_grd = tomo_grid(grd, region, scratch_file(scratch, "vel.grd"))
+    std_grd = tomo_grid(stdf, region, scratch_file(scratch, "std.grd"))
     # gmt plot
     gmt_plot_as(region, vel_grd, std_grd, fn, eles)
 
@@ -75,7 +82,6 @@ def plot_as(velf, stdf, region, fn, eles) -> None:
 def gmt_plot_as(region, vel, std, fn, eles):
     per = fn.stem.split("_")[-1]
     topo = make_topos("ETOPO1", region)
-    cpt = "temp/temp.cpt"
     fig = pygmt.Figure()
     pygmt.config(
         MAP_FRAME_TYPE="plain",
@@ -90,7 +96,7 @@ def gmt_plot_as(region, vel, std, fn, eles):
         kws = {"projection": "M?"}
         kws |= eles
         with fig.set_panel(panel=0):
-            makecpt([-2.5, 2.5], cpt, cmap="jet", reverse=True)
+            cpt = makecpt([-2.5, 2.5], cmap="jet", reverse=True)
             tomos = [{"grid": vel, "cmap": cpt}]
             fig = fig_tomos(fig, topo, tomos, **kws)
             fig.text(
@@ -106,7 +112,7 @@ def gmt_plot_as(region, vel, std, fn, eles):
                 frame=["a1f1", 'x+l"TPWT Phase velocity anomaly"', "y+l%"]
             )
         with fig.set_panel(panel=1):
-            makecpt([0, 121], cpt, cmap="hot", reverse=True)
+            cpt = makecpt([0, 121], cmap="hot", reverse=True)
             tomos = [{"grid": std, "cmap": cpt}]
             kws["clip"] = False
             fig = fig_tomos(fig, topo, tomos, **kws)
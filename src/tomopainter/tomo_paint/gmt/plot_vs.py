@@ -7,12 +7,13 @@ import pygmt
 
 from .gmt_fig import fig_tomos
 from .gmt_make_data import make_topos, makecpt, series, tomo_grid
-from .panel import vpanel_clip_data, vpanel_makecpt
+from .panel import vpanel_layers, vpanel_makecpt
+from .scratch import scratch_file
 
 
 # plot v plane
 def plot_vs_vpanel(
-    vs, *, idt, moho, line, path, hregion, dep, fname, lab, ave
+    vs, *, idt, moho, line, path, hregion, dep, fname, lab, ave, scratch=None
 ):
     """
     gmt plot vplane of vs contain abso and ave.
@@ -26,25 +27,25 @@ def plot_vs_vpanel(
     borders = _profile_borders(path, topo_data, moho, lab, idt)
 
     # make cpt files
-    cpts = [f"temp/{c}" for c in ["crust.cpt", "lithos.cpt", "Vave.cpt"]]
-    vpanel_makecpt(dep, *cpts)
+    cpts = vpanel_makecpt(dep)
 
-    # vs grid
+    # vs grid, kept in `scratch` only if given
     grid = vs[[idt, "z", "v"]]
     grid.columns = ["x", "y", "z"]
-    vs_grd = "temp/temp.grd"
-    tomo_grid(grid, lregion, vs_grd, blockmean=[0.5, 1])
+    vs_grd = tomo_grid(
+        grid, lregion, scratch_file(scratch, "vs.grd"), blockmean=[0.5, 1]
+    )
     tomos = [{"grid": vs_grd, "cmap": cpts[-1]}]
     suffix = "_ave"
     title = f"ave Sv({idt})"
     if not ave:
-        ic("Clipping moho from vs.grd...")
-        # cut tomo_moho from vs_grd
-        data = vpanel_clip_data(vs_grd, borders[1], lregion)
+        ic("Splitting vs.grd by moho...")
+        # crust above and mantle below moho
+        crust, mantle = vpanel_layers(vs_grd, borders[1:2])
         # notice the order of grdimage: 1-lithos, 2-crust
         tomos = [
-            {"grid": vs_grd, "cmap": cpts[1]},
-            {"grid": data, "cmap": cpts[0]},
+            {"grid": mantle, "cmap": cpts[1]},
+            {"grid": crust, "cmap": cpts[0]},
         ]
         ic("Distincted crust data!")
         suffix = "_vel"
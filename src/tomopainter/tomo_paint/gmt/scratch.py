@@ -0,0 +1,47 @@
+"""
+scratch workspace of a plotting task.
+grids stay in memory unless a task asks to keep them in a scratch,
+a unique directory under `temp/scratch`, so figures rendered at once
+never overwrite each other's files.
+"""
+from pathlib import Path
+import shutil
+import tempfile
+
+
+class Scratch:
+    """
+    unique temporary directory removed when the task succeeds,
+    and kept for debugging when it fails.
+    """
+
+    def __init__(self, prefix="task", root="temp/scratch") -> None:
+        self.prefix = prefix
+        self.root = Path(root)
+        self.path: None | Path = None
+
+    def __enter__(self) -> "Scratch":
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=f"{self.prefix}_", dir=self.root)
+        self.path = Path(tmp)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.cleanup()
+
+    def file(self, name) -> str:
+        """path of `name` in the workspace"""
+        if self.path is None:
+            raise ValueError("Scratch is used outside of its `with` block.")
+        return str(self.path / name)
+
+    def cleanup(self) -> None:
+        if self.path is not None:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path = None
+
+
+def scratch_file(scratch, name) -> None | str:
+    """path of `name` in `scratch`, or None to keep it in memory"""
+    return None if scratch is None else scratch.file(name)
@@ -0,0 +1,156 @@
+"""
+cache of topography crops and their gradients for `make_topos`.
+a crop is keyed by its source, region, spacing, azimuth and
+normalization, and a crop inside a cached one is sliced out of it.
+gradients are made by `grdgradient` on each crop, as the
+normalization of "t" and "e" depends on the whole grid.
+
+temp/topos/
+    <key>.grd       # topography sampled at spacing
+    <key>.gradient  # hillshade by grdgradient
+    <key>.json      # index entry, written last
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+import threading
+
+import pygmt
+import xarray as xr
+
+# params of crops matching each other besides region
+PARAMS = ["source", "spacing", "azimuth", "normalize"]
+
+
+class TopoCache:
+    """crops of topography on disk, indexed by their json entries"""
+
+    def __init__(self, cdir="temp/topos") -> None:
+        self.cdir = Path(cdir)
+
+    def get(
+        self, data, region, spacing=0.01, azimuth=45, normalize="t"
+    ) -> tuple[Path, Path]:
+        """(grd, gradient) of `data` in `region`"""
+        entry = {
+            "source": source_id(data),
+            "region": [round(float(r), 6) for r in region],
+            "spacing": spacing,
+            "azimuth": azimuth,
+            "normalize": normalize,
+        }
+        key = hashlib.sha1(json.dumps(entry).encode()).hexdigest()
+        grd, gra = self._files(key)
+        if not (self.cdir / f"{key}.json").exists():
+            self.cdir.mkdir(parents=True, exist_ok=True)
+            if (parent := self._covering(entry)) is not None:
+                self._slice(parent, entry["region"], key)
+                entry["parent"] = parent["key"]
+            else:
+                self._make(data, entry, key)
+            self._write_entry(key, entry)
+        return grd, gra
+
+    def crops(self) -> list[dict]:
+        """index of cached crops"""
+        entries = []
+        for fpath in sorted(self.cdir.glob("*.json")):
+            with open(fpath, encoding="utf-8") as f:
+                entries.append(json.load(f) | {"key": fpath.stem})
+        return entries
+
+    def _covering(self, entry) -> None | dict:
+        # the smallest crop of the same params containing the region
+        x1, x2, y1, y2 = entry["region"]
+        covers = [
+            crop
+            for crop in self.crops()
+            if all(crop[p] == entry[p] for p in PARAMS)
+            and "parent" not in crop
+            and crop["region"][0] <= x1
+            and crop["region"][1] >= x2
+            and crop["region"][2] <= y1
+            and crop["region"][3] >= y2
+        ]
+        if not covers:
+            return None
+        return min(covers, key=lambda c: _area(c["region"]))
+
+    def _slice(self, parent, region, key) -> None:
+        x1, x2, y1, y2 = region
+        grd, gra = self._files(key)
+        sample = _tmp(grd, "sample")
+        with xr.open_dataarray(
+            self._files(parent["key"])[0], engine="netcdf4"
+        ) as da:
+            ydim, xdim = da.dims
+            tol = parent["spacing"] / 2
+            sub = da.sel(
+                {
+                    xdim: slice(x1 - tol, x2 + tol),
+                    ydim: slice(y1 - tol, y2 + tol),
+                }
+            )
+            sub.load().to_netcdf(sample)
+        self._gradient(sample, grd, gra, parent)
+
+    def _make(self, data, entry, key) -> None:
+        grd, gra = self._files(key)
+        cut, sample = _tmp(grd, "cut"), _tmp(grd, "sample")
+        # grdcut
+        pygmt.grdcut(grid=data, region=entry["region"], outgrid=cut)
+        # grdsample
+        pygmt.grdsample(
+            grid=cut,
+            outgrid=sample,
+            region=entry["region"],
+            spacing=entry["spacing"],
+        )
+        os.remove(cut)
+        self._gradient(sample, grd, gra, entry)
+
+    def _gradient(self, sample, grd, gra, entry) -> None:
+        gradient = _tmp(gra, "gradient")
+        # grdgradient
+        pygmt.grdgradient(
+            grid=sample,
+            outgrid=gradient,
+            azimuth=entry["azimuth"],
+            normalize=entry["normalize"],
+            verbose="w",
+        )
+        os.replace(sample, grd)
+        os.replace(gradient, gra)
+
+    def _write_entry(self, key, entry) -> None:
+        fpath = self.cdir / f"{key}.json"
+        tmp = fpath.with_name(f"{key}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, fpath)
+
+    def _files(self, key) -> tuple[Path, Path]:
+        return self.cdir / f"{key}.grd", self.cdir / f"{key}.gradient"
+
+
+def source_id(data) -> str:
+    """name of a remote dataset, or path with size and mtime of a file"""
+    if str(data).startswith("@"):
+        return str(data)
+    stat = Path(data).stat()
+    return f"{Path(data).resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _tmp(fpath: Path, tag) -> str:
+    # unique per thread, keeping the suffix for gmt
+    ident = f"{os.getpid()}.{threading.get_ident()}"
+    return str(fpath.with_name(f"{fpath.stem}.{ident}.{tag}.nc"))
+
+
+def _area(region) -> float:
+    return (region[1] - region[0]) * (region[3] - region[2])
+
+
+# cache shared by calls of `make_topos`
+TOPO_CACHE = TopoCache()
@@ -23,10 +23,11 @@ class TomoPainter:
         self.painters = dict(zip(cates, painters))
         self.idts = dict(zip(cates, [p.idts for p in painters]))
 
-    def plot(self, idt, **kwargs):
+    def plot(self, idt, jobs=1, **kwargs):
+        """paint `idt` figures, by `jobs` processes if the painter can"""
         for cate, idts in self.idts.items():
             if idt in idts:
-                self.painters[cate].paint(idt, kwargs)
+                self.painters[cate].paint(idt, kwargs | {"jobs": jobs})
                 return
         raise ArgumentError(f"{idt} is not a valid argument")
 
@@ -1,17 +1,43 @@
+from concurrent.futures import as_completed, ProcessPoolExecutor
+from contextlib import nullcontext
+from ctypes import ArgumentError
 import json
+from pathlib import Path
+import time
+import traceback
+from typing import NamedTuple
 
 from tqdm import tqdm
 
-from .gmt import plot_as, plot_diff, plot_vel
+from .gmt import plot_as, plot_diff, plot_vel, Scratch
+
+
+class PhaseTask(NamedTuple):
+    """one phase figure of a period"""
+
+    idt: str
+    method: str
+    period: int
+    fname: str
+    col: str = "vel"
+    cptcf: None | dict = None
+    # keep grids in a scratch of the task instead of memory
+    scratch: bool = False
 
 
 class PhasePainter:
+    """
+    phase figures of periods queried from the database,
+    rendered in memory by a pool of `jobs` processes.
+    """
+
     def __init__(self, queryer, region) -> None:
         from tomopainter.rose import GridPhv
 
         cptcf = {"cmap": "jet", "reverse": True}
         # cptcf = {"cpt": "Vc_1.8s.cpt"}
         ps_file = "data/txt/periods_series_jet.json"
+        self.queryer = queryer
         self.region = region
         with open(ps_file) as f:
             per_se_pairs = json.load(f)
@@ -22,6 +48,156 @@ class PhasePainter:
         self.cptcf = cptcf
         self.idts = ["vel", "std", "cb", "diff"]
 
+    def paint(self, idt, prs: dict) -> dict[int, str]:
+        """
+        paint `idt` figures of `prs["periods"]` or all periods,
+        with `prs["jobs"]` processes (1 renders in this process).
+        grids are in memory, or in a `Scratch` per figure if
+        `prs["scratch"]`, kept there if the figure fails.
+        return failures by period.
+        """
+        tasks = self.tasks(idt, prs)
+        eles = prs.get("eles") or {}
+        jobs = prs.get("jobs") or 1
+        start = time.perf_counter()
+        results = []
+        if jobs <= 1:
+            for task in tqdm(tasks):
+                results.append(
+                    render_phase(self.queryer, self.region, eles, task)
+                )
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                # workers reopen the database read-only by its handle
+                handle = self.queryer.handle()
+                futures = [
+                    pool.submit(render_phase, handle, self.region, eles, task)
+                    for task in tasks
+                ]
+                for future in tqdm(as_completed(futures), total=len(tasks)):
+                    results.append(future.result())
+        wall = time.perf_counter() - start
+        return _summary(idt, results, wall, jobs)
+
+    def tasks(self, idt, prs: dict) -> list[PhaseTask]:
+        """figures of periods having data"""
+        if idt not in self.idts:
+            raise ArgumentError(f"{idt} is not one of {self.idts}.")
+        method = prs.get("method") or "tpwt"
+        if idt in ["std", "diff"]:
+            # std of tpwt only, and diff of ant and tpwt
+            method = "tpwt"
+        pers = set(self.queryer.periods.get(method) or [])
+        if idt == "diff":
+            pers &= set(self.queryer.periods.get("ant") or [])
+        if (periods := prs.get("periods")) is not None:
+            pers &= set(periods)
+        col = "vel"
+        if idt == "cb":
+            col = _dcheck_col(self.queryer, prs.get("dcheck") or 2.0)
+        tasks = []
+        # names are made here, as `GridPhv` makes dirs of figures
+        for gp in self.gps:
+            if gp.period not in pers:
+                continue
+            if idt == "diff":
+                fname = gp.diff_name()
+            else:
+                fidt = {"std": "as"}.get(idt, idt)
+                fname = gp.fig_name(method, fidt)
+            cptcf = self.cptcf
+            if idt == "vel":
+                cptcf = {"series": gp.series} | self.cptcf
+            tasks.append(
+                PhaseTask(
+                    idt,
+                    method,
+                    gp.period,
+                    str(fname),
+                    col,
+                    cptcf,
+                    bool(prs.get("scratch")),
+                )
+            )
+        return tasks
+
+
+def render_phase(queryer, region, eles, task: PhaseTask) -> tuple:
+    """
+    render one figure by a queryer or the handle of one in workers,
+    return (task, seconds, error) with error None if it succeeded.
+    """
+    from tomopainter.rose.query import QueryerHandle, open_queryer
+
+    start = time.perf_counter()
+    try:
+        if isinstance(queryer, QueryerHandle):
+            queryer = open_queryer(queryer)
+        _render(queryer, region, eles, task)
+    except Exception:
+        return task, time.perf_counter() - start, traceback.format_exc()
+    return task, time.perf_counter() - start, None
+
+
+def _render(queryer, region, eles, task: PhaseTask) -> None:
+    workspace = nullcontext()
+    if task.scratch:
+        workspace = Scratch(prefix=f"{task.idt}_{task.period}")
+    with workspace as scratch:
+        _plot(queryer, region, eles, task, scratch)
+
+
+def _plot(queryer, region, eles, task: PhaseTask, scratch) -> None:
+    fname = Path(task.fname)
+    filters = {"method": task.method, "period": task.period}
+    if task.idt == "diff":
+        grids = [
+            queryer.query_grid(
+                "phase", "vel", filters=filters | {"method": method}
+            )
+            for method in ["tpwt", "ant"]
+        ]
+        plot_diff(*grids, region, fname, eles, scratch)
+        return
+    vel = _xyz(queryer.phase(task.method, task.period, task.col))
+    if task.idt == "std":
+        std = _xyz(queryer.phase(task.method, task.period, "std"))
+        plot_as(vel, std, region, fname, eles, scratch)
+    else:
+        plot_vel(vel, region, fname, eles, task.cptcf, scratch)
+
+
+def _dcheck_col(queryer, dcheck) -> str:
+    # columns are named by dirs like `dcheck_2.0` or `dcheck1.5`
+    for col in queryer.catalog["dchecks"]:
+        if float(col.removeprefix("dcheck").lstrip("_")) == float(dcheck):
+            return col
+    raise ArgumentError(f"No checkerboard of dcheck {dcheck}.")
+
+
+def _xyz(df):
+    # (x, y, col) as xyz of gmt
+    df = df.dropna()
+    df.columns = ["x", "y", "z"]
+    return df
+
+
+def _summary(idt, results, wall, jobs) -> dict[int, str]:
+    failures = {
+        task.period: error for task, _, error in results if error is not None
+    }
+    busy = sum(seconds for _, seconds, _ in results)
+    print(
+        f"{idt}: {len(results) - len(failures)}/{len(results)} figures "
+        f"in {wall:.1f}s with {jobs} jobs ({busy:.1f}s of rendering)"
+    )
+    if results:
+        task, seconds, _ = max(results, key=lambda r: r[1])
+        print(f"  slowest: period {task.period} in {seconds:.1f}s")
+    for period, error in sorted(failures.items()):
+        print(f"  period {period} failed:\n{error}")
+    return failures
+
 
 class OldPhasePainter:
     def __init__(self, queryer, region) -> None:
@@ -17,10 +17,10 @@ class SwavePainter:
 
     def paint(self, idt, prs: dict):
         method = prs["method"]
-        vs_df = self.queryer.query("swave", usecols=["depth", f"{method}_vs"])
         mohoby = {"rj": "rf_moho", "mc": "mc_moho"}
         ml_df = self.queryer.query("model", usecols=[mohoby[method], "lab"])
-        gv = GridVs(method, self.hregion, vs_df, ml_df)
+        # vs is streamed from the queryer one depth a time
+        gv = GridVs(method, self.hregion, self.queryer, ml_df)
         self.idts[idt](gv, prs.get("depths"), prs.get("ave"))
 
     def paint_depths(self, gv: GridVs, depths, ave):
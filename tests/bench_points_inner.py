@@ -0,0 +1,80 @@
+"""
+benchmark `points_inner` against the former per-row shapely version
+on a profile grid clipped by a moho-like border, as `vpanel_clip_data`.
+
+python tests/bench_points_inner.py -l 200 -d 0.1 > bench_output.txt
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import ConvexHull
+from shapely.geometry import Point, Polygon
+
+from tomopainter.rose.points import points_inner
+
+
+def points_inner_apply(data, border):
+    """former version, one shapely point per row"""
+    points = border[["x", "y"]].values
+    hull = ConvexHull(points)
+    polygon = Polygon(points[hull.vertices])
+    ids = data.apply(lambda r: Point(r["x"], r["y"]).within(polygon), axis=1)
+
+    return data[ids]
+
+
+def profile_case(length, spacing, depth=200, seed=0):
+    """xyz of a profile grid and a closed border below the moho"""
+    rng = np.random.default_rng(seed)
+    xs = np.arange(0, length + spacing / 2, spacing)
+    ys = np.arange(-depth, 0 + spacing / 2, spacing)
+    xx, yy = np.meshgrid(xs, ys)
+    data = pd.DataFrame(
+        {"x": xx.ravel(), "y": yy.ravel(), "z": rng.random(xx.size)}
+    )
+    bx = np.linspace(0, length, 50)
+    moho = -35 - 10 * np.sin(bx / length * np.pi) + rng.normal(0, 1, 50)
+    border = pd.concat(
+        [
+            pd.DataFrame({"x": [0], "y": [0]}),
+            pd.DataFrame({"x": bx, "y": moho}),
+            pd.DataFrame({"x": [length], "y": [0]}),
+        ],
+        ignore_index=True,
+    )
+    # rows around the border as `vpanel_clip_data`
+    around = data[(data["y"] > moho.min()) & (data["y"] < 0)]
+    return around, border
+
+
+def bench(func, data, border, repeat) -> tuple[float, pd.DataFrame]:
+    costs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        inner = func(data, border)
+        costs.append(time.perf_counter() - start)
+    return min(costs), inner
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-l", "--length", type=float, default=200)
+    parser.add_argument("-d", "--spacing", type=float, default=0.1)
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data, border = profile_case(args.length, args.spacing)
+    print(f"# {len(data)} points, {len(border)} border points")
+    cost_new, new = bench(points_inner, data, border, args.repeat)
+    cost_old, old = bench(points_inner_apply, data, border, 1)
+    print(f"## per-row apply: {cost_old * 1000:.2f} ms")
+    print(f"## vectorised: best {cost_new * 1000:.2f} ms")
+    print(f"## speedup: {cost_old / cost_new:.1f}x")
+    if not new.index.equals(old.index):
+        raise ValueError("Vectorised points_inner differs from apply.")
+
+
+if __name__ == "__main__":
+    main()
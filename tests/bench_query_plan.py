@@ -0,0 +1,166 @@
+"""
+benchmark query shapes of painters on `grids.db`:
+record `EXPLAIN QUERY PLAN` and latency with and without indexes.
+
+python tests/bench_query_plan.py data/grids.db > bench_output.txt
+"""
+import argparse
+from pathlib import Path
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from tomopainter.rose import between
+from tomopainter.rose.filters import compile_filters
+from tomopainter.rose.query import (
+    _conn_create_indexes,
+    _select_distinct,
+    query_sql,
+)
+
+# chunk of grid ids read by `DataQueryer.iter_query`
+GRID_CHUNK = 4096
+
+
+def bound_shape(conn, table, usecols, filters=None, ave=False) -> tuple:
+    """sql and parameters of `DataQueryer.query` with bound `filters`"""
+    columns = [r[1] for r in conn.execute(f"PRAGMA table_info({table});")]
+    grid_cols = [r[1] for r in conn.execute("PRAGMA table_info(grid);")]
+    shape, params = compile_filters(filters or {}, columns)
+    sql_cmd = query_sql(
+        table,
+        usecols=usecols,
+        shape=shape,
+        avecols=usecols[-1:] if ave else None,
+        hull="inside_hull" in grid_cols,
+    )
+    return sql_cmd, params
+
+
+def query_shapes(conn) -> dict[str, tuple[str, list]]:
+    """sql commands and parameters of query shapes used by painters"""
+    cursor = conn.cursor()
+    shapes = {}
+    for method in ["ant", "tpwt"]:
+        periods = _select_distinct(
+            cursor, "phase", "period", "method=?", (method,)
+        )
+        if not periods:
+            continue
+        period = periods[len(periods) // 2]
+        # `phase` and its anomalies
+        filters = {"method": method, "period": period}
+        shapes[f"phase {method} {period}"] = bound_shape(
+            conn, "phase", ["vel"], filters
+        )
+        shapes[f"phase {method} {period} ave"] = bound_shape(
+            conn, "phase", ["vel"], filters, ave=True
+        )
+        # `phases` of some periods, anomalies windowed per period
+        some = periods[: max(2, len(periods) // 2)]
+        filters = {"method": method, "period": some}
+        shapes[f"phases {method} in {len(some)}"] = bound_shape(
+            conn, "phase", ["grid_id", "period", "vel"], filters
+        )
+        shapes[f"phases {method} ave"] = bound_shape(
+            conn, "phase", ["period", "vel"], {"method": method}, ave=True
+        )
+    depths = _select_distinct(cursor, "swave", "depth", "mc_vs IS NOT NULL")
+    if depths:
+        depth = depths[len(depths) // 2]
+        shapes[f"swave depth {depth}"] = bound_shape(
+            conn, "swave", ["mc_vs"], {"depth": depth}
+        )
+        shapes[f"swave depth {depth} ave"] = bound_shape(
+            conn, "swave", ["mc_vs"], {"depth": depth}, ave=True
+        )
+        low, high = depths[len(depths) // 4], depths[3 * len(depths) // 4]
+        shapes[f"swave depth between {low} {high}"] = bound_shape(
+            conn, "swave", ["depth", "mc_vs"], {"depth": between(low, high)}
+        )
+        shapes["swave cube ave"] = bound_shape(
+            conn, "swave", ["depth", "mc_vs"], ave=True
+        )
+    # ranges of grid nodes scanned by `iter_query(by="grid_id")`
+    ids = _select_distinct(cursor, "swave", "grid_id", "1")
+    for start in sorted({0, len(ids) // 2 // GRID_CHUNK * GRID_CHUNK}):
+        part = ids[start : start + GRID_CHUNK]
+        if part:
+            filters = {"grid_id": between(part[0], part[-1])}
+            shapes[f"swave grid_id {part[0]}-{part[-1]}"] = bound_shape(
+                conn, "swave", ["grid_id", "depth", "mc_vs"], filters
+            )
+    for method in ["rj", "mc"]:
+        shapes[f"swave {method}_vs"] = bound_shape(
+            conn, "swave", ["depth", f"{method}_vs"]
+        )
+    shapes["model rf_moho"] = bound_shape(conn, "model", ["rf_moho"])
+    shapes["model mc_moho lab"] = bound_shape(
+        conn, "model", ["mc_moho", "lab"]
+    )
+    # distinct scans of `DataQueryer._per_dep` and `iter_query`
+    shapes["distinct period"] = (
+        "SELECT DISTINCT period FROM phase WHERE method=?;",
+        ["tpwt"],
+    )
+    shapes["distinct depth"] = (
+        "SELECT DISTINCT depth FROM swave WHERE mc_vs IS NOT NULL;",
+        [],
+    )
+    shapes["distinct grid_id"] = (
+        "SELECT DISTINCT t.grid_id FROM grid g "
+        "JOIN swave t ON g.id = t.grid_id;",
+        [],
+    )
+    return shapes
+
+
+def bench(conn, shapes: dict[str, tuple[str, list]], repeat: int) -> None:
+    for name, (sql_cmd, params) in shapes.items():
+        plan = conn.execute(
+            f"EXPLAIN QUERY PLAN {sql_cmd}", params
+        ).fetchall()
+        costs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(sql_cmd, params).fetchall()
+            costs.append(time.perf_counter() - start)
+        print(f"## {name}: best {min(costs) * 1000:.2f} ms")
+        for row in plan:
+            print(f"    {row[-1]}")
+
+
+def drop_indexes(conn) -> None:
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='index' AND sql NOT NULL"
+    ).fetchall()
+    for (name,) in rows:
+        conn.execute(f"DROP INDEX {name};")
+    conn.execute("ANALYZE;")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("dbfile", nargs="?", default="data/grids.db")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    scripts = Path("src/sqlscripts")
+    with tempfile.TemporaryDirectory() as tmp:
+        # work on a copy so that the indexes of dbfile are kept
+        dbf = Path(tmp) / "grids.db"
+        shutil.copy(args.dbfile, dbf)
+        conn = sqlite3.connect(dbf)
+        shapes = query_shapes(conn)
+        print("# without indexes")
+        drop_indexes(conn)
+        bench(conn, shapes, args.repeat)
+        print("# with indexes")
+        _conn_create_indexes(conn, scripts)
+        bench(conn, shapes, args.repeat)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
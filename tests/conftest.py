@@ -0,0 +1,125 @@
+"""
+synthetic data tree and `grids.db` shared by tests.
+
+data/
+    tpwt/tpwt_{vel,std}_{20,25}.grid
+    tpwt/dcheck1.5/tpwt_dcheck1.5_20.grid
+    ant/ant_vel_{20,25}.grid
+    mc_vs.csv rj_vs.csv
+    mcmc_misfit_moho.csv
+"""
+from pathlib import Path
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tomopainter.rose import DataQueryer, GridIndex
+
+REGION = [115, 117, 28, 30]
+SPACING = 0.5
+SCRIPTS = Path(__file__).parents[1] / "src/sqlscripts"
+# tables of `grids.db` and the keys their rows are sorted by
+TABLE_KEYS = {
+    "grid": ["id"],
+    "phase": ["method", "period", "grid_id"],
+    "swave": ["grid_id", "depth"],
+    "model": ["grid_id"],
+}
+
+
+def write_data_tree(data: Path, seed=0) -> None:
+    """source files of all tables, with nodes and depths missing"""
+    rng = np.random.default_rng(seed)
+    gdf = GridIndex(REGION, SPACING).grid_df()
+    for method, idt, period in [
+        ("tpwt", "vel", 20),
+        ("tpwt", "vel", 25),
+        ("tpwt", "std", 20),
+        ("tpwt", "std", 25),
+        ("tpwt", "dcheck1.5", 20),
+        ("ant", "vel", 20),
+        ("ant", "vel", 25),
+    ]:
+        gdir = data / method
+        if idt.startswith("dcheck"):
+            gdir = gdir / idt
+        gdir.mkdir(parents=True, exist_ok=True)
+        df = gdf[["x", "y"]].copy()
+        df["z"] = 3 + period / 100 + rng.normal(0, 0.1, len(df))
+        df = df.sample(frac=0.8, random_state=seed + period)
+        df.to_csv(
+            gdir / f"{method}_{idt}_{period}.grid",
+            sep=" ",
+            header=False,
+            index=False,
+        )
+    for method in ["mc", "rj"]:
+        vs_df(gdf, rng).to_csv(data / f"{method}_vs.csv", index=False)
+    model = gdf[["x", "y"]].copy()
+    model["mc_misfit"] = rng.random(len(model))
+    model["mc_moho"] = rng.normal(32, 2, len(model))
+    model.to_csv(data / "mcmc_misfit_moho.csv", index=False)
+
+
+def vs_df(gdf, rng) -> pd.DataFrame:
+    """vs (x, y, depth, velocity) decreasing below a random lab"""
+    depths = np.arange(0, 250, 10)
+    labs = rng.uniform(70, 160, len(gdf))
+    rows = []
+    for (x, y), lab in zip(gdf[["x", "y"]].values, labs):
+        vs = 3.2 + depths / 100 - 0.6 / (1 + np.exp(-(depths - lab) / 8))
+        vs += rng.normal(0, 0.01, len(depths))
+        rows.append(pd.DataFrame({"x": x, "y": y, "depth": -depths, "v": vs}))
+    df = pd.concat(rows, ignore_index=True)
+    df.columns = ["x", "y", "depth", "velocity"]
+    # missing depths of some nodes
+    return df.sample(frac=0.9, random_state=1).sort_index()
+
+
+def write_square_hull(root: Path, bbox) -> Path:
+    """hull file of `bbox` under `root`, its edges through grid nodes"""
+    xmin, xmax, ymin, ymax = bbox
+    hull = pd.DataFrame(
+        {"x": [xmin, xmax, xmax, xmin], "y": [ymin, ymin, ymax, ymax]}
+    )
+    hfile = root / "data/txt/area_hull.csv"
+    hfile.parent.mkdir(parents=True, exist_ok=True)
+    hull.to_csv(hfile, index=False)
+    return hfile
+
+
+def open_db(dbf, data=None, **kwargs) -> DataQueryer:
+    """queryer of `dbf`, (re)built from `data` if given"""
+    queryer = DataQueryer(dbf, **kwargs)
+    queryer.scripts = SCRIPTS
+    if data is not None:
+        queryer.init_database(data, REGION, SPACING)
+    return queryer
+
+
+def read_tables(dbf) -> dict[str, pd.DataFrame]:
+    """rows of tables sorted by their keys, columns sorted by name"""
+    tables = {}
+    with sqlite3.connect(dbf) as conn:
+        for table, keys in TABLE_KEYS.items():
+            df = pd.read_sql(f"SELECT * FROM {table}", conn)
+            df = df.sort_values(by=keys).reset_index(drop=True)
+            tables[table] = df[sorted(df.columns)]
+    return tables
+
+
+@pytest.fixture
+def data_tree(tmp_path, monkeypatch) -> Path:
+    # relative paths like the hull file are looked up in `tmp_path`
+    monkeypatch.chdir(tmp_path)
+    data = tmp_path / "data"
+    write_data_tree(data)
+    return data
+
+
+@pytest.fixture
+def queryer(tmp_path, data_tree):
+    with open_db(tmp_path / "grids.db", data_tree) as queryer:
+        yield queryer
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+import pytest
+
+from tomopainter.tomo_paint.gmt import cpt_registry
+from tomopainter.tomo_paint.gmt.cpt_registry import CptRegistry
+
+
+@pytest.fixture
+def made(monkeypatch) -> list[dict]:
+    """arguments of `pygmt.makecpt` calls, writing their output"""
+    calls = []
+
+    def makecpt(**kwargs):
+        calls.append(kwargs)
+        Path(kwargs["output"]).write_text(f"{kwargs['series']}\n")
+
+    monkeypatch.setattr(cpt_registry.pygmt, "makecpt", makecpt, raising=False)
+    return calls
+
+
+def test_key_without_series(tmp_path):
+    registry = CptRegistry(tmp_path)
+    key = registry.key("jet", None, False)
+    assert key == registry.key("jet", None, False)
+    assert key != registry.key("jet", [0, 1, 0.1], False)
+    assert registry.key("jet", [0, 1, 0.1], False) == registry.key(
+        "jet", (0.0, 1.0, 0.1), False
+    )
+
+
+def test_get_once_per_arguments(tmp_path, made):
+    registry = CptRegistry(tmp_path)
+    path = registry.get("jet", None)
+    assert registry.get("jet", None) == path and Path(path).exists()
+    assert made[0]["series"] is None
+    other = registry.get("jet", [2.5, 5.5, 0.1], reverse=True)
+    assert other != path and len(made) == 2
+    # a new registry finds files made by others
+    assert CptRegistry(tmp_path).get("jet", None) == path
+    assert len(made) == 2
@@ -0,0 +1,81 @@
+import netCDF4
+import numpy as np
+import pandas as pd
+import pytest
+
+from tomopainter.rose.lab import calc_lab
+
+
+@pytest.fixture
+def cube(queryer):
+    cube = queryer.vs_cube()
+    yield cube
+    cube.close()
+
+
+def _swave(queryer, depth) -> pd.DataFrame:
+    return queryer.query("swave", usecols=["mc_vs"], filters={"depth": depth})
+
+
+def test_chunks_of_one_depth(cube):
+    with netCDF4.Dataset(cube.cfile) as ds:
+        assert ds["mc_vs"].chunking()[0] == 1
+
+
+def test_cube_kept_until_written(queryer, cube):
+    assert cube.stamp == queryer.stamp()
+    mtime = cube.cfile.stat().st_mtime_ns
+    queryer.vs_cube().close()
+    assert cube.cfile.stat().st_mtime_ns == mtime
+    with queryer.conn:
+        queryer.conn.execute("UPDATE swave SET mc_vs = mc_vs + 1;")
+    rebuilt = queryer.vs_cube()
+    assert rebuilt.stamp == queryer.stamp() != cube.stamp
+    rebuilt.close()
+
+
+def test_depth_slice_equals_query(queryer, cube):
+    gidx = queryer.grid_index()
+    for depth in queryer.depths["mc"]:
+        df = _swave(queryer, depth)
+        expected = gidx.dataarray(df["x"], df["y"], df["mc_vs"])
+        grid = cube.depth_slice("mc", depth)
+        assert np.allclose(grid, expected, equal_nan=True)
+
+
+def test_profile_interpolates_nodes(queryer, cube):
+    depth = 100
+    df = _swave(queryer, depth)
+    # pairs of neighbouring nodes along x with vs at both
+    right = df.assign(x=df["x"] - 0.5).rename(columns={"mc_vs": "next"})
+    pairs = df.merge(right, on=["x", "y"]).head(10)
+    x = np.r_[pairs["x"], pairs["x"] + 0.25]
+    y = np.r_[pairs["y"], pairs["y"]]
+    expected = np.r_[pairs["mc_vs"], (pairs["mc_vs"] + pairs["next"]) / 2]
+    profile = cube.profile("mc", x, y, depths=[depth])
+    assert len(profile) == len(x) and (profile["z"] == -depth).all()
+    assert np.allclose(profile["v"], expected)
+    # points next to missing nodes are missing
+    missing = set(zip(*queryer.grid_index().grid_df()[["x", "y"]].values.T))
+    missing -= set(zip(df["x"], df["y"]))
+    mx, my = sorted(missing)[0]
+    off = cube.profile("mc", [mx, mx + 0.25], [my, my], depths=[depth])
+    assert off.empty
+
+
+def test_profile_ave_equals_query(queryer, cube):
+    depth = 60
+    df = queryer.query(
+        "swave", usecols=["mc_vs"], filters={"depth": depth}, ave=True
+    )
+    profile = cube.profile("mc", df["x"], df["y"], depths=[depth], ave=True)
+    assert np.allclose(profile["v"], df["mc_vs"], atol=1e-4)
+
+
+def test_pick_lab_equals_calc_lab(queryer):
+    df = queryer.query("swave", usecols=["depth", "mc_vs"])
+    df["id"] = queryer.grid_index().ids(df["x"], df["y"])
+    expected = calc_lab(df.rename(columns={"mc_vs": "vs"}))
+    lab = queryer.pick_lab()
+    assert len(lab) > 0
+    pd.testing.assert_frame_equal(lab, expected, check_dtype=False)
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from tests.conftest import REGION, SPACING, write_square_hull
+from tomopainter.rose import GridIndex
+from tomopainter.tomo_paint.gmt.gmt_make_data import (
+    area_clip,
+    grid_xyz,
+    series,
+)
+
+BBOX = [115.5, 116.5, 28.5, 29.0]
+
+
+@pytest.fixture
+def grid(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_square_hull(tmp_path, BBOX)
+    gdf = GridIndex(REGION, SPACING).grid_df()
+    rng = np.random.default_rng(0)
+    z = 3.5 + rng.normal(0, 0.1, len(gdf))
+    z[:3] = np.nan
+    return GridIndex(REGION, SPACING).dataarray(gdf["x"], gdf["y"], z)
+
+
+@pytest.mark.parametrize("method", [0, 1, 2])
+def test_series_of_grid(grid, method):
+    xyz = grid_xyz(grid)
+    inside = xyz["x"].between(*BBOX[:2]) & xyz["y"].between(*BBOX[2:])
+    assert series(grid, method) == series(xyz.dropna(), method)
+    if method == 0:
+        z = xyz.loc[inside, "z"]
+        assert series(grid, method) == [z.min(), z.max(), 0.01]
+
+
+def test_area_clip_of_descending_grid(grid):
+    xyz = area_clip(grid.isel(y=slice(None, None, -1)))
+    inside = grid_xyz(grid)
+    inside = inside[
+        inside["x"].between(*BBOX[:2]) & inside["y"].between(*BBOX[2:])
+    ]
+    key = ["x", "y"]
+    assert xyz.sort_values(key).reset_index(drop=True).equals(
+        inside.sort_values(key).reset_index(drop=True)
+    )
+
+
+def test_series_by_the_cached_mask(grid, monkeypatch):
+    from tomopainter.rose import hull
+
+    expected = series(grid, 1)
+    tested = []
+    hull_mask = hull.hull_mask
+    monkeypatch.setattr(
+        hull,
+        "hull_mask",
+        lambda x, y, h: tested.append(len(x)) or hull_mask(x, y, h),
+    )
+    assert series(grid, 1) == expected
+    assert series(grid_xyz(grid).dropna(), 1) == expected
+    assert tested == []
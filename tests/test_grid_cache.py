@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from tomopainter.tomo_paint.gmt.grid_cache import GridCache
+
+
+def _xyz(n, seed=0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.random((n, 3)), columns=["x", "y", "z"])
+
+
+def test_evict_keeps_files_being_written(tmp_path):
+    cache = GridCache(tmp_path, budget=1)
+    # a grid another process is still writing
+    writing = tmp_path / "abc.nc.123.tmp"
+    writing.write_bytes(b"\0" * 4096)
+    key = cache.key("xyz", _xyz(10), [0, 1, 0, 1], {"surface": 0.5})
+    cache.put(key, _xyz(10))
+    assert writing.exists()
+    # the entry beyond the budget is removed
+    assert not any(tmp_path.glob(f"{key}.*"))
+    assert cache.info()["entries"] == 0 and cache.info()["nbytes"] == 0
+
+
+def test_evict_least_recently_used(tmp_path):
+    cache = GridCache(tmp_path)
+    keys = [
+        cache.key("xyz", _xyz(100, i), [0, 1, 0, 1], {}) for i in range(3)
+    ]
+    for i, key in enumerate(keys):
+        cache.put(key, _xyz(100, i))
+    size = (tmp_path / f"{keys[0]}.npz").stat().st_size
+    pd.testing.assert_frame_equal(cache.get(keys[0]), _xyz(100, 0))
+    # the second entry is the least recently used
+    stamp = (tmp_path / f"{keys[1]}.npz").stat().st_mtime - 10
+    os.utime(tmp_path / f"{keys[1]}.npz", (stamp, stamp))
+    cache.budget = 2 * size
+    cache.evict()
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert cache.info()["entries"] == 2
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from tomopainter.rose.grid_index import GridIndex
+
+
+def test_grid_df_order():
+    region, spacing = [115, 122.5, 27.9, 34.3], 0.5
+    nodes = [
+        [x, y]
+        for x in np.arange(region[0], region[1] + spacing, spacing)
+        for y in np.arange(region[2], region[3] + spacing, spacing)
+    ]
+    gdf = GridIndex(region, spacing).grid_df()
+    assert np.array_equal(gdf[["x", "y"]].values, np.array(nodes))
+    assert np.array_equal(gdf["id"].values, np.arange(len(nodes)))
+
+
+def test_ids_with_rounding_noise():
+    gidx = GridIndex([115, 117, 28, 30], 0.5)
+    gdf = gidx.grid_df()
+    ids = gidx.ids(gdf["x"] + 1e-7, gdf["y"] - 1e-7)
+    assert np.array_equal(ids, gdf["id"].values)
+    # off the grid
+    assert list(gidx.ids([114.5, 115.25, 117.5], [28, 28, 28])) == [-1] * 3
+
+
+def test_align_like_merge():
+    gidx = GridIndex([115, 117, 28, 30], 0.5)
+    df = pd.DataFrame({"x": [116.0, 115.5], "y": [29.5, 28.0], "z": [1, 2]})
+    aligned = gidx.align(df)
+    merged = gidx.grid_df().merge(df, on=["x", "y"], how="left")
+    assert np.allclose(aligned["z"], merged["z"], equal_nan=True)
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from tests.conftest import write_square_hull
+from tomopainter.rose import hull as hull_module
+from tomopainter.rose.hull import (
+    grid_hull_mask,
+    hull_mask_of,
+    xyz_hull_mask,
+)
+from tomopainter.rose.points import hull_mask
+
+BBOX = [115.5, 116.5, 28.5, 29.0]
+
+
+@pytest.fixture
+def hull(tmp_path):
+    return write_square_hull(tmp_path, BBOX)
+
+
+def _grid(xs, ys, seed=0) -> xr.DataArray:
+    rng = np.random.default_rng(seed)
+    values = 3.5 + rng.normal(0, 0.1, (len(ys), len(xs)))
+    return xr.DataArray(values, coords={"y": ys, "x": xs}, dims=["y", "x"])
+
+
+def _expected(grid, hull) -> np.ndarray:
+    """mask of grid nodes tested one by one against the hull"""
+    # nodes off by rounding are the nodes, as `GridIndex` looks them up
+    xx, yy = np.meshgrid(grid["x"].values, grid["y"].values)
+    xx, yy = np.round(xx, 6), np.round(yy, 6)
+    return hull_mask(xx.ravel(), yy.ravel(), hull).reshape(xx.shape)
+
+
+GRIDS = {
+    "regular": (np.arange(115, 117.1, 0.5), np.arange(28, 30.1, 0.5)),
+    "descending": (np.arange(115, 117.1, 0.5), np.arange(30, 27.9, -0.5)),
+    # coordinates of accumulated steps, off the nodes by rounding
+    "rounded": (
+        np.cumsum(np.r_[115, [0.1] * 20]),
+        np.cumsum(np.r_[28, [0.1] * 20]),
+    ),
+    "irregular": (np.array([115, 115.4, 116.3, 117]), np.array([28, 29, 30])),
+}
+
+
+@pytest.mark.parametrize("case", GRIDS)
+def test_clip_and_mean_by_coordinates(hull, case):
+    grid = _grid(*GRIDS[case])
+    mask = grid_hull_mask(grid, hull)
+    expected = _expected(grid, hull)
+    assert expected.any() and not expected.all()
+    clipped = mask.clip(grid)
+    assert clipped.dims == grid.dims
+    assert np.array_equal(clipped["y"], grid["y"])
+    assert np.array_equal(np.isnan(clipped.values), ~expected)
+    assert np.allclose(clipped.values[expected], grid.values[expected])
+    assert np.isclose(mask.mean(grid), grid.values[expected].mean())
+
+
+def test_descending_equals_flipped(hull):
+    grid = _grid(*GRIDS["regular"])
+    flipped = grid.isel(y=slice(None, None, -1))
+    mask = grid_hull_mask(grid, hull)
+    assert mask is grid_hull_mask(flipped, hull)
+    assert np.isclose(mask.mean(flipped), mask.mean(grid))
+    xr.testing.assert_equal(
+        mask.clip(flipped), mask.clip(grid).isel(y=slice(None, None, -1))
+    )
+
+
+def test_arrays_on_nodes(hull):
+    mask = hull_mask_of([115, 117, 28, 30], 0.5, hull)
+    values = _grid(*GRIDS["regular"]).values
+    assert np.isclose(mask.mean(values), values[mask.mask].mean())
+    with pytest.raises(ValueError, match="not on nodes"):
+        mask.clip(values[::2])
+
+
+def test_xyz_by_the_mask_of_their_grid(hull, monkeypatch):
+    xyz = _grid(*GRIDS["rounded"]).to_dataframe("z").reset_index()
+    xyz = xyz.sample(frac=0.7, random_state=0)
+    expected = hull_mask(np.round(xyz["x"], 6), np.round(xyz["y"], 6), hull)
+    assert np.array_equal(xyz_hull_mask(xyz["x"], xyz["y"], hull), expected)
+    # nodes are looked up in the cached mask, not tested one by one
+    tested = []
+    monkeypatch.setattr(
+        hull_module,
+        "hull_mask",
+        lambda x, y, hull: tested.append(len(x)) or hull_mask(x, y, hull),
+    )
+    xyz_hull_mask(xyz["x"], xyz["y"], hull)
+    assert tested == []
+
+
+def test_xyz_scattered(hull):
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(115, 117, 50), rng.uniform(28, 30, 50)
+    assert np.array_equal(xyz_hull_mask(x, y, hull), hull_mask(x, y, hull))
+    assert xyz_hull_mask([116], [28.7], hull).tolist() == [True]
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tests.conftest import REGION, SPACING, open_db, read_tables
+
+
+def _perturb(data, name) -> None:
+    """change values of the last column of some rows of a source file"""
+    fpath = data / name
+    if fpath.suffix == ".grid":
+        df = pd.read_csv(fpath, sep=" ", header=None)
+    else:
+        df = pd.read_csv(fpath)
+    col = df.columns[-1]
+    df.loc[df.index[::3], col] *= 1.05
+    if fpath.suffix == ".grid":
+        df.to_csv(fpath, sep=" ", header=False, index=False)
+    else:
+        df.to_csv(fpath, index=False)
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "mc_vs.csv",
+        "rj_vs.csv",
+        "tpwt/tpwt_vel_20.grid",
+        "tpwt/dcheck1.5/tpwt_dcheck1.5_20.grid",
+        "mcmc_misfit_moho.csv",
+    ],
+)
+def test_incremental_equals_rebuild(tmp_path, data_tree, name):
+    dbf = tmp_path / "grids.db"
+    open_db(dbf, data_tree).close()
+    before = read_tables(dbf)
+    _perturb(data_tree, name)
+    with open_db(dbf) as queryer:
+        timings = queryer.init_database(
+            data_tree, queryer.catalog["region"], 0.5, incremental=True
+        )
+    # files of the touched group are read again, no others
+    assert str(data_tree / name) in set(timings["file"])
+    assert not timings["file"].str.contains("ant_").any()
+    open_db(tmp_path / "full.db", data_tree).close()
+    after, full = read_tables(dbf), read_tables(tmp_path / "full.db")
+    for table, df in full.items():
+        pd.testing.assert_frame_equal(after[table], df, check_dtype=False)
+    # the perturbation reached the database
+    assert any(not before[t].equals(after[t]) for t in before)
+
+
+def test_incremental_removed_source(tmp_path, data_tree):
+    dbf = tmp_path / "grids.db"
+    open_db(dbf, data_tree).close()
+    (data_tree / "rj_vs.csv").unlink()
+    (data_tree / "ant/ant_vel_25.grid").unlink()
+    with open_db(dbf) as queryer:
+        queryer.init_database(
+            data_tree, queryer.catalog["region"], 0.5, incremental=True
+        )
+        assert queryer.periods["ant"] == [20]
+        assert queryer.depths["rj"] == []
+    open_db(tmp_path / "full.db", data_tree).close()
+    after, full = read_tables(dbf), read_tables(tmp_path / "full.db")
+    for table, df in full.items():
+        pd.testing.assert_frame_equal(after[table], df, check_dtype=False)
+
+
+def test_incremental_repicks_lab(tmp_path, data_tree):
+    dbf = tmp_path / "grids.db"
+    open_db(dbf, data_tree).close()
+    lab = read_tables(dbf)["model"]["lab"].to_numpy()
+    vsf = data_tree / "mc_vs.csv"
+    vs = pd.read_csv(vsf)
+    # a sharp drop at 180 km of the first node only
+    first = (vs["x"] == vs["x"].iloc[0]) & (vs["y"] == vs["y"].iloc[0])
+    vs.loc[first & (vs["depth"] <= -180), "velocity"] -= 1
+    vs.to_csv(vsf, index=False)
+    with open_db(dbf) as queryer:
+        queryer.init_database(
+            data_tree, queryer.catalog["region"], 0.5, incremental=True
+        )
+    new_lab = read_tables(dbf)["model"]["lab"].to_numpy()
+    changed = np.flatnonzero(~np.isclose(lab, new_lab, equal_nan=True))
+    assert len(changed) == 1 and new_lab[changed[0]] in [170, 180]
+
+
+def test_workers_equal_serial(tmp_path, data_tree):
+    open_db(tmp_path / "serial.db", data_tree).close()
+    with open_db(tmp_path / "grids.db") as queryer:
+        timings = queryer.init_database(
+            data_tree, REGION, SPACING, workers=2
+        )
+    serial = read_tables(tmp_path / "serial.db")
+    for table, df in read_tables(tmp_path / "grids.db").items():
+        pd.testing.assert_frame_equal(df, serial[table], check_dtype=False)
+    # one timing row per source file
+    sources = [
+        f for f in data_tree.rglob("*") if f.suffix in [".grid", ".csv"]
+    ]
+    assert sorted(timings["file"]) == sorted(str(f) for f in sources)
+    assert (timings["rows"] > 0).all() and (timings["seconds"] >= 0).all()
+    assert timings["seconds"].is_monotonic_decreasing
@@ -0,0 +1,122 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from tomopainter.rose.lab import calc_lab
+
+LIMITS = [54, 200]
+
+
+def _vs(seed=0) -> pd.DataFrame:
+    """vs (id, depth, vs) of non-uniform depths with missing patterns"""
+    rng = np.random.default_rng(seed)
+    depths = np.r_[0:100:10, 100:250:5].astype(float)
+    rows = []
+    for node in range(60):
+        lab = rng.uniform(70, 180)
+        vs = 3.2 + depths / 100 - 0.5 / (1 + np.exp(-(depths - lab) / 6))
+        vs += rng.normal(0, 0.02, len(depths))
+        if node % 10 == 0:
+            # increasing vs without a lab
+            vs = 3.2 + depths / 100
+        keep = np.ones(len(depths), dtype=bool)
+        if node % 3 == 1:
+            # a few random depths missing
+            keep[rng.choice(len(depths), 6, replace=False)] = False
+        elif node % 3 == 2:
+            # a shared gap below 120 km
+            keep[(depths > 120) & (depths < 160)] = False
+        rows.append(
+            pd.DataFrame({"id": node, "depth": depths[keep], "vs": vs[keep]})
+        )
+    return pd.concat(rows, ignore_index=True)
+
+
+def _old_calc_lab(vs, limits=None):
+    # `calc_lab` of query.py before the vectorised picking, with its
+    # `dropna` assigned, as it raised on nodes without a lab
+    limits = limits or [54, 200]
+    df = vs[(vs["depth"] > limits[0]) & (vs["depth"] < limits[1])]
+    lab_df = df.groupby("id").apply(_max_nagative_gradient)
+    lab_df = lab_df.dropna().reset_index(drop=True)
+    lab_df["grid_id"] = lab_df["id"].apply(lambda i: int(i))
+    lab_df.rename(columns={"depth": "lab"}, inplace=True)
+    return lab_df[["grid_id", "lab"]]
+
+
+def _max_nagative_gradient(group):
+    group["gra"] = np.gradient(group["vs"], group["depth"])
+    max_idx = group["gra"].idxmin() if any(group["gra"] < 0) else None
+    return group.loc[max_idx, ["id", "depth"]] if max_idx is not None else None
+
+
+def _old_data_info_lab(vs, moho, limits):
+    # `data_info.calc_lab` before the vectorised picking
+    data = vs.merge(moho, on=["x", "y"], how="left")
+    df = data[(data["z"] < limits[0]) & (data["z"] > limits[1])]
+    dt = df.groupby(["x", "y"], group_keys=False).apply(_gradient)
+    result = (
+        dt.groupby(["x", "y"])
+        .apply(_target_gra)
+        .dropna()
+        .reset_index(drop=True)
+    )
+    result.rename(columns={"z": "lab"}, inplace=True)
+    return result
+
+
+def _gradient(group):
+    group["gra"] = np.gradient(group["v"], group["z"])
+    return group
+
+
+def _target_gra(group):
+    max_idx = group["gra"].idxmax() if any(group["gra"] < 0) else None
+    return (
+        group.loc[max_idx, ["x", "y", "moho", "z"]]
+        if max_idx is not None
+        else None
+    )
+
+
+def _old(func, *args) -> pd.DataFrame:
+    with warnings.catch_warnings():
+        # groupby apply of old pandas idioms
+        warnings.simplefilter("ignore")
+        return func(*args)
+
+
+def test_calc_lab_equals_groupby():
+    vs = _vs()
+    new = calc_lab(vs, LIMITS)
+    old = _old(_old_calc_lab, vs, LIMITS)
+    # nodes of increasing vs have no lab in both
+    assert not set(range(0, 60, 10)) & set(new["grid_id"])
+    pd.testing.assert_frame_equal(new, old, check_dtype=False)
+
+
+def test_data_info_lab(tmp_path):
+    from tomopainter.rose.data_info import calc_lab as info_lab
+
+    vs = _vs(seed=1)
+    xy = pd.DataFrame(
+        {"id": range(60), "x": np.arange(60) % 6, "y": np.arange(60) // 6}
+    )
+    vs = vs.merge(xy, on="id")
+    vs = pd.DataFrame(
+        {"x": vs["x"], "y": vs["y"], "z": -vs["depth"], "v": vs["vs"]}
+    )
+    moho = xy[["x", "y"]].assign(moho=30.0)
+    mlf = tmp_path / "moho_lab.csv"
+    info_lab(vs, moho, mlf, [-54, -200])
+    new = pd.read_csv(mlf).merge(xy, on=["x", "y"]).set_index("id")
+    old = _old(_old_data_info_lab, vs, moho, [-54, -200])
+    old = old.merge(xy, on=["x", "y"]).set_index("id")
+    # both pick the steepest decrease of vs with depth, but a lab is
+    # found now if vs decreases somewhere, not if it increases somewhere
+    both = new.index.intersection(old.index)
+    assert len(both) > 40
+    assert np.allclose(new.loc[both, "lab"], old.loc[both, "lab"])
+    # nodes of increasing vs only
+    assert set(range(0, 60, 10)) <= set(old.index) - set(new.index)
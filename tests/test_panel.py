@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from tomopainter.tomo_paint.gmt.panel import vpanel_layers
+
+
+def _profile() -> xr.DataArray:
+    """profile grid of depth y (negative) along abscissa x"""
+    xs = np.arange(0, 101, 5.0)
+    ys = np.arange(-200, 1, 5.0)
+    values = np.add.outer(-ys / 100, xs / 1000) + 3
+    return xr.DataArray(values, coords={"y": ys, "x": xs}, dims=["y", "x"])
+
+
+def _border(x, y) -> pd.DataFrame:
+    # unsorted like tracks of `grdtrack`
+    return pd.DataFrame({"x": x, "y": y}).iloc[::-1]
+
+
+def test_layers_between_borders():
+    grid = _profile()
+    # moho of x from 20 to 80 only, held at its ends beyond them
+    moho = _border([20, 50, 80], [-30, -45, -40])
+    lab = _border(np.arange(0, 101, 10), -100 - np.arange(0, 101, 10) / 2)
+    layers = vpanel_layers(grid, [moho, lab])
+    assert len(layers) == 3
+    xx, yy = np.meshgrid(grid["x"], grid["y"])
+    moho_y = np.interp(xx, [20, 50, 80], [-30, -45, -40])
+    lab_y = -100 - xx / 2
+    expected = [yy > moho_y, (yy <= moho_y) & (yy > lab_y), yy <= lab_y]
+    for layer, inside in zip(layers, expected):
+        assert inside.any()
+        assert np.array_equal(~np.isnan(layer.values), inside)
+        assert np.array_equal(layer.values[inside], grid.values[inside])
+    # every node is in exactly one layer
+    counts = sum((~np.isnan(layer.values)).astype(int) for layer in layers)
+    assert (counts == 1).all()
+    # ends beyond the moho take the depth of its end points
+    crust = layers[0]
+    assert crust.sel(x=0).notnull().sum() == (grid["y"] > -30).sum()
+    assert crust.sel(x=100).notnull().sum() == (grid["y"] > -40).sum()
+    # a node on a border is below it
+    assert np.isnan(crust.sel(x=20, y=-30)) and layers[1].sel(x=20, y=-30)
+
+
+def test_layers_of_grid_file(tmp_path):
+    grid = _profile()
+    grid.to_netcdf(tmp_path / "vs.grd")
+    moho = _border([0, 100], [-40, -40])
+    crust, mantle = vpanel_layers(str(tmp_path / "vs.grd"), [moho])
+    assert crust.dims == grid.dims
+    assert (crust["y"].where(crust.notnull()) > -40).sum() == crust.count()
+    assert int(mantle.count()) == grid.size - int(crust.count())
@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from tomopainter.tomo_paint import phase
+from tomopainter.tomo_paint.phase import PhasePainter
+
+
+@pytest.fixture
+def painter(tmp_path, queryer) -> PhasePainter:
+    (tmp_path / "data/txt").mkdir(parents=True)
+    series = {"20": [3.0, 3.4, 0.01], "25": [3.0, 3.5, 0.01]}
+    with open(tmp_path / "data/txt/periods_series_jet.json", "w") as f:
+        json.dump(series, f)
+    return PhasePainter(queryer, [115, 117, 28, 30])
+
+
+def _plot_vel(scratches, fail=()):
+    """`plot_vel` writing a grid into its scratch, failing on `fail`"""
+
+    def plot_vel(grid, region, fname, eles, cptcf, scratch=None):
+        scratches.append(scratch and Path(scratch.file("vel.grd")).parent)
+        if scratch is not None:
+            Path(scratch.file("vel.grd")).write_text("grid")
+        if any(f"_{period}." in str(fname) for period in fail):
+            raise ValueError(f"failed {fname}")
+
+    return plot_vel
+
+
+def test_render_in_memory(painter, monkeypatch):
+    scratches = []
+    monkeypatch.setattr(phase, "plot_vel", _plot_vel(scratches))
+    assert painter.paint("vel", {"method": "tpwt"}) == {}
+    assert scratches == [None, None]
+
+
+def test_render_in_scratch(painter, monkeypatch):
+    scratches = []
+    monkeypatch.setattr(phase, "plot_vel", _plot_vel(scratches, fail=[25]))
+    failures = painter.paint("vel", {"method": "tpwt", "scratch": True})
+    assert list(failures) == [25]
+    # one workspace per figure, kept only for the failed one
+    assert [s.name.split("_")[:2] for s in scratches] == [
+        ["vel", "20"],
+        ["vel", "25"],
+    ]
+    assert not scratches[0].exists()
+    assert (scratches[1] / "vel.grd").exists()
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import Point, Polygon
+
+from tomopainter.rose import inner_mask, points_inner
+from tomopainter.rose.data_info import vel_info_per
+
+# a convex hull with an inner point and vertices not in order
+BORDER = np.array(
+    [[0, 0], [4, 0.5], [5, 3], [2.5, 5], [2, 2], [-0.5, 3]], dtype=float
+)
+HULL = Polygon([[0, 0], [4, 0.5], [5, 3], [2.5, 5], [-0.5, 3]])
+
+
+def _within(x, y) -> np.ndarray:
+    return np.array([Point(xi, yi).within(HULL) for xi, yi in zip(x, y)])
+
+
+def test_random_points():
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(-1, 6, 2000), rng.uniform(-1, 6, 2000)
+    mask = inner_mask(x, y, BORDER)
+    assert 0 < mask.sum() < len(x)
+    assert (mask == _within(x, y)).all()
+
+
+def test_boundary_and_vertices():
+    vertices = np.asarray(HULL.exterior.coords)
+    # midpoints of the edges and points just in and out of them
+    mids = (vertices[:-1] + vertices[1:]) / 2
+    center = np.asarray(HULL.centroid.coords)[0]
+    near = np.r_[
+        mids + (center - mids) * 1e-6, mids - (center - mids) * 1e-6
+    ]
+    pts = np.r_[vertices, mids, near]
+    mask = inner_mask(pts[:, 0], pts[:, 1], BORDER)
+    assert not mask[: len(vertices) + len(mids)].any()
+    assert (mask == _within(pts[:, 0], pts[:, 1])).all()
+
+
+@pytest.mark.parametrize("kind", ["array", "series", "frame"])
+def test_inputs(kind):
+    x = np.array([1.0, 2.0, 6.0, 0.0, 2.5])
+    y = np.array([1.0, 3.0, 1.0, 0.0, 5.0])
+    expected = _within(x, y)
+    border = BORDER
+    if kind != "array":
+        x, y = pd.Series(x, index=np.arange(10, 15)), pd.Series(y)
+    if kind == "frame":
+        border = pd.DataFrame(BORDER, columns=["x", "y"])
+    mask = inner_mask(x, y, border)
+    assert mask.shape == (5,) and mask.dtype == bool
+    assert (mask == expected).all()
+
+
+def test_points_inner(tmp_path):
+    rng = np.random.default_rng(1)
+    data = pd.DataFrame(
+        {
+            "x": rng.uniform(-1, 6, 200),
+            "y": rng.uniform(-1, 6, 200),
+            "z": rng.normal(3.5, 0.1, 200),
+        }
+    )
+    inner = points_inner(data, BORDER)
+    pd.testing.assert_frame_equal(inner, data[_within(data["x"], data["y"])])
+    fpath = tmp_path / "vel.grid"
+    data.to_csv(fpath, sep=" ", header=False, index=False)
+    info = vel_info_per(fpath, BORDER)
+    assert np.isclose(info["vel_avg"], inner["z"].mean(), atol=1e-6)
+    assert np.isclose(info["vel_max"], inner["z"].max(), atol=1e-6)
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from tests.conftest import open_db
+from tomopainter.rose.qcache import QueryCache
+
+
+def _df(n, seed=0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"x": rng.random(n), "z": rng.random(n)})
+
+
+def _size(df) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def test_hits_and_misses():
+    cache = QueryCache()
+    assert cache.get(("a",)) is None
+    cache.put(("a",), _df(10))
+    pd.testing.assert_frame_equal(cache.get(("a",)), _df(10))
+    assert cache.get(("b",)) is None
+    assert cache.info() == {
+        "hits": 1,
+        "misses": 2,
+        "entries": 1,
+        "nbytes": _size(_df(10)),
+        "budget": cache.budget,
+    }
+
+
+def test_lru_eviction_within_budget():
+    size = _size(_df(100))
+    cache = QueryCache(budget=int(2.5 * size))
+    for key in ["a", "b"]:
+        cache.put((key,), _df(100))
+    # a is used after b, so b is the least recently used
+    cache.get(("a",))
+    cache.put(("c",), _df(100))
+    assert list(cache.entries) == [("a",), ("c",)]
+    assert cache.nbytes == 2 * size <= cache.budget
+    # putting a key again replaces its entry
+    cache.put(("a",), _df(50))
+    assert cache.nbytes == size + _size(_df(50))
+
+
+def test_oversize_frames_bypass():
+    cache = QueryCache(budget=_size(_df(10)))
+    cache.put(("small",), _df(10))
+    big = _df(1000)
+    assert cache.put(("big",), big) is big
+    assert list(cache.entries) == [("small",)]
+    assert cache.get(("big",)) is None
+
+
+def test_copies_cannot_corrupt():
+    cache = QueryCache()
+    df = _df(10)
+    returned = cache.put(("a",), df)
+    returned.loc[0, "z"] = -1
+    hit = cache.get(("a",))
+    hit.loc[1, "z"] = -1
+    hit["new"] = 0
+    pd.testing.assert_frame_equal(cache.get(("a",)), _df(10))
+
+
+def test_validate_by_stamp():
+    cache = QueryCache()
+    cache.validate((1, 10))
+    cache.put(("a",), _df(10))
+    cache.validate((1, 10))
+    assert cache.get(("a",)) is not None
+    cache.validate((2, 10))
+    assert cache.get(("a",)) is None and cache.nbytes == 0
+
+
+def test_queryer_cache(tmp_path, queryer, data_tree):
+    filters = {"method": "tpwt", "period": 20}
+    first = queryer.query("phase", usecols=["vel"], filters=filters)
+    first.loc[first.index[0], "vel"] = -1
+    again = queryer.query("phase", usecols=["vel"], filters=filters)
+    assert queryer.cache.hits == 1 and (again["vel"] > 0).all()
+    # a write to the database changes its stamp
+    with queryer.conn:
+        queryer.conn.execute("UPDATE phase SET vel = vel + 1;")
+    updated = queryer.query("phase", usecols=["vel"], filters=filters)
+    assert np.allclose(
+        updated["vel"].sort_values(), again["vel"].sort_values() + 1
+    )
+    assert queryer.cache.hits == 1
+    # as `init_database` does
+    queryer.init_database(data_tree, queryer.catalog["region"], 0.5)
+    assert queryer.cache.info()["entries"] == 0
+    rebuilt = queryer.query("phase", usecols=["vel"], filters=filters)
+    assert queryer.cache.hits == 1
+    pd.testing.assert_frame_equal(
+        rebuilt.sort_values(["x", "y"]).reset_index(drop=True),
+        again.sort_values(["x", "y"]).reset_index(drop=True),
+    )
+    with open_db(tmp_path / "grids.db", cache_budget=0) as uncached:
+        uncached.query("phase", usecols=["vel"], filters=filters)
+        uncached.query("phase", usecols=["vel"], filters=filters)
+        assert uncached.cache.info()["entries"] == 0
@@ -0,0 +1,327 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tests.conftest import open_db, write_square_hull
+from tomopainter.rose import between, open_queryer
+from tomopainter.rose.catalog import build_catalog
+from tomopainter.rose.snapshot import Snapshot
+
+# (usecols, filters, the same conditions in plain sql)
+FILTER_CASES = [
+    (
+        "phase",
+        ["vel"],
+        {"method": "tpwt", "period": 20},
+        ["t.method = 'tpwt'", "t.period = 20"],
+    ),
+    (
+        "phase",
+        ["period", "vel"],
+        {"method": "ant", "period": [25, 20]},
+        ["t.method = 'ant'", "t.period IN (20, 25)"],
+    ),
+    (
+        "swave",
+        ["depth", "mc_vs"],
+        {"depth": between(60, 120)},
+        ["t.depth BETWEEN 60 AND 120"],
+    ),
+    (
+        "phase",
+        ["vel", "std"],
+        {"method": "tpwt", "bbox": [115.5, 116.5, 28, 29.5]},
+        [
+            "t.method = 'tpwt'",
+            "g.x BETWEEN 115.5 AND 116.5",
+            "g.y BETWEEN 28 AND 29.5",
+        ],
+    ),
+]
+
+
+def _sorted(df) -> pd.DataFrame:
+    return df.sort_values(by=list(df.columns)).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("table, usecols, filters, where", FILTER_CASES)
+def test_filters_equal_where(queryer, table, usecols, filters, where):
+    by_filters = queryer.query(table, usecols=usecols, filters=filters)
+    by_where = queryer.query(table, usecols=usecols, where=where)
+    assert len(by_filters) > 0
+    pd.testing.assert_frame_equal(_sorted(by_filters), _sorted(by_where))
+
+
+def test_snapshot_equals_sql(queryer):
+    cases = [(t, u, f) for t, u, f, _ in FILTER_CASES]
+    cases += [
+        ("phase", ["vel"], {"method": "tpwt", "period": 25}),
+        ("model", ["mc_moho", "lab"], None),
+        ("swave", None, {"depth": [60, 70]}),
+    ]
+    by_sql = [
+        queryer.query(table, usecols=usecols, filters=filters)
+        for table, usecols, filters in cases
+    ]
+    queryer.export_snapshot()
+    queryer.use_snapshot()
+    for (table, usecols, filters), df in zip(cases, by_sql):
+        snap = queryer.query(table, usecols=usecols, filters=filters)
+        pd.testing.assert_frame_equal(
+            _sorted(snap), _sorted(df), check_dtype=False
+        )
+
+
+def test_snapshot_numeric_null_column(queryer):
+    # sedthk has no source, so its column is all NULL
+    snapshot = Snapshot(queryer.export_snapshot())
+    sedthk = snapshot.column("model", "sedthk")
+    assert sedthk.dtype == float and np.isnan(sedthk).all()
+    assert snapshot.column("phase", "grid_id").dtype == np.int64
+    df = snapshot.query(
+        "model",
+        ["sedthk", "lab"],
+        shape=(("sedthk", "between", 2),),
+        params=[0, 10],
+    )
+    assert df.empty
+
+
+def test_journal_mode_kept(tmp_path, queryer):
+    mode = queryer.conn.execute("PRAGMA journal_mode;").fetchone()[0]
+    assert mode == "delete"
+    assert not (tmp_path / "grids.db-wal").exists()
+    with open_db(tmp_path / "grids.db", wal=True) as wal_queryer:
+        mode = wal_queryer.conn.execute("PRAGMA journal_mode;").fetchone()
+        assert mode[0] == "wal"
+
+
+def test_handle_reopens_readonly(queryer):
+    with pytest.raises(TypeError):
+        pickle.dumps(queryer)
+    reader = open_queryer(queryer.handle())
+    assert reader.readonly and reader is open_queryer(queryer.handle())
+    filters = {"method": "tpwt", "period": 20}
+    pd.testing.assert_frame_equal(
+        reader.query("phase", usecols=["vel"], filters=filters),
+        queryer.query("phase", usecols=["vel"], filters=filters),
+    )
+    reader.close()
+
+
+def test_catalog_binds_methods(queryer):
+    # a method quoting sql is a value, not a part of the command
+    with queryer.conn:
+        queryer.conn.execute(
+            "INSERT INTO phase (grid_id, method, period, vel) "
+            "VALUES (0, 'o''rj', 40, 3.9);"
+        )
+    catalog = build_catalog(queryer.conn)
+    assert catalog["periods"]["o'rj"] == [40]
+    assert catalog["periods"]["tpwt"] == [20, 25]
+
+
+def test_grid_index_without_region(tmp_path, queryer):
+    gidx = queryer.grid_index()
+    with queryer.conn:
+        queryer.conn.execute(
+            "UPDATE catalog SET value = 'null' WHERE key = 'region';"
+        )
+    with open_db(tmp_path / "grids.db") as reopened:
+        assert reopened.catalog["region"] is None
+        assert reopened.grid_index().region == gidx.region
+    with open_db(tmp_path / "empty.db") as empty:
+        with pytest.raises(ValueError, match="no grid nodes"):
+            empty.grid_index()
+
+
+@pytest.mark.parametrize(
+    "table, usecols, filters",
+    [
+        ("phase", ["vel", "std"], {"method": "tpwt", "period": 20}),
+        ("swave", ["mc_vs"], {"depth": 100}),
+        ("model", ["mc_moho"], None),
+    ],
+)
+def test_ave_equals_pandas(tmp_path, queryer, table, usecols, filters):
+    bbox = [115.5, 116.5, 28.5, 29.5]
+    write_square_hull(tmp_path, bbox)
+    queryer.write_hull()
+    df = queryer.query(table, usecols=usecols, filters=filters).dropna()
+    # nodes on the hull are inside, as `gmt select`
+    inside = df["x"].between(*bbox[:2]) & df["y"].between(*bbox[2:])
+    assert 0 < inside.sum() <= 9
+    expected = df.copy()
+    for col in usecols:
+        avg = df.loc[inside, col].mean()
+        expected[col] = (df[col] - avg) / avg * 100
+    by_sql = queryer.query(table, usecols=usecols, filters=filters, ave=True)
+    pd.testing.assert_frame_equal(_sorted(by_sql), _sorted(expected))
+    queryer.export_snapshot()
+    queryer.use_snapshot()
+    snap = queryer.query(table, usecols=usecols, filters=filters, ave=True)
+    pd.testing.assert_frame_equal(
+        _sorted(snap), _sorted(expected), check_dtype=False
+    )
+
+
+def test_ave_without_hull(queryer):
+    # every node is inside without a hull file
+    filters = {"method": "ant", "period": 25}
+    df = queryer.query("phase", usecols=["vel"], filters=filters)
+    avg = df["vel"].mean()
+    ave = queryer.query("phase", usecols=["vel"], filters=filters, ave=True)
+    assert np.allclose(ave["vel"], (df["vel"] - avg) / avg * 100)
+
+
+@pytest.mark.parametrize("snapshot", [False, True])
+def test_compact_equals_sql(tmp_path, queryer, snapshot):
+    cases = [(t, u, f) for t, u, f, _ in FILTER_CASES]
+    cases += [
+        ("model", ["mc_moho", "lab"], None),
+        ("swave", None, {"depth": [60, 70]}),
+        ("phase", ["method", "period", "vel"], {"period": 20}),
+    ]
+    if snapshot:
+        queryer.export_snapshot()
+    with open_db(tmp_path / "grids.db", compact=True) as compact:
+        if snapshot:
+            queryer.use_snapshot()
+            compact.use_snapshot()
+        for table, usecols, filters in cases:
+            df = queryer.query(table, usecols=usecols, filters=filters)
+            small = compact.query(table, usecols=usecols, filters=filters)
+            assert df.memory_usage().sum() > small.memory_usage().sum()
+            assert all(small[c].dtype != np.float64 for c in small.columns)
+            # equal up to dtypes and the rounding to float32
+            pd.testing.assert_frame_equal(
+                _sorted(small.astype(df.dtypes.to_dict())),
+                _sorted(df),
+                check_exact=False,
+                rtol=1e-6,
+            )
+            gidx = compact.grid_index()
+            assert np.array_equal(
+                gidx.ids(small["x"], small["y"]), gidx.ids(df["x"], df["y"])
+            )
+
+
+
+AVE_LEVELS = [
+    ("swave", "depth", "mc_vs", {"depth": between(60, 120)}),
+    ("phase", "period", "vel", {"method": "tpwt", "period": [20, 25]}),
+]
+
+
+def _hull_db(tmp_path, queryer, snapshot) -> list:
+    """bbox of the hull written to `queryer`"""
+    bbox = [115.5, 116.5, 28.5, 29.5]
+    write_square_hull(tmp_path, bbox)
+    queryer.write_hull()
+    if snapshot:
+        queryer.export_snapshot()
+        queryer.use_snapshot()
+    return bbox
+
+
+@pytest.mark.parametrize("snapshot", [False, True])
+def test_ave_per_level(tmp_path, queryer, snapshot):
+    bbox = _hull_db(tmp_path, queryer, snapshot)
+    for table, dim, col, filters in AVE_LEVELS:
+        df = queryer.query(
+            table,
+            usecols=[dim, col],
+            avecols=[col],
+            filters=filters,
+            ave=True,
+        )
+        inside = df["x"].between(*bbox[:2]) & df["y"].between(*bbox[2:])
+        # each level averages 0 inside the hull
+        means = df[inside].groupby(dim)[col].mean()
+        assert len(means) > 1 and np.allclose(means, 0)
+    # levels not selected are partitioned too
+    filters = {"method": "tpwt", "period": [20, 25]}
+    df = queryer.query("phase", usecols=["vel"], filters=filters, ave=True)
+    by_period = queryer.query(
+        "phase",
+        usecols=["period", "vel"],
+        avecols=["vel"],
+        filters=filters,
+        ave=True,
+    )
+    pd.testing.assert_frame_equal(
+        _sorted(df), _sorted(by_period.drop(columns="period"))
+    )
+
+
+@pytest.mark.parametrize("snapshot", [False, True])
+def test_query_cube_ave_per_level(tmp_path, queryer, snapshot):
+    _hull_db(tmp_path, queryer, snapshot)
+    for table, dim, col, filters in AVE_LEVELS:
+        cube = queryer.query_cube(table, col, dim, filters=filters, ave=True)
+        assert cube.sizes[dim] > 1
+        # each level equals the single level anomaly grid
+        for level in cube[dim].values:
+            one = queryer.query_grid(
+                table, col, filters=filters | {dim: level}, ave=True
+            )
+            assert np.allclose(cube.sel({dim: level}), one, equal_nan=True)
+
+
+@pytest.mark.parametrize("periods", [None, [25, 20]])
+def test_phases_equal_phase(queryer, periods):
+    method, col = "tpwt", "std"
+    expected = {per: queryer.phase(method, per, col) for per in [20, 25]}
+    by_period = queryer.phases(method, col, periods=periods)
+    assert list(by_period) == [20, 25]
+    for per, df in by_period.items():
+        assert list(df.columns) == ["x", "y", col]
+        pd.testing.assert_frame_equal(_sorted(df), _sorted(expected[per]))
+    pivoted = queryer.phases(method, col, periods=periods, pivot=True)
+    assert list(pivoted.columns) == ["x", "y", 20, 25]
+    # rows are nodes of table grid, aligned by grid ids
+    gidx = queryer.grid_index()
+    ids = gidx.ids(pivoted["x"], pivoted["y"])
+    assert np.array_equal(ids, pivoted.index) and pivoted.index.is_unique
+    for per, df in expected.items():
+        values = pd.Series(df[col].to_numpy(), gidx.ids(df["x"], df["y"]))
+        assert np.array_equal(
+            pivoted[per].to_numpy(),
+            values.reindex(pivoted.index).to_numpy(),
+            equal_nan=True,
+        )
+    # nodes missing some periods are NaN of them
+    assert pivoted[[20, 25]].isna().any().any()
+
+
+@pytest.mark.parametrize(
+    "table, usecols, filters, by, chunk",
+    [
+        ("swave", ["mc_vs"], None, "depth", None),
+        ("swave", ["mc_vs"], {"depth": between(60, 150)}, "depth", 4),
+        ("swave", ["depth", "mc_vs"], None, "grid_id", 7),
+        ("phase", ["vel"], {"method": "tpwt"}, "grid_id", None),
+        ("phase", ["vel"], {"method": "ant"}, "period", 2),
+    ],
+)
+def test_iter_query_equals_query(
+    queryer, table, usecols, filters, by, chunk
+):
+    chunks = list(
+        queryer.iter_query(
+            table, usecols=usecols, filters=filters, by=by, chunk=chunk
+        )
+    )
+    expected = queryer.query(table, usecols=[by, *usecols], filters=filters)
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(
+        _sorted(pd.concat(chunks, ignore_index=True)), _sorted(expected)
+    )
+    # each chunk holds at most `chunk` values of `by`, in order
+    bound = chunk or (4096 if by == "grid_id" else 1)
+    levels = [df[by].unique() for df in chunks]
+    assert all(len(values) <= bound for values in levels)
+    assert all(a.max() < b.min() for a, b in zip(levels, levels[1:]))
+    assert len(chunks) == -(-expected[by].nunique() // bound)
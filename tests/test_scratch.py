@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import threading
+
+import pytest
+
+from tomopainter.tomo_paint.gmt import Scratch, scratch_file
+
+NTASK = 8
+
+
+def test_concurrent_workspaces_are_distinct(tmp_path):
+    barrier = threading.Barrier(NTASK)
+
+    def task(i):
+        with Scratch(prefix="fig", root=tmp_path) as scratch:
+            # every task is inside its workspace at once
+            barrier.wait()
+            fpath = Path(scratch.file("grid.nc"))
+            fpath.write_text(str(i))
+            barrier.wait()
+            return fpath, fpath.read_text()
+
+    with ThreadPoolExecutor(NTASK) as pool:
+        results = list(pool.map(task, range(NTASK)))
+    assert len({fpath.parent for fpath, _ in results}) == NTASK
+    assert [text for _, text in results] == [str(i) for i in range(NTASK)]
+    assert all(fpath.parent.name.startswith("fig_") for fpath, _ in results)
+
+
+def test_removed_on_success(tmp_path):
+    with Scratch(root=tmp_path / "scratch") as scratch:
+        Path(scratch.file("a.grd")).write_text("a")
+        path = scratch.path
+        assert path.parent == tmp_path / "scratch" and path.exists()
+    assert not path.exists() and scratch.path is None
+    with pytest.raises(ValueError):
+        scratch.file("a.grd")
+
+
+def test_kept_on_exception(tmp_path):
+    with pytest.raises(RuntimeError):
+        with Scratch(root=tmp_path) as scratch:
+            fpath = Path(scratch.file("a.grd"))
+            fpath.write_text("a")
+            raise RuntimeError("plot failed")
+    assert fpath.read_text() == "a"
+    assert scratch.path == fpath.parent
+    scratch.cleanup()
+    assert not fpath.parent.exists()
+
+
+def test_scratch_file_in_memory(tmp_path):
+    assert scratch_file(None, "a.grd") is None
+    with Scratch(root=tmp_path) as scratch:
+        assert scratch_file(scratch, "a.grd") == str(scratch.path / "a.grd")
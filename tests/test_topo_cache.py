@@ -0,0 +1,113 @@
+import shutil
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from tomopainter.tomo_paint.gmt import topo_cache
+from tomopainter.tomo_paint.gmt.topo_cache import TopoCache
+
+SPACING = 0.5
+
+
+def _open(fpath) -> xr.DataArray:
+    with xr.open_dataarray(fpath, engine="netcdf4") as da:
+        return da.load()
+
+
+class FakeGMT:
+    """grdcut, grdsample and grdgradient of pygmt on netcdf files"""
+
+    def __init__(self, remote) -> None:
+        # file standing for remote datasets
+        self.remote = remote
+        self.calls = []
+
+    def grdcut(self, grid, region, outgrid) -> None:
+        self.calls.append("grdcut")
+        x1, x2, y1, y2 = region
+        if str(grid).startswith("@"):
+            grid = self.remote
+        da = _open(grid).sel(x=slice(x1, x2), y=slice(y1, y2))
+        da.to_netcdf(outgrid)
+
+    def grdsample(self, grid, outgrid, region, spacing) -> None:
+        self.calls.append("grdsample")
+        shutil.copy(grid, outgrid)
+
+    def grdgradient(self, grid, outgrid, azimuth, normalize, verbose) -> None:
+        # normalized by the whole grid, as "t" of grdgradient
+        self.calls.append("grdgradient")
+        da = _open(grid)
+        grad = da.differentiate("x")
+        (grad / grad.std()).to_netcdf(outgrid)
+
+
+@pytest.fixture
+def gmt(monkeypatch, topo) -> FakeGMT:
+    fake = FakeGMT(topo)
+    for name in ["grdcut", "grdsample", "grdgradient"]:
+        monkeypatch.setattr(
+            topo_cache.pygmt, name, getattr(fake, name), raising=False
+        )
+    return fake
+
+
+@pytest.fixture
+def topo(tmp_path):
+    x = np.arange(100, 110.01, SPACING)
+    y = np.arange(20, 30.01, SPACING)
+    rng = np.random.default_rng(0)
+    z = rng.normal(0, 1000, (len(y), len(x))) * (x / 100) ** 4
+    fpath = tmp_path / "topo.grd"
+    xr.DataArray(z, coords={"y": y, "x": x}, dims=("y", "x")).to_netcdf(fpath)
+    return fpath
+
+
+def test_key_of_region_and_resolution(tmp_path, gmt, topo):
+    cache = TopoCache(tmp_path / "topos")
+    grd, _ = cache.get(topo, [100, 110, 20, 30], SPACING)
+    assert cache.get(topo, [100, 110, 20, 30], SPACING)[0] == grd
+    assert cache.get(topo, [101, 109, 20, 30], SPACING)[0] != grd
+    assert cache.get(topo, [100, 110, 20, 30], SPACING * 2)[0] != grd
+    # a remote dataset of another resolution
+    remote = cache.get("@earth_relief_01m_g", [100, 110, 20, 30], SPACING)
+    assert remote[0] != grd
+    assert gmt.calls.count("grdcut") == 3
+
+
+def test_slice_of_covering_crop(tmp_path, gmt, topo):
+    cache = TopoCache(tmp_path / "topos")
+    cache.get(topo, [100, 110, 20, 30], SPACING)
+    gmt.calls.clear()
+    sub = [104, 106, 22, 25]
+    grd, gra = cache.get(topo, sub, SPACING)
+    assert "grdcut" not in gmt.calls
+    fresh = TopoCache(tmp_path / "fresh").get(topo, sub, SPACING)
+    xr.testing.assert_allclose(_open(grd), _open(fresh[0]))
+    # gradients normalized on the sub region, not sliced from the parent
+    xr.testing.assert_allclose(_open(gra), _open(fresh[1]))
+    (parent,) = [c for c in cache.crops() if "parent" not in c]
+    sliced = _open(cache._files(parent["key"])[1]).sel(
+        x=slice(104, 106), y=slice(22, 25)
+    )
+    assert not np.allclose(sliced, _open(gra))
+
+
+def test_index_persists(tmp_path, gmt, topo):
+    cdir = tmp_path / "topos"
+    grd, gra = TopoCache(cdir).get(topo, [100, 110, 20, 30], SPACING)
+    TopoCache(cdir).get(topo, [104, 106, 22, 25], SPACING)
+    gmt.calls.clear()
+    cache = TopoCache(cdir)
+    assert cache.get(topo, [100, 110, 20, 30], SPACING) == (grd, gra)
+    assert cache.get(topo, [104, 106, 22, 25], SPACING)
+    assert gmt.calls == []
+    crops = cache.crops()
+    assert len(crops) == 2
+    assert sum("parent" in c for c in crops) == 1
+    assert all(c["region"] for c in crops)
+    # the source changed on disk is another crop
+    topo.touch()
+    cache.get(topo, [100, 110, 20, 30], SPACING)
+    assert gmt.calls.count("grdcut") == 1